@@ -52,6 +52,13 @@ def send_log(node, level, message, config_level="INFO"):
     node.send_output("log", pa.array([json.dumps(log_data)]))
 
 
+def send_metric(node, name, value=None, **fields):
+    """Send a structured metric record through the metrics output channel."""
+    record = {"node": "asr", "name": name, "value": value, "ts": time.time()}
+    record.update({key: val for key, val in fields.items() if val is not None})
+    node.send_output("metrics", pa.array([json.dumps(record)]))
+
+
 def main():
     """Main entry point for ASR node"""
     
@@ -154,6 +161,10 @@ def main():
                     send_log(node, "INFO", f"Language: {detected_language}", config.LOG_LEVEL)
                     send_log(node, "DEBUG", f"Processing time: {processing_time:.3f}s", config.LOG_LEVEL)
                     send_log(node, "DEBUG", f"Speed: {duration/processing_time:.1f}x realtime", config.LOG_LEVEL)
+                    session_id = metadata.get("session_id")
+                    send_metric(node, "asr_result", processing_time, session_id=session_id)
+                    if duration > 0:
+                        send_metric(node, "asr_rtf", processing_time / duration, session_id=session_id)
                     
                     # Send transcription output
                     node.send_output(
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PrimeSpeech CPU precision modes against the fp32 baseline.
+
+Runs a fixed sentence set through fp32, int8 dynamic quantization and
+(optionally) int8 + bf16 autocast, and reports:
+  - latency / RTF per mode
+  - BERT feature cosine similarity against fp32 (deterministic accuracy check)
+  - synthesized duration ratio against fp32 (T2S drift shows up as length changes)
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+# Ensure dora_primespeech is in path
+sys.path.insert(0, str(Path(__file__).parent / "dora_primespeech"))
+
+SENTENCES = [
+    "你好，很高兴见到你。",
+    "今天我们来学习一元二次方程的求根公式。",
+    "人工智能技术正在改变我们的世界，让机器能够理解和生成人类语言。",
+    "如果判别式小于零，这个方程在实数范围内没有解。",
+    "Let's check the answer together, step by step.",
+]
+
+
+def build_tts(models_path: Path, voice: str, quantization: str, bf16: bool):
+    from moyoyo_tts.TTS_infer_pack.TTS import TTS
+
+    config = {
+        "version": "v2",
+        "custom": {
+            "device": "cpu",
+            "is_half": False,
+            "version": "v2",
+            "cpu_quantization": quantization,
+            "cpu_bf16": bf16,
+            "t2s_weights_path": str(models_path / f"GPT_weights/{voice}_best_gpt.ckpt"),
+            "vits_weights_path": str(models_path / f"SoVITS_weights/{voice}_best_sovits.pth"),
+            "cnhuhbert_base_path": str(models_path / "chinese-hubert-base"),
+            "bert_base_path": str(models_path / "chinese-roberta-wwm-ext-large"),
+        },
+    }
+    tts = TTS(config)
+    tts.set_ref_audio(str(models_path / f"ref_audios/{voice}_ref.wav"))
+    return tts
+
+
+def prompt_text_for(voice: str) -> str:
+    from config import VOICE_CONFIGS
+
+    for voice_config in VOICE_CONFIGS.values():
+        if voice_config["gpt_weights"].endswith(f"/{voice}_best_gpt.ckpt"):
+            return voice_config["prompt_text"]
+    return ""
+
+
+def bert_features(tts, sentences: List[str]) -> List[np.ndarray]:
+    features = []
+    for text in sentences:
+        _, bert, _ = tts.text_preprocessor.segment_and_extract_feature_for_text(text, "zh", "v2")
+        features.append(bert.float().numpy())
+    return features
+
+
+def benchmark_mode(models_path: Path, voice: str, quantization: str, bf16: bool, runs: int) -> Dict:
+    label = quantization + (" + bf16" if bf16 else "")
+    print("\n" + "=" * 60)
+    print(f"Benchmarking CPU mode: {label}")
+    print("=" * 60)
+
+    init_start = time.time()
+    tts = build_tts(models_path, voice, quantization, bf16)
+    init_time = time.time() - init_start
+    print(f"Init: {init_time:.2f}s (bf16 active: {tts.use_bf16_autocast})")
+
+    prompt_text = prompt_text_for(voice)
+    latencies, durations = [], []
+    for text in SENTENCES:
+        inputs = {
+            "text": text,
+            "text_lang": "zh",
+            "prompt_text": prompt_text,
+            "prompt_lang": "zh",
+            "ref_audio_path": tts.prompt_cache["ref_audio_path"],
+            "top_k": 3,
+            "seed": 233333,
+            "split_bucket": False,
+        }
+        times = []
+        for _ in range(runs):
+            start = time.time()
+            sample_rate, audio = next(tts.run(inputs))
+            times.append(time.time() - start)
+        latencies.append(float(np.median(times)))
+        durations.append(len(audio) / sample_rate)
+        print(f"  {latencies[-1]:.3f}s for {durations[-1]:.2f}s audio: {text[:20]}")
+
+    return {
+        "mode": label,
+        "init_time": init_time,
+        "bf16_active": tts.use_bf16_autocast,
+        "latencies": latencies,
+        "durations": durations,
+        "avg_latency": float(np.mean(latencies)),
+        "rtf": float(np.sum(latencies) / max(np.sum(durations), 1e-6)),
+        "bert_features": bert_features(tts, SENTENCES),
+    }
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = a.ravel(), b.ravel()
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def print_results(results: List[Dict]):
+    """Print accuracy/latency comparison against the fp32 baseline"""
+    baseline = results[0]
+    print("\n" + "=" * 80)
+    print("CPU PRECISION REPORT")
+    print("=" * 80)
+    print(f"{'Mode':<16} {'Init':<8} {'Avg Lat':<10} {'RTF':<8} {'Speedup':<9} {'BERT cos':<10} {'Dur ratio'}")
+    print("-" * 80)
+    for r in results:
+        cos = np.mean([cosine(a, b) for a, b in zip(baseline["bert_features"], r["bert_features"])])
+        ratio = np.mean([d / b for d, b in zip(r["durations"], baseline["durations"]) if b > 0])
+        r["bert_cosine"] = float(cos)
+        r["duration_ratio"] = float(ratio)
+        r["speedup"] = baseline["avg_latency"] / r["avg_latency"]
+        print(f"{r['mode']:<16} {r['init_time']:.2f}s   {r['avg_latency']:.3f}s    {r['rtf']:.3f}   "
+              f"{r['speedup']:.2f}x     {cos:.4f}     {ratio:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PrimeSpeech CPU quantization")
+    parser.add_argument("--voice", type=str, default="doubao", help="Voice weights prefix")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per sentence (median is reported)")
+    parser.add_argument("--bf16", action="store_true", help="Also benchmark int8 + bf16 autocast")
+    parser.add_argument("--output", type=str, default="quantization_report.json")
+    args = parser.parse_args()
+
+    models_dir = os.environ.get("PRIMESPEECH_MODEL_DIR")
+    if not models_dir:
+        print("PRIMESPEECH_MODEL_DIR is not set")
+        sys.exit(1)
+    models_path = Path(os.path.expanduser(models_dir)) / "moyoyo"
+
+    modes = [("none", False), ("int8", False)]
+    if args.bf16:
+        modes.append(("int8", True))
+
+    results = [benchmark_mode(models_path, args.voice, q, bf16, args.runs) for q, bf16 in modes]
+    print_results(results)
+
+    for r in results:
+        del r["bert_features"]
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark PrimeSpeech node startup.
+
+Two phases:
+  1. Import profile: imports the node module in a fresh interpreter with
+     ``-X importtime`` and reports total import time plus the slowest modules
+     and top-level packages (cumulative and self time).
+  2. Time to ready (needs PRIMESPEECH_MODEL_DIR): constructs the TTS wrapper
+     and runs the text frontend warmup, the same work the node does on its
+     background thread before reporting readiness.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict
+
+NODE_DIR = Path(__file__).parent
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str, env: Dict[str, str]) -> Dict:
+    """Import ``module`` in a fresh interpreter and parse the -X importtime output."""
+    start = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=NODE_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_time = time.time() - start
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+
+    packages = defaultdict(float)
+    for entry in modules:
+        packages[entry["module"].split(".")[0]] += entry["self_ms"]
+
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 and proc.stderr.strip() else None,
+        "wall_time": wall_time,
+        "import_ms": sum(entry["self_ms"] for entry in modules),
+        "modules": modules,
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1])),
+    }
+
+
+def print_import_report(report: Dict, top: int):
+    print("\n" + "=" * 70)
+    print(f"IMPORT PROFILE: import {report['module']}")
+    print("=" * 70)
+    if not report["ok"]:
+        print(f"❌ Import failed: {report['error']}")
+    print(f"Interpreter wall time: {report['wall_time']:.2f}s, total import time: {report['import_ms']:.0f}ms")
+
+    print("\nSlowest top-level packages (self time):")
+    for name, ms in list(report["packages"].items())[:top]:
+        print(f"  {ms:>9.1f}ms  {name}")
+
+    print("\nSlowest modules (cumulative time):")
+    slowest = sorted(report["modules"], key=lambda entry: -entry["cumulative_ms"])[:top]
+    for entry in slowest:
+        print(f"  {entry['cumulative_ms']:>9.1f}ms  {entry['module']}")
+
+
+def time_to_ready(voice: str, language: str, engine: str) -> Dict:
+    """Construct the wrapper and warm up the frontend, timing each step."""
+    sys.path.insert(0, str(NODE_DIR))
+    from dora_primespeech.config import VOICE_CONFIGS
+
+    voice_config = dict(next(
+        (config for name, config in VOICE_CONFIGS.items() if name.lower().replace(" ", "") == voice),
+        {},
+    ))
+    voice_config["tts_engine"] = engine
+
+    timings = {}
+    start = time.time()
+    from dora_primespeech.moyoyo_tts_wrapper_streaming_fix import StreamingMoYoYoTTSWrapper
+    timings["import_wrapper"] = time.time() - start
+
+    start = time.time()
+    wrapper = StreamingMoYoYoTTSWrapper(voice=voice, device="cpu", voice_config=voice_config or None)
+    timings["load_models"] = time.time() - start
+    if wrapper.tts is None:
+        return {"ok": False, "timings": timings}
+
+    start = time.time()
+    wrapper.warmup(language)
+    timings["warmup_frontend"] = time.time() - start
+
+    start = time.time()
+    wrapper.synthesize("你好，很高兴见到你。", language=language)
+    timings["first_synthesis"] = time.time() - start
+
+    timings["ready"] = timings["import_wrapper"] + timings["load_models"] + timings["warmup_frontend"]
+    return {"ok": True, "timings": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PrimeSpeech node startup")
+    parser.add_argument("--module", action="append",
+                        help="Module to profile (repeatable, default: dora_primespeech.main)")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--voice", type=str, default="doubao")
+    parser.add_argument("--language", type=str, default="zh")
+    parser.add_argument("--engine", type=str, default="torch", choices=["torch", "onnx"])
+    parser.add_argument("--skip-ready", action="store_true", help="Only run the import profile")
+    parser.add_argument("--output", type=str, default="startup_report.json")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(NODE_DIR), env.get("PYTHONPATH")]))
+
+    results = {"imports": []}
+    for module in args.module or ["dora_primespeech.main"]:
+        report = profile_imports(module, env)
+        print_import_report(report, args.top)
+        results["imports"].append(report)
+
+    if not args.skip_ready:
+        if not os.environ.get("PRIMESPEECH_MODEL_DIR"):
+            print("\nPRIMESPEECH_MODEL_DIR is not set, skipping time-to-ready")
+        else:
+            print("\n" + "=" * 70)
+            print("TIME TO READY")
+            print("=" * 70)
+            ready = time_to_ready(args.voice, args.language, args.engine)
+            for step, seconds in ready["timings"].items():
+                print(f"  {step:<18} {seconds:.2f}s")
+            if not ready["ok"]:
+                print("❌ TTS engine failed to initialize")
+            results["ready"] = ready
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,19 @@ class PrimeSpeechConfig:
     USE_GPU = os.getenv("USE_GPU", "false").lower() == "true"
     DEVICE = os.getenv("DEVICE", "cuda" if USE_GPU else "cpu")
     NUM_THREADS = int(os.getenv("NUM_THREADS", "4"))
+    CPU_QUANTIZATION = os.getenv("CPU_QUANTIZATION", "none").lower()  # none, int8 (CPU only)
+    CPU_BF16 = os.getenv("CPU_BF16", "false").lower() == "true"  # bf16 autocast if the CPU supports it
+    TTS_ENGINE = os.getenv("TTS_ENGINE", "torch").lower()  # torch, onnx (graphs from moyoyo_tts/onnx_export.py)
+    PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"  # load models on a background thread at startup
+
+    # Prefetch of recurring phrases (see prefetch.py)
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_PHRASES = os.getenv("PREFETCH_PHRASES", "")  # file with one phrase per line, or "a|b|c"
+    PREFETCH_CACHE_MB = float(os.getenv("PREFETCH_CACHE_MB", "64"))  # audio cache budget
+    PREFETCH_MAX_CHARS = int(os.getenv("PREFETCH_MAX_CHARS", "40"))  # longer segments are never cached
+    PREFETCH_MIN_COUNT = int(os.getenv("PREFETCH_MIN_COUNT", "2"))  # repeats before a segment is learned
+    PREFETCH_IDLE_SECONDS = float(os.getenv("PREFETCH_IDLE_SECONDS", "1.0"))  # quiet time before prefetching
+    PREFETCH_STATE_FILE = os.getenv("PREFETCH_STATE_FILE", "")  # learned phrases, kept across restarts
     
     # Audio settings
     SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "32000"))
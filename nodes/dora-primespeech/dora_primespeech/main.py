@@ -17,6 +17,11 @@ from typing import Optional
 from .config import PrimeSpeechConfig, VOICE_CONFIGS
 from .model_manager import ModelManager
 from .moyoyo_tts_wrapper_streaming_fix import StreamingMoYoYoTTSWrapper as MoYoYoTTSWrapper, MOYOYO_AVAILABLE
+from .prefetch import AudioCache, TTSPrefetcher, cache_key, load_phrases
+from .synthesis_worker import SynthesisJob, SynthesisWorker
+
+# How long the event loop waits for Dora events before flushing worker output
+OUTPUT_POLL_INTERVAL = 0.02
 
 
 def send_log(node, level, message, config_level="INFO"):
@@ -46,6 +51,13 @@ def send_log(node, level, message, config_level="INFO"):
     node.send_output("log", pa.array([json.dumps(log_data)]))
 
 
+def metric_record(name, value=None, **fields):
+    """Structured metric record for the metrics output channel."""
+    record = {"node": "primespeech", "name": name, "value": value, "ts": time.time()}
+    record.update({key: val for key, val in fields.items() if val is not None})
+    return json.dumps(record)
+
+
 def validate_language_config(lang_code, param_name, node, log_level):
     """Validate language configuration and provide helpful error messages"""
     # Valid language codes for MoYoYo TTS v2
@@ -159,6 +171,10 @@ def main():
         "use_gpu": config.USE_GPU,
         "device": config.DEVICE,
         "sample_rate": config.SAMPLE_RATE,
+        "cpu_quantization": config.CPU_QUANTIZATION,
+        "cpu_bf16": config.CPU_BF16,
+        "tts_engine": config.TTS_ENGINE,
+        "num_threads": config.NUM_THREADS,
     })
     
     # Initialize model manager
@@ -176,6 +192,9 @@ def main():
     send_log(node, "INFO", f"Text Language: {voice_config.get('text_lang', 'auto')} (configured: {config.TEXT_LANG})", config.LOG_LEVEL)
     send_log(node, "INFO", f"Prompt Language: {voice_config.get('prompt_lang', 'auto')} (configured: {config.PROMPT_LANG})", config.LOG_LEVEL)
     send_log(node, "INFO", f"Device: {config.DEVICE}", config.LOG_LEVEL)
+    send_log(node, "INFO", f"TTS engine: {config.TTS_ENGINE}", config.LOG_LEVEL)
+    if not config.USE_GPU:
+        send_log(node, "INFO", f"CPU quantization: {config.CPU_QUANTIZATION}, bf16 autocast: {config.CPU_BF16}", config.LOG_LEVEL)
 
     # Validate the final configuration
     final_text_lang = voice_config.get('text_lang', 'auto')
@@ -203,256 +222,462 @@ def main():
     # Statistics
     total_syntheses = 0
     total_duration = 0
-    
-    for event in node:
-        if event["type"] == "INPUT":
-            input_id = event["id"]
+
+    # Audio cache of recurring short segments, filled ahead of time while idle
+    language = voice_config.get("text_lang", "zh")
+    speed = voice_config.get("speed_factor", 1.0)
+    audio_cache = AudioCache(int(config.PREFETCH_CACHE_MB * 1024 * 1024))
+    prefetcher: Optional[TTSPrefetcher] = None
+    if config.PREFETCH_ENABLED:
+        prefetcher = TTSPrefetcher(
+            audio_cache, language, speed,
+            phrases=load_phrases(config.PREFETCH_PHRASES),
+            max_chars=config.PREFETCH_MAX_CHARS,
+            min_count=config.PREFETCH_MIN_COUNT,
+            idle_seconds=config.PREFETCH_IDLE_SECONDS,
+        )
+        if config.PREFETCH_STATE_FILE:
+            prefetcher.load(config.PREFETCH_STATE_FILE)
+
+    def _clean_metadata(meta_dict):
+        """Drop None values from metadata so Arrow conversion doesn't fail."""
+        if not meta_dict:
+            return {}
+        cleaned = {}
+        for key, value in meta_dict.items():
+            if value is None:
+                continue
+            cleaned[key] = value
+        return cleaned
+
+    def load_models(log):
+        """Create the TTS engine and warm up its text frontend.
+
+        Returns None on success, or the error message if initialization failed.
+        """
+        nonlocal tts_engine, model_loaded
+
+        log("INFO", "Loading models for the first time...")
+        # Validate models directory early so failures are visible
+        _validate_models_path(log)
+
+        try:
+            # Check if models exist, download if needed
+            if not model_manager.check_models_exist(voice_name, voice_config):
+                log("INFO", f"Downloading models for {voice_name}...")
+                try:
+                    model_paths = model_manager.get_voice_model_paths(voice_name, voice_config)
+                    log("INFO", "Models downloaded successfully")
+                except Exception as download_err:
+                    log("WARNING", f"Model download failed: {download_err}")
+                    log("WARNING", "Will attempt to continue with existing models or placeholders")
+
+            # Always use PRIMESPEECH_MODEL_DIR
+            log("INFO", "Using PRIMESPEECH_MODEL_DIR for models...")
+            # Initialize TTS engine
+            # Convert voice name to lowercase and remove spaces for MoYoYo compatibility
+            moyoyo_voice = voice_name.lower().replace(" ", "")
+            device = "cuda" if config.USE_GPU and config.DEVICE.startswith("cuda") else "cpu"
+
+            enable_streaming = config.RETURN_FRAGMENT if hasattr(config, 'RETURN_FRAGMENT') else False
+
+            # Initialize TTS wrapper using PRIMESPEECH_MODEL_DIR
+            tts_engine = MoYoYoTTSWrapper(
+                voice=moyoyo_voice,
+                device=device,
+                enable_streaming=enable_streaming,
+                chunk_duration=0.3,
+                voice_config=voice_config,
+                logger_func=log
+            )
+
+            # Check if initialization succeeded
+            if tts_engine is None or not hasattr(tts_engine, 'tts') or tts_engine.tts is None:
+                log("ERROR", "TTS engine initialization failed!")
+                log("ERROR", "TTS wrapper exists but internal TTS is None")
+            else:
+                log("INFO", "TTS engine initialized successfully")
+                try:
+                    tts_engine.warmup(voice_config.get("text_lang", "zh"))
+                except Exception as warmup_err:
+                    # Not fatal: the frontend loads again on the first segment
+                    log("WARNING", f"Text frontend warmup failed: {warmup_err}")
+            model_loaded = True
+            log("INFO", "TTS engine ready")
+            return None
+        except Exception as init_err:
+            log("ERROR", f"TTS init error: {init_err}")
+            log("ERROR", f"Traceback: {traceback.format_exc()}")
+            # Mark as not loaded so the next segment retries
+            model_loaded = False
+            return str(init_err)
+
+    def preload_models():
+        """Runs on the worker thread at startup; segments queue up meanwhile."""
+        start = time.time()
+        if load_models(worker.log) is None:
+            worker.log("INFO", f"[PrimeSpeech] Ready in {time.time() - start:.2f}s")
+
+    def synthesize_job(job: SynthesisJob):
+        """Synthesize one text segment on the worker thread.
+
+        Audio goes out through ``worker.send_output`` tied to the job so it is
+        dropped if the job gets cancelled. Returns the segment_complete status
+        and metadata for the worker to send.
+        """
+        nonlocal total_syntheses, total_duration
+
+        log = worker.log
+        text = job.text
+        metadata = job.metadata
+        session_id = metadata.get("session_id", "default")
+        request_id = metadata.get("request_id", f"req_{total_syntheses}")
+        segment_index = metadata.get("segment_index", -1)
+
+        if job.prefetch:
+            return prefetch_job(job)
+
+        log("INFO", f"Processing segment {segment_index + 1} (len={len(text)})")
+
+        # Recurring phrases are served from the audio cache, models or not
+        cached = audio_cache.get(cache_key(text, language, speed)) if prefetcher is not None else None
+        if cached is not None:
+            sample_rate, audio_array = cached
+            audio_duration = len(audio_array) / sample_rate
+            worker.send_output(
+                "audio",
+                audio_array,
+                _clean_metadata({
+                    "session_id": session_id,
+                    "request_id": request_id,
+                    "segment_index": segment_index,
+                    "segments_remaining": metadata.get("segments_remaining", 0),
+                    "conversation_id": metadata.get("conversation_id"),
+                    "question_id": metadata.get("question_id"),
+                    "sample_rate": sample_rate,
+                    "duration": audio_duration,
+                    "synthesis_time": 0.0,
+                    "is_streaming": False,
+                    "cached": True,
+                    "voice": voice_name,
+                    "language": language,
+                    "text": text
+                }),
+                job=job,
+            )
+            worker.send_output("metrics", metric_record("tts_first_audio", 0.0, session_id=session_id), {})
+            log("INFO", f"Cache hit for segment {segment_index + 1}: {audio_duration:.2f}s audio")
+            return "completed", _clean_metadata({
+                "session_id": session_id,
+                "request_id": request_id,
+                "segment_index": segment_index,
+                "segments_remaining": metadata.get("segments_remaining", 0),
+                "conversation_id": metadata.get("conversation_id")
+            })
+
+        # Load models if background preloading is disabled or failed
+        if not model_loaded:
+            init_error = load_models(log)
+            if init_error is not None:
+                return "error", {
+                    "session_id": session_id,
+                    "request_id": request_id,
+                    "segment_index": segment_index,
+                    "error": init_error,
+                    "error_stage": "init"
+                }
+
+        # Synthesize speech
+        start_time = time.time()
+
+        try:
+            # Check if TTS engine is available
+            if tts_engine is None:
+                log("ERROR", "Cannot synthesize - TTS engine is None!")
+                raise RuntimeError("TTS engine not initialized")
+            
+            if hasattr(tts_engine, 'tts') and tts_engine.tts is None:
+                log("ERROR", "Cannot synthesize - internal TTS is None!")
+                raise RuntimeError("Internal TTS engine not initialized")
             
-            if input_id == "text":
-                # Get text to synthesize
-                text = event["value"][0].as_py()
-                metadata = event.get("metadata", {})
-                
-                session_id = metadata.get("session_id", "default")
-                request_id = metadata.get("request_id", f"req_{total_syntheses}")
-                segment_index = metadata.get("segment_index", -1)
-                
-                send_log(node, "INFO", f"Processing segment {segment_index + 1} (len={len(text)})", config.LOG_LEVEL)
-                
-                # Load models if not loaded
-                if not model_loaded:
-                    send_log(node, "INFO", "Loading models for the first time...", config.LOG_LEVEL)
-                    # Validate models directory early so failures are visible
-                    _validate_models_path(lambda lvl, msg: send_log(node, lvl, msg, config.LOG_LEVEL))
-
-                    try:
-                        # Check if models exist, download if needed
-                        if not model_manager.check_models_exist(voice_name, voice_config):
-                            send_log(node, "INFO", f"Downloading models for {voice_name}...", config.LOG_LEVEL)
-                            try:
-                                model_paths = model_manager.get_voice_model_paths(voice_name, voice_config)
-                                send_log(node, "INFO", "Models downloaded successfully", config.LOG_LEVEL)
-                            except Exception as download_err:
-                                send_log(node, "WARNING", f"Model download failed: {download_err}", config.LOG_LEVEL)
-                                send_log(node, "WARNING", "Will attempt to continue with existing models or placeholders", config.LOG_LEVEL)
-
-                        # Always use PRIMESPEECH_MODEL_DIR
-                        send_log(node, "INFO", "Using PRIMESPEECH_MODEL_DIR for models...", config.LOG_LEVEL)
-                        # Initialize TTS engine
-                        # Convert voice name to lowercase and remove spaces for MoYoYo compatibility
-                        moyoyo_voice = voice_name.lower().replace(" ", "")
-                        device = "cuda" if config.USE_GPU and config.DEVICE.startswith("cuda") else "cpu"
-
-                        enable_streaming = config.RETURN_FRAGMENT if hasattr(config, 'RETURN_FRAGMENT') else False
-
-                        # Initialize TTS wrapper using PRIMESPEECH_MODEL_DIR
-                        tts_engine = MoYoYoTTSWrapper(
-                            voice=moyoyo_voice,
-                            device=device,
-                            enable_streaming=enable_streaming,
-                            chunk_duration=0.3,
-                            voice_config=voice_config,
-                            logger_func=lambda level, msg: send_log(node, level, msg, config.LOG_LEVEL)
-                        )
 
-                        # Check if initialization succeeded
-                        if tts_engine is None or not hasattr(tts_engine, 'tts') or tts_engine.tts is None:
-                            send_log(node, "ERROR", "TTS engine initialization failed!", config.LOG_LEVEL)
-                            send_log(node, "ERROR", "TTS wrapper exists but internal TTS is None", config.LOG_LEVEL)
-                        else:
-                            send_log(node, "INFO", "TTS engine initialized successfully", config.LOG_LEVEL)
-                        model_loaded = True
-                        send_log(node, "INFO", "TTS engine ready", config.LOG_LEVEL)
-                    except Exception as init_err:
-                        send_log(node, "ERROR", f"TTS init error: {init_err}", config.LOG_LEVEL)
-                        send_log(node, "ERROR", f"Traceback: {traceback.format_exc()}", config.LOG_LEVEL)
-                        # Mark as not loaded and send error completion without audio
-                        model_loaded = False
-                        node.send_output(
-                            "segment_complete",
-                            pa.array(["error"]),
-                            metadata={
-                                "session_id": session_id,
-                                "request_id": request_id,
-                                "segment_index": segment_index,
-                                "error": str(init_err),
-                                "error_stage": "init"
-                            }
-                        )
-                        # Skip this event since we cannot synthesize
-                        continue
-                
-                def _clean_metadata(meta_dict):
-                    """Drop None values from metadata so Arrow conversion doesn't fail."""
-                    if not meta_dict:
-                        return {}
-                    cleaned = {}
-                    for key, value in meta_dict.items():
-                        if value is None:
-                            continue
-                        cleaned[key] = value
-                    return cleaned
-
-                # Synthesize speech
-                start_time = time.time()
+            # Reset may have arrived while models were loading
+            if job.cancelled:
+                return "cancelled", {}
+            
+            if hasattr(tts_engine, 'enable_streaming') and tts_engine.enable_streaming:
+                # Streaming synthesis
+                log("INFO", "Using streaming synthesis...")
+                fragment_num = 0
+                total_audio_duration = 0
+                fragments = [] if job.cache else None
                 
-                try:
-                    # Check if TTS engine is available
-                    if tts_engine is None:
-                        send_log(node, "ERROR", "Cannot synthesize - TTS engine is None!", config.LOG_LEVEL)
-                        raise RuntimeError("TTS engine not initialized")
-                    
-                    if hasattr(tts_engine, 'tts') and tts_engine.tts is None:
-                        send_log(node, "ERROR", "Cannot synthesize - internal TTS is None!", config.LOG_LEVEL)
-                        raise RuntimeError("Internal TTS engine not initialized")
-                    
-                    language = voice_config.get("text_lang", "zh")
-                    speed = voice_config.get("speed_factor", 1.0)
-                    
-                    if hasattr(tts_engine, 'enable_streaming') and tts_engine.enable_streaming:
-                        # Streaming synthesis
-                        send_log(node, "INFO", "Using streaming synthesis...", config.LOG_LEVEL)
-                        fragment_num = 0
-                        total_audio_duration = 0
-                        
-                        for sample_rate, audio_fragment in tts_engine.synthesize_streaming(text, language=language, speed=speed):
-                            fragment_num += 1
-                            fragment_duration = len(audio_fragment) / sample_rate
-                            total_audio_duration += fragment_duration
-
-                            # Guard against empty fragments
-                            if audio_fragment is None or len(audio_fragment) == 0:
-                                send_log(node, "WARNING", f"Skipping empty audio fragment {fragment_num}", config.LOG_LEVEL)
-                            else:
-                                # Ensure type is float32 for consistency
-                                if audio_fragment.dtype != np.float32:
-                                    audio_fragment = audio_fragment.astype(np.float32)
-                                node.send_output(
-                                    "audio",
-                                    pa.array([audio_fragment]),
-                                    metadata=_clean_metadata({
-                                        "session_id": session_id,
-                                        "request_id": request_id,
-                                        "segment_index": segment_index,
-                                        "segments_remaining": metadata.get("segments_remaining", 0),
-                                        "conversation_id": metadata.get("conversation_id"),
-                                        "question_id": metadata.get("question_id"),  # Pass through question_id
-                                        "fragment_num": fragment_num,
-                                        "sample_rate": sample_rate,
-                                        "duration": fragment_duration,
-                                        "is_streaming": True,
-                                        "voice": voice_name,
-                                        "language": language,
-                                        "text": text  # Add the text being synthesized
-                                    })
-                                )
-                        
-                        synthesis_time = time.time() - start_time
-                        send_log(node, "INFO", f"Streamed {fragment_num} fragments, {total_audio_duration:.2f}s audio in {synthesis_time:.3f}s", config.LOG_LEVEL)
-                        # If nothing was streamed, mark as error to avoid hanging clients
-                        if fragment_num == 0:
-                            raise RuntimeError("No audio fragments produced during streaming synthesis")
-                        
+                for sample_rate, audio_fragment in tts_engine.synthesize_streaming(text, language=language, speed=speed):
+                    if job.cancelled:
+                        break
+                    fragment_num += 1
+                    fragment_duration = len(audio_fragment) / sample_rate
+                    total_audio_duration += fragment_duration
+
+                    # Guard against empty fragments
+                    if audio_fragment is None or len(audio_fragment) == 0:
+                        log("WARNING", f"Skipping empty audio fragment {fragment_num}")
                     else:
-                        # Batch synthesis
-                        sample_rate, audio_array = tts_engine.synthesize(text, language=language, speed=speed)
-                        
-                        synthesis_time = time.time() - start_time
-                        audio_duration = len(audio_array) / sample_rate
-                        if audio_array is None or len(audio_array) == 0:
-                            raise RuntimeError("TTS returned empty audio array")
-                        # Normalize dtype
-                        if audio_array.dtype != np.float32:
-                            audio_array = audio_array.astype(np.float32)
-                        
-                        total_syntheses += 1
-                        total_duration += audio_duration
-                        
-                        send_log(node, "INFO", f"Synthesized: {audio_duration:.2f}s audio in {synthesis_time:.3f}s", config.LOG_LEVEL)
-                        
-                        # Send audio output with segment counting metadata
-                        node.send_output(
+                        # Ensure type is float32 for consistency
+                        if audio_fragment.dtype != np.float32:
+                            audio_fragment = audio_fragment.astype(np.float32)
+                        if fragments is not None:
+                            fragments.append(audio_fragment)
+                        worker.send_output(
                             "audio",
-                            pa.array([audio_array]),
-                            metadata=_clean_metadata({
+                            audio_fragment,
+                            _clean_metadata({
                                 "session_id": session_id,
                                 "request_id": request_id,
                                 "segment_index": segment_index,
                                 "segments_remaining": metadata.get("segments_remaining", 0),
                                 "conversation_id": metadata.get("conversation_id"),
                                 "question_id": metadata.get("question_id"),  # Pass through question_id
+                                "fragment_num": fragment_num,
                                 "sample_rate": sample_rate,
-                                "duration": audio_duration,
-                                "synthesis_time": synthesis_time,
-                                "is_streaming": False,
+                                "duration": fragment_duration,
+                                "is_streaming": True,
                                 "voice": voice_name,
                                 "language": language,
                                 "text": text  # Add the text being synthesized
-                            })
+                            }),
+                            job=job,
                         )
-                    
-                    # Send segment completion signal with metadata
-                    node.send_output(
-                        "segment_complete",
-                        pa.array(["completed"]),
-                        metadata=_clean_metadata({
-                            "session_id": session_id,
-                            "request_id": request_id,
-                            "segment_index": segment_index,
-                            "segments_remaining": metadata.get("segments_remaining", 0),
-                            "conversation_id": metadata.get("conversation_id")
-                        })
-                    )
-                    send_log(node, "INFO", f"Sent segment_complete for segment {segment_index + 1}", config.LOG_LEVEL)
-                    
-                except Exception as e:
-                    error_details = traceback.format_exc()
-
-                    # Check for specific language-related errors
-                    if "assert text_lang" in str(e) or "assert prompt_lang" in str(e) or "AssertionError" in str(e.__class__.__name__):
-                        send_log(node, "ERROR", "="*60, config.LOG_LEVEL)
-                        send_log(node, "ERROR", "CRITICAL: Language configuration error detected!", config.LOG_LEVEL)
-                        send_log(node, "ERROR", f"TEXT_LANG: '{language}' (from config: '{config.TEXT_LANG}')", config.LOG_LEVEL)
-                        send_log(node, "ERROR", f"PROMPT_LANG: '{voice_config.get('prompt_lang', 'auto')}' (from config: '{config.PROMPT_LANG}')", config.LOG_LEVEL)
-                        send_log(node, "ERROR", "Valid languages: auto, auto_yue, zh, en, ja, ko, yue, all_zh, all_ja, all_yue, all_ko", config.LOG_LEVEL)
-                        send_log(node, "ERROR", "Common mistakes: 'cn' should be 'zh', 'chinese' should be 'zh'", config.LOG_LEVEL)
-                        send_log(node, "ERROR", "Fix your configuration and restart!", config.LOG_LEVEL)
-                        send_log(node, "ERROR", "="*60, config.LOG_LEVEL)
-
-                    send_log(node, "ERROR", f"Synthesis error: {e}", config.LOG_LEVEL)
-                    send_log(node, "ERROR", f"Traceback: {error_details}", config.LOG_LEVEL)
-                    
-                    # Do NOT send invalid audio on error; only notify completion with error
-                    node.send_output(
-                        "segment_complete",
-                        pa.array(["error"]),
-                        metadata={
-                            "session_id": session_id,
-                            "request_id": request_id,
-                            "segment_index": segment_index,
-                            "error": str(e),
-                            "error_stage": "synthesis"
-                        }
-                    )
-                    send_log(node, "ERROR", f"Sent error segment_complete for segment {segment_index + 1}", config.LOG_LEVEL)
+                        if fragment_num == 1:
+                            worker.send_output("metrics", metric_record(
+                                "tts_first_audio", time.time() - start_time, session_id=session_id), {})
+
+                if job.cancelled:
+                    return "cancelled", {}
+                
+                synthesis_time = time.time() - start_time
+                log("INFO", f"Streamed {fragment_num} fragments, {total_audio_duration:.2f}s audio in {synthesis_time:.3f}s")
+                if total_audio_duration > 0:
+                    worker.send_output("metrics", metric_record(
+                        "tts_rtf", synthesis_time / total_audio_duration, session_id=session_id), {})
+                # If nothing was streamed, mark as error to avoid hanging clients
+                if fragment_num == 0:
+                    raise RuntimeError("No audio fragments produced during streaming synthesis")
+                if fragments:
+                    audio_cache.put(cache_key(text, language, speed), sample_rate, np.concatenate(fragments))
+                
+            else:
+                # Batch synthesis
+                sample_rate, audio_array = tts_engine.synthesize(text, language=language, speed=speed)
+                if job.cancelled:
+                    return "cancelled", {}
+                
+                synthesis_time = time.time() - start_time
+                if audio_array is None or len(audio_array) == 0:
+                    raise RuntimeError("TTS returned empty audio array")
+                audio_duration = len(audio_array) / sample_rate
+                # Normalize dtype
+                if audio_array.dtype != np.float32:
+                    audio_array = audio_array.astype(np.float32)
+                
+                total_syntheses += 1
+                total_duration += audio_duration
+                if job.cache:
+                    audio_cache.put(cache_key(text, language, speed), sample_rate, audio_array)
+                
+                log("INFO", f"Synthesized: {audio_duration:.2f}s audio in {synthesis_time:.3f}s")
+                
+                # Send audio output with segment counting metadata
+                worker.send_output(
+                    "audio",
+                    audio_array,
+                    _clean_metadata({
+                        "session_id": session_id,
+                        "request_id": request_id,
+                        "segment_index": segment_index,
+                        "segments_remaining": metadata.get("segments_remaining", 0),
+                        "conversation_id": metadata.get("conversation_id"),
+                        "question_id": metadata.get("question_id"),  # Pass through question_id
+                        "sample_rate": sample_rate,
+                        "duration": audio_duration,
+                        "synthesis_time": synthesis_time,
+                        "is_streaming": False,
+                        "voice": voice_name,
+                        "language": language,
+                        "text": text  # Add the text being synthesized
+                    }),
+                    job=job,
+                )
+                worker.send_output("metrics", metric_record(
+                    "tts_first_audio", synthesis_time, session_id=session_id), {})
+                worker.send_output("metrics", metric_record(
+                    "tts_rtf", synthesis_time / audio_duration, session_id=session_id), {})
+            
+            # Segment completion signal is sent by the worker
+            log("INFO", f"Finished segment {segment_index + 1}")
+            return "completed", _clean_metadata({
+                "session_id": session_id,
+                "request_id": request_id,
+                "segment_index": segment_index,
+                "segments_remaining": metadata.get("segments_remaining", 0),
+                "conversation_id": metadata.get("conversation_id")
+            })
+            
+        except Exception as e:
+            error_details = traceback.format_exc()
+
+            # Check for specific language-related errors
+            if "assert text_lang" in str(e) or "assert prompt_lang" in str(e) or "AssertionError" in str(e.__class__.__name__):
+                log("ERROR", "="*60)
+                log("ERROR", "CRITICAL: Language configuration error detected!")
+                log("ERROR", f"TEXT_LANG: '{language}' (from config: '{config.TEXT_LANG}')")
+                log("ERROR", f"PROMPT_LANG: '{voice_config.get('prompt_lang', 'auto')}' (from config: '{config.PROMPT_LANG}')")
+                log("ERROR", "Valid languages: auto, auto_yue, zh, en, ja, ko, yue, all_zh, all_ja, all_yue, all_ko")
+                log("ERROR", "Common mistakes: 'cn' should be 'zh', 'chinese' should be 'zh'")
+                log("ERROR", "Fix your configuration and restart!")
+                log("ERROR", "="*60)
+
+            log("ERROR", f"Synthesis error: {e}")
+            log("ERROR", f"Traceback: {error_details}")
+            
+            # Do NOT send invalid audio on error; only notify completion with error
+            return "error", {
+                "session_id": session_id,
+                "request_id": request_id,
+                "segment_index": segment_index,
+                "error": str(e),
+                "error_stage": "synthesis"
+            }
+
+    def prefetch_job(job: SynthesisJob):
+        """Synthesize a predicted phrase into the audio cache; nothing is sent."""
+        if not model_loaded or tts_engine is None:
+            return "skipped", {}
+        start_time = time.time()
+        try:
+            sample_rate, audio_array = tts_engine.synthesize(job.text, language=language, speed=speed)
+        except Exception as e:
+            if not job.cancelled:
+                worker.log("WARNING", f"[PrimeSpeech] Prefetch failed for '{job.text[:20]}': {e}")
+                prefetch_failures.append(job.text)
+            return "error", {}
+        if job.cancelled:
+            return "cancelled", {}
+        if audio_array is None or len(audio_array) == 0:
+            prefetch_failures.append(job.text)
+            return "error", {}
+        audio_cache.put(cache_key(job.text, language, speed), sample_rate, audio_array)
+        worker.log("DEBUG", f"[PrimeSpeech] Prefetched '{job.text[:20]}' in {time.time() - start_time:.2f}s "
+                            f"(cache: {len(audio_cache)} phrases, {audio_cache.nbytes / 1e6:.1f}MB)")
+        return "prefetched", {}
+
+    # Failed prefetch phrases, reported back to the Dora thread
+    prefetch_failures = []
+
+    def abort_in_flight():
+        if tts_engine is not None:
+            tts_engine.abort_synthesis()
+
+    worker = SynthesisWorker(synthesize_job, abort_fn=abort_in_flight,
+                             init_fn=preload_models if config.PRELOAD_MODELS else None)
+    worker.start()
+    if config.PRELOAD_MODELS:
+        send_log(node, "INFO", "[PrimeSpeech] Loading models in the background", config.LOG_LEVEL)
+
+    def flush_outputs():
+        worker.drain(
+            lambda output_id, value, meta: node.send_output(output_id, pa.array([value]), metadata=meta),
+            lambda level, msg: send_log(node, level, msg, config.LOG_LEVEL),
+        )
+
+    def handle_reset(metadata):
+        question_id = metadata.get("question_id")
+        send_log(node, "INFO", f"[PrimeSpeech] RESET received (question_id={question_id})", config.LOG_LEVEL)
+        dropped, cancelled_in_flight = worker.cancel_stale(question_id)
+        send_log(node, "INFO",
+                 f"[PrimeSpeech] Reset: dropped {dropped} queued segments, "
+                 f"in-flight cancelled: {cancelled_in_flight}", config.LOG_LEVEL)
+
+    def maybe_prefetch():
+        """Queue one prefetch job when the node is idle."""
+        while prefetch_failures:
+            prefetcher.mark_failed(prefetch_failures.pop())
+        # Wait for the startup load to finish so prefetch never queues ahead of it
+        if not worker.ready.is_set() or not model_loaded:
+            return
+        phrase = prefetcher.next_phrase(queue_empty=worker.pending == 0)
+        if phrase is not None:
+            prefetcher.prefetched += 1
+            worker.submit(SynthesisJob(text=phrase, metadata={}, prefetch=True))
+
+    # Poll with a short timeout so worker output is flushed promptly
+    while True:
+        event = node.next(timeout=OUTPUT_POLL_INTERVAL)
+        flush_outputs()
+        if prefetcher is not None:
+            maybe_prefetch()
+
+        if event is None:
+            continue
+
+        if event["type"] == "INPUT":
+            input_id = event["id"]
+            
+            if input_id == "text":
+                # Queue text for the synthesis worker
+                text = event["value"][0].as_py()
+                metadata = dict(event.get("metadata", {}) or {})
+                metadata.setdefault("request_id", f"req_{total_syntheses}")
+                cache = False
+                if prefetcher is not None:
+                    prefetcher.observe(text)
+                    cache = prefetcher.is_hot(text)
+                worker.submit(SynthesisJob(text=text, metadata=metadata, cache=cache))
+
+            elif input_id == "is_speaking":
+                # From the speech monitor: do not prefetch while the user talks
+                if prefetcher is not None:
+                    prefetcher.set_user_speaking(bool(event["value"][0].as_py()))
+
+            elif input_id == "reset":
+                handle_reset(event.get("metadata", {}) or {})
             
             elif input_id == "control":
                 # Handle control commands
                 command = event["value"][0].as_py()
                 
                 if command == "reset":
-                    send_log(node, "INFO", "[PrimeSpeech] RESET received", config.LOG_LEVEL)
-                    # Note: Can't actually stop ongoing synthesis, but it's OK
-                    # because we only process one segment at a time now
-                    send_log(node, "INFO", "[PrimeSpeech] Reset acknowledged", config.LOG_LEVEL)
+                    handle_reset(event.get("metadata", {}) or {})
                 
                 elif command == "stats":
                     send_log(node, "INFO", f"Total syntheses: {total_syntheses}", config.LOG_LEVEL)
                     send_log(node, "INFO", f"Total audio duration: {total_duration:.1f}s", config.LOG_LEVEL)
+                    send_log(node, "INFO", f"Models ready: {model_loaded} "
+                             f"(startup load {'done' if worker.ready.is_set() else 'running'})",
+                             config.LOG_LEVEL)
+                    send_log(node, "INFO", f"Pending segments: {worker.pending}", config.LOG_LEVEL)
+                    if prefetcher is not None:
+                        send_log(node, "INFO",
+                                 f"Audio cache: {len(audio_cache)} phrases, {audio_cache.nbytes / 1e6:.1f}MB, "
+                                 f"hits {audio_cache.hits} / misses {audio_cache.misses}, "
+                                 f"prefetched {prefetcher.prefetched}", config.LOG_LEVEL)
+                    latencies = worker.cancel_latencies
+                    if latencies:
+                        send_log(node, "INFO",
+                                 f"Cancellations: {len(latencies)}, time-to-cancel "
+                                 f"avg {1000 * sum(latencies) / len(latencies):.1f}ms / "
+                                 f"max {1000 * max(latencies):.1f}ms", config.LOG_LEVEL)
         
         elif event["type"] == "STOP":
             break
-    
+
+    worker.stop()
+    flush_outputs()
+    if prefetcher is not None and config.PREFETCH_STATE_FILE:
+        try:
+            prefetcher.save(config.PREFETCH_STATE_FILE)
+        except OSError as e:
+            send_log(node, "WARNING", f"Could not save learned phrases: {e}", config.LOG_LEVEL)
     send_log(node, "INFO", "PrimeSpeech node stopped", config.LOG_LEVEL)
 
 
@@ -22,6 +22,8 @@ sys.path.append(now_dir)
 
 from moyoyo_tts.AR.models.t2s_lightning_module import Text2SemanticLightningModule
 from moyoyo_tts.TTS_infer_pack.TextPreprocessor import TextPreprocessor
+from moyoyo_tts.TTS_infer_pack.cpu_quantization import (
+    CPU_QUANTIZATION_MODES, cpu_autocast, cpu_supports_bf16, quantize_dynamic_int8)
 from moyoyo_tts.TTS_infer_pack.text_segmentation_method import splits
 from moyoyo_tts.feature_extractor.cnhubert import CNHubert
 from moyoyo_tts.module.mel_processing import spectrogram_torch
@@ -150,6 +152,14 @@ class TTS_Config:
 
         self.device = self.configs.get("device", torch.device("cpu"))
         self.is_half = self.configs.get("is_half", False)
+        # CPU-only precision modes, see cpu_quantization.py
+        self.cpu_quantization = str(self.configs.get("cpu_quantization", "none")).lower()
+        if self.cpu_quantization not in CPU_QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown cpu_quantization '{self.cpu_quantization}', "
+                f"expected one of: {', '.join(CPU_QUANTIZATION_MODES)}"
+            )
+        self.cpu_bf16 = bool(self.configs.get("cpu_bf16", False))
         self.version = version
         self.t2s_weights_path = self.configs.get("t2s_weights_path", None)
         self.vits_weights_path = self.configs.get("vits_weights_path", None)
@@ -225,6 +235,8 @@ class TTS_Config:
         self.config = {
             "device": str(self.device),
             "is_half": self.is_half,
+            "cpu_quantization": self.cpu_quantization,
+            "cpu_bf16": self.cpu_bf16,
             "version": self.version,
             "t2s_weights_path": self.t2s_weights_path,
             "vits_weights_path": self.vits_weights_path,
@@ -296,6 +308,25 @@ class TTS:
         self.init_bert_weights(self.configs.bert_base_path)
         self.init_cnhuhbert_weights(self.configs.cnhuhbert_base_path)
         # self.enable_half_precision(self.configs.is_half)
+        self.init_cpu_precision()
+
+    def init_cpu_precision(self):
+        '''
+            Apply the opt-in CPU precision modes (int8 dynamic quantization, bf16 autocast).
+            Must run before TextPreprocessor is created, since it keeps a reference to bert_model.
+        '''
+        self.use_bf16_autocast = False
+        if str(self.configs.device) != "cpu":
+            return
+        if self.configs.cpu_quantization == "int8":
+            if self.bert_model is not None:
+                self.bert_model = quantize_dynamic_int8(self.bert_model, "BERT")
+            if self.t2s_model is not None:
+                self.t2s_model = quantize_dynamic_int8(self.t2s_model, "Text2Semantic")
+        if self.configs.cpu_bf16:
+            self.use_bf16_autocast = cpu_supports_bf16()
+            if not self.use_bf16_autocast:
+                print("bf16 autocast requested but this CPU has no native bf16 support, staying in fp32")
 
     def init_cnhuhbert_weights(self, base_path: str):
         print(f"Loading CNHuBERT weights from {base_path}")
@@ -437,6 +468,28 @@ class TTS:
         if self.cnhuhbert_model is not None:
             self.cnhuhbert_model = self.cnhuhbert_model.to(device)
 
+    def set_prompt_text(self, prompt_text: str, prompt_lang: str):
+        '''
+            To set the reference text, caching its phones and bert features.
+            Args:
+                prompt_text: str, the transcript of the reference audio.
+                prompt_lang: str, the language of the reference text.
+        '''
+        prompt_text = prompt_text.strip("\n")
+        if (prompt_text[-1] not in splits): prompt_text += "。" if prompt_lang != "en" else "."
+        #print(i18n("实际输入的参考文本:"), prompt_text)
+        if self.prompt_cache["prompt_text"] != prompt_text:
+            self.prompt_cache["prompt_text"] = prompt_text
+            self.prompt_cache["prompt_lang"] = prompt_lang
+            phones, bert_features, norm_text = \
+                self.text_preprocessor.segment_and_extract_feature_for_text(
+                    prompt_text,
+                    prompt_lang,
+                    self.configs.version)
+            self.prompt_cache["phones"] = phones
+            self.prompt_cache["bert_features"] = bert_features
+            self.prompt_cache["norm_text"] = norm_text
+
     def set_ref_audio(self, ref_audio_path: str):
         '''
             To set the reference audio for the TTS model,
@@ -783,20 +836,7 @@ class TTS:
                 self.prompt_cache["refer_spec"].append(self._get_ref_spec(path))
 
         if not no_prompt_text:
-            prompt_text = prompt_text.strip("\n")
-            if (prompt_text[-1] not in splits): prompt_text += "。" if prompt_lang != "en" else "."
-            #print(i18n("实际输入的参考文本:"), prompt_text)
-            if self.prompt_cache["prompt_text"] != prompt_text:
-                self.prompt_cache["prompt_text"] = prompt_text
-                self.prompt_cache["prompt_lang"] = prompt_lang
-                phones, bert_features, norm_text = \
-                    self.text_preprocessor.segment_and_extract_feature_for_text(
-                        prompt_text,
-                        prompt_lang,
-                        self.configs.version)
-                self.prompt_cache["phones"] = phones
-                self.prompt_cache["bert_features"] = bert_features
-                self.prompt_cache["norm_text"] = norm_text
+            self.set_prompt_text(prompt_text, prompt_lang)
 
         ###### text preprocessing ########
         t1 = ttime()
@@ -861,6 +901,8 @@ class TTS:
             t_45 = 0.0
             audio = []
             for item in data:
+                if self.stop_flag:
+                    break
                 t3 = ttime()
                 if return_fragment:
                     item = make_batch(item)
@@ -883,22 +925,29 @@ class TTS:
                     prompt = self.prompt_cache["prompt_semantic"].expand(len(all_phoneme_ids), -1).to(
                         self.configs.device)
 
-                pred_semantic_list, idx_list = self.t2s_model.model.infer_panel(
-                    all_phoneme_ids,
-                    all_phoneme_lens,
-                    prompt,
-                    all_bert_features,
-                    # prompt_phone_len=ph_offset,
-                    top_k=top_k,
-                    top_p=top_p,
-                    temperature=temperature,
-                    early_stop_num=self.configs.hz * self.configs.max_sec,
-                    max_len=max_len,
-                    repetition_penalty=repetition_penalty,
-                )
+                with cpu_autocast(self.use_bf16_autocast):
+                    pred_semantic_list, idx_list = self.t2s_model.model.infer_panel(
+                        all_phoneme_ids,
+                        all_phoneme_lens,
+                        prompt,
+                        all_bert_features,
+                        # prompt_phone_len=ph_offset,
+                        top_k=top_k,
+                        top_p=top_p,
+                        temperature=temperature,
+                        early_stop_num=self.configs.hz * self.configs.max_sec,
+                        max_len=max_len,
+                        repetition_penalty=repetition_penalty,
+                    )
                 t4 = ttime()
                 t_34 += t4 - t3
 
+                # 被打断时跳过 VITS 解码
+                if self.stop_flag:
+                    yield self.configs.sampling_rate, np.zeros(int(self.configs.sampling_rate),
+                                                               dtype=np.int16)
+                    return
+
                 refer_audio_spec: torch.Tensor = [item.to(dtype=self.precision, device=self.configs.device) for item in
                                                   self.prompt_cache["refer_spec"]]
 
@@ -926,21 +975,29 @@ class TTS:
                     audio_frag_end_idx = [sum(audio_frag_idx[:i + 1]) for i in range(0, len(audio_frag_idx))]
                     all_pred_semantic = torch.cat(pred_semantic_list).unsqueeze(0).unsqueeze(0).to(self.configs.device)
                     _batch_phones = torch.cat(batch_phones).unsqueeze(0).to(self.configs.device)
-                    _batch_audio_fragment = (self.vits_model.decode(
-                        all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor
-                    ).detach()[0, 0, :])
+                    with cpu_autocast(self.use_bf16_autocast):
+                        _batch_audio_fragment = (self.vits_model.decode(
+                            all_pred_semantic, _batch_phones, refer_audio_spec, speed=speed_factor
+                        ).detach()[0, 0, :])
+                    if self.use_bf16_autocast:
+                        _batch_audio_fragment = _batch_audio_fragment.float()
                     audio_frag_end_idx.insert(0, 0)
                     batch_audio_fragment = [_batch_audio_fragment[audio_frag_end_idx[i - 1]:audio_frag_end_idx[i]] for i
                                             in range(1, len(audio_frag_end_idx))]
                 else:
                     # ## vits串行推理
                     for i, idx in enumerate(idx_list):
+                        if self.stop_flag:
+                            break
                         phones = batch_phones[i].unsqueeze(0).to(self.configs.device)
                         _pred_semantic = (
                             pred_semantic_list[i][-idx:].unsqueeze(0).unsqueeze(0))  # .unsqueeze(0)#mq要多unsqueeze一次
-                        audio_fragment = (self.vits_model.decode(
-                            _pred_semantic, phones, refer_audio_spec, speed=speed_factor
-                        ).detach()[0, 0, :])
+                        with cpu_autocast(self.use_bf16_autocast):
+                            audio_fragment = (self.vits_model.decode(
+                                _pred_semantic, phones, refer_audio_spec, speed=speed_factor
+                            ).detach()[0, 0, :])
+                        if self.use_bf16_autocast:
+                            audio_fragment = audio_fragment.float()
                         batch_audio_fragment.append(
                             audio_fragment
                         )  ###试试重建不带上prompt部分
@@ -966,7 +1023,7 @@ class TTS:
 
             if not return_fragment:
                 # print("%.3f\t%.3f\t%.3f\t%.3f" % (t1 - t0, t2 - t1, t_34, t_45))
-                if len(audio) == 0:
+                if len(audio) == 0 or self.stop_flag:
                     yield self.configs.sampling_rate, np.zeros(int(self.configs.sampling_rate),
                                                                dtype=np.int16)
                     return
@@ -990,6 +1047,8 @@ class TTS:
             self.vits_model = None
             self.init_t2s_weights(self.configs.t2s_weights_path)
             self.init_vits_weights(self.configs.vits_weights_path)
+            if str(self.configs.device) == "cpu" and self.configs.cpu_quantization == "int8":
+                self.t2s_model = quantize_dynamic_int8(self.t2s_model, "Text2Semantic")
             raise e
         finally:
             self.empty_cache()
@@ -0,0 +1,299 @@
+"""
+ONNX Runtime inference engine for GPT-SoVITS.
+
+Consumes the graphs written by ``moyoyo_tts/onnx_export.py``:
+
+    onnx/{name}/{name}_t2s_encoder.onnx   ref/text phones + bert + ssl -> x, prompts
+    onnx/{name}/{name}_t2s_fsdec.onnx     x, prompts -> y, k, v, y_emb, x_example
+    onnx/{name}/{name}_t2s_sdec.onnx      one autoregressive decode step
+    onnx/{name}/{name}_vits.onnx          text_seq, pred_semantic, ref_audio -> audio
+    onnx/{name}/{name}_cnhubert.onnx      (optional) ref_audio_16k -> ssl_content
+    onnx/{name}.json                      exporter metadata (sampling rate, ...)
+
+The text frontend (TextPreprocessor + BERT) is shared with the torch engine so
+both produce identical phones and BERT features. ``OnnxTTS`` mirrors the parts
+of ``TTS`` used by the node wrapper: ``run``, ``set_ref_audio``,
+``set_prompt_text``, ``stop`` and ``configs.sampling_rate``.
+
+Sampling (top_k etc.) is baked into the stage decoder at export time, so the
+per-request sampling parameters accepted by ``TTS.run`` are ignored here.
+The exported VITS graph has no ``speed`` input either, so a speed factor
+other than 1.0 is rejected rather than silently ignored.
+"""
+
+import json
+import os
+from time import time as ttime
+from typing import Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+from moyoyo_tts.TTS_infer_pack.text_segmentation_method import splits
+from moyoyo_tts.tools.my_utils import load_audio
+
+# GPT-SoVITS semantic vocabulary: 1024 codes + EOS
+T2S_EOS = 1024
+DEFAULT_MAX_SEC = 54
+T2S_HZ = 50
+
+
+def _check_speed(speed_factor: float):
+    if float(speed_factor) != 1.0:
+        raise ValueError(
+            f"speed_factor={speed_factor} is not supported by the ONNX engine "
+            "(the exported VITS graph has no speed input); use 1.0 or TTS_ENGINE=torch"
+        )
+
+
+class OnnxTTSConfig:
+    def __init__(self, onnx_dir: str, name: str, device: str = "cpu",
+                 bert_base_path: str = None, cnhuhbert_base_path: str = None,
+                 version: str = "v2", num_threads: int = 0, speed_factor: float = 1.0):
+        self.onnx_dir = onnx_dir
+        self.name = name
+        self.device = device
+        self.bert_base_path = bert_base_path
+        self.cnhuhbert_base_path = cnhuhbert_base_path
+        self.version = version
+        self.num_threads = num_threads
+        self.speed_factor = float(speed_factor)
+
+        meta_path = os.path.join(onnx_dir, f"{name}.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.sampling_rate: int = int(meta.get("Rate", 32000))
+        self.max_sec: int = int(meta.get("MaxSec", DEFAULT_MAX_SEC))
+        self.early_stop_num: int = T2S_HZ * self.max_sec
+
+    def graph_path(self, part: str) -> str:
+        return os.path.join(self.onnx_dir, self.name, f"{self.name}_{part}.onnx")
+
+
+class _Graph:
+    """An ORT session plus the IO binding reused across calls."""
+
+    def __init__(self, path: str, providers: List[str], options: ort.SessionOptions):
+        self.session = ort.InferenceSession(path, sess_options=options, providers=providers)
+        self.binding = self.session.io_binding()
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+        self.device = "cuda" if "CUDAExecutionProvider" in self.session.get_providers() else "cpu"
+
+    def run(self, inputs: Dict, preallocated: Optional[Dict[str, ort.OrtValue]] = None) -> List[ort.OrtValue]:
+        '''
+            Run with IO binding and return the outputs as OrtValues.
+            Inputs may be numpy arrays or OrtValues from a previous call, which
+            keeps the growing KV cache on the device without numpy round trips.
+            Outputs listed in ``preallocated`` are written into those buffers.
+        '''
+        self.binding.clear_binding_inputs()
+        self.binding.clear_binding_outputs()
+        for name in self.input_names:
+            value = inputs[name]
+            if isinstance(value, ort.OrtValue):
+                self.binding.bind_ortvalue_input(name, value)
+            else:
+                self.binding.bind_cpu_input(name, value)
+        for name in self.output_names:
+            if preallocated and name in preallocated:
+                self.binding.bind_ortvalue_output(name, preallocated[name])
+            else:
+                self.binding.bind_output(name, self.device)
+        self.session.run_with_iobinding(self.binding)
+        return self.binding.get_outputs()
+
+
+class OnnxTTS:
+    def __init__(self, configs: OnnxTTSConfig):
+        _check_speed(configs.speed_factor)
+        self.configs = configs
+        providers = ["CPUExecutionProvider"]
+        if "cuda" in str(configs.device) and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if configs.num_threads > 0:
+            options.intra_op_num_threads = configs.num_threads
+
+        t0 = ttime()
+        self.encoder = _Graph(configs.graph_path("t2s_encoder"), providers, options)
+        self.first_stage_decoder = _Graph(configs.graph_path("t2s_fsdec"), providers, options)
+        self.stage_decoder = _Graph(configs.graph_path("t2s_sdec"), providers, options)
+        self.vits = _Graph(configs.graph_path("vits"), providers, options)
+        self.ssl = None
+        if os.path.exists(configs.graph_path("cnhubert")):
+            self.ssl = _Graph(configs.graph_path("cnhubert"), providers, options)
+        print(f"Loaded ONNX graphs from {configs.onnx_dir} in {ttime() - t0:.2f}s")
+
+        # Fixed-shape outputs of the decode step are written into reused buffers
+        self._step_buffers = {
+            name: ort.OrtValue.ortvalue_from_shape_and_type(shape, dtype, self.stage_decoder.device)
+            for name, shape, dtype in self._fixed_step_outputs()
+        }
+
+        self.text_preprocessor = self._init_text_frontend()
+        self.cnhuhbert_model = None
+
+        self.prompt_cache: dict = {
+            "ref_audio_path": None,
+            "ssl_content": None,
+            "ref_audio": None,
+            "prompt_text": None,
+            "prompt_lang": None,
+            "phones": None,
+            "bert_features": None,
+        }
+        self.stop_flag: bool = False
+
+    def _fixed_step_outputs(self):
+        # logits [1, vocab] and samples [1, 1] have static shapes in the exported graph
+        fixed = []
+        dtypes = {"tensor(float)": np.float32, "tensor(int64)": np.int64}
+        for output in self.stage_decoder.session.get_outputs():
+            if output.name in ("logits", "samples") and all(isinstance(d, int) for d in output.shape):
+                fixed.append((output.name, output.shape, dtypes.get(output.type, np.float32)))
+        return fixed
+
+    def _init_text_frontend(self):
+        # Same frontend as the torch engine; imported lazily so that the T2S/VITS
+        # torch models (and pytorch_lightning) are never loaded for this engine.
+        from transformers import AutoModelForMaskedLM, AutoTokenizer
+        from moyoyo_tts.TTS_infer_pack.TextPreprocessor import TextPreprocessor
+
+        tokenizer = AutoTokenizer.from_pretrained(self.configs.bert_base_path)
+        bert_model = AutoModelForMaskedLM.from_pretrained(
+            self.configs.bert_base_path, local_files_only=True, trust_remote_code=True
+        ).eval()
+        return TextPreprocessor(bert_model, tokenizer, "cpu")
+
+    def _ssl_content(self, wav16k: np.ndarray) -> np.ndarray:
+        if self.ssl is not None:
+            return self.ssl.run({self.ssl.input_names[0]: wav16k[None, :]})[0].numpy()
+        # No exported SSL graph: fall back to the torch CNHuBERT model
+        import torch
+        from moyoyo_tts.feature_extractor.cnhubert import CNHubert
+
+        if self.cnhuhbert_model is None:
+            self.cnhuhbert_model = CNHubert(self.configs.cnhuhbert_base_path).eval()
+        with torch.no_grad():
+            hidden = self.cnhuhbert_model.model(torch.from_numpy(wav16k)[None, :])["last_hidden_state"]
+        return hidden.transpose(1, 2).numpy().astype(np.float32)
+
+    def set_ref_audio(self, ref_audio_path: str):
+        '''
+            Cache everything derived from the reference audio: the ssl content
+            for the T2S encoder and the waveform for the VITS graph.
+        '''
+        import librosa
+
+        wav16k, _ = librosa.load(ref_audio_path, sr=16000)
+        # Same trailing silence as TTS._set_prompt_semantic
+        zero_wav = np.zeros(int(self.configs.sampling_rate * 0.3), dtype=np.float32)
+        wav16k = np.concatenate([wav16k.astype(np.float32), zero_wav])
+        self.prompt_cache["ssl_content"] = self._ssl_content(wav16k)
+        self.prompt_cache["ref_audio"] = load_audio(ref_audio_path, self.configs.sampling_rate)[None, :].astype(np.float32)
+        self.prompt_cache["ref_audio_path"] = ref_audio_path
+
+    def set_prompt_text(self, prompt_text: str, prompt_lang: str):
+        prompt_text = prompt_text.strip("\n")
+        if prompt_text[-1] not in splits:
+            prompt_text += "。" if prompt_lang != "en" else "."
+        if self.prompt_cache["prompt_text"] == prompt_text:
+            return
+        phones, bert_features, _ = self.text_preprocessor.segment_and_extract_feature_for_text(
+            prompt_text, prompt_lang, self.configs.version)
+        self.prompt_cache["prompt_text"] = prompt_text
+        self.prompt_cache["prompt_lang"] = prompt_lang
+        self.prompt_cache["phones"] = np.asarray(phones, dtype=np.int64)[None, :]
+        self.prompt_cache["bert_features"] = bert_features.float().numpy().T.copy()
+
+    def stop(self, ):
+        '''
+        Stop the inference process.
+        '''
+        self.stop_flag = True
+
+    def infer_semantic(self, phones: np.ndarray, bert_features: np.ndarray) -> Optional[np.ndarray]:
+        '''
+            Run the T2S encoder and autoregressive decoder for one sentence.
+            Returns pred_semantic shaped [1, 1, N], or None if stopped.
+        '''
+        x, prompts = self.encoder.run({
+            "ref_seq": self.prompt_cache["phones"],
+            "text_seq": phones,
+            "ref_bert": self.prompt_cache["bert_features"],
+            "text_bert": bert_features,
+            "ssl_content": self.prompt_cache["ssl_content"],
+        })
+        prefix_len = prompts.shape()[1]
+        y, k, v, y_emb, x_example = self.first_stage_decoder.run({"x": x, "prompts": prompts})
+
+        idx = 0
+        for idx in range(1, 1500):
+            if self.stop_flag:
+                return None
+            y, k, v, y_emb, logits, samples = self.stage_decoder.run(
+                {"iy": y, "ik": k, "iv": v, "iy_emb": y_emb, "ix_example": x_example},
+                preallocated=self._step_buffers,
+            )
+            if (y.shape()[1] - prefix_len) > self.configs.early_stop_num:
+                break
+            if int(np.argmax(logits.numpy()[0])) == T2S_EOS or int(samples.numpy()[0, 0]) == T2S_EOS:
+                break
+
+        y = y.numpy()
+        y[0, -1] = 0
+        return y[:, -idx:][None, :, :]
+
+    def run(self, inputs: dict):
+        """
+        Text to speech inference, same contract as ``TTS.run`` with
+        ``return_fragment=False``: yields one (sampling_rate, int16 audio) tuple.
+        """
+        self.stop_flag = False
+        text: str = inputs.get("text", "")
+        text_lang: str = inputs.get("text_lang", "")
+        ref_audio_path: str = inputs.get("ref_audio_path", "")
+        prompt_text: str = inputs.get("prompt_text", "")
+        prompt_lang: str = inputs.get("prompt_lang", "")
+        text_split_method: str = inputs.get("text_split_method", "cut0")
+        fragment_interval = max(inputs.get("fragment_interval", 0.3), 0.01)
+        _check_speed(inputs.get("speed_factor", 1.0))
+        sr = self.configs.sampling_rate
+
+        if ref_audio_path and ref_audio_path != self.prompt_cache["ref_audio_path"]:
+            self.set_ref_audio(ref_audio_path)
+        if self.prompt_cache["ssl_content"] is None:
+            raise ValueError("ref_audio_path cannot be empty, when the reference audio is not set using set_ref_audio()")
+        if prompt_text in [None, ""]:
+            raise ValueError("The ONNX engine requires prompt_text (the exported encoder takes reference phones)")
+        self.set_prompt_text(prompt_text, prompt_lang)
+
+        data = self.text_preprocessor.preprocess(text, text_lang, text_split_method, self.configs.version)
+        silence = np.zeros(int(sr * fragment_interval), dtype=np.float32)
+        audio = []
+        for item in data:
+            phones = np.asarray(item["phones"], dtype=np.int64)[None, :]
+            bert_features = item["bert_features"].float().numpy().T.copy()
+            pred_semantic = self.infer_semantic(phones, bert_features)
+            if pred_semantic is None or self.stop_flag:
+                break
+            fragment = self.vits.run({
+                "text_seq": phones,
+                "pred_semantic": pred_semantic,
+                "ref_audio": self.prompt_cache["ref_audio"],
+            })[0].numpy().astype(np.float32).reshape(-1)
+            max_audio = np.abs(fragment).max()  # 简单防止16bit爆音
+            if max_audio > 1:
+                fragment /= max_audio
+            audio.append(fragment)
+            audio.append(silence)
+
+        if len(audio) == 0 or self.stop_flag:
+            yield sr, np.zeros(int(sr), dtype=np.int16)
+            return
+        yield sr, (np.concatenate(audio) * 32768).astype(np.int16)
@@ -18,7 +18,6 @@ now_dir = os.getcwd()
 sys.path.append(now_dir)
 
 from moyoyo_tts.TTS_infer_pack.text_segmentation_method import split_big_text, splits, get_method as get_seg_method
-from moyoyo_tts.text import chinese
 from moyoyo_tts.text import cleaned_text_to_sequence
 from moyoyo_tts.text.cleaner import clean_text
 from moyoyo_tts.tools.i18n.i18n import I18nAuto, scan_language_list
@@ -29,6 +28,11 @@ language=sys.argv[-1] if sys.argv[-1] in scan_language_list() else language
 i18n = I18nAuto(language=language)
 punctuation = set(['!', '?', '…', ',', '.', '-'," "])
 
+def _mix_text_normalize(text:str) -> str:
+    # The zh frontend (jieba, cn2an, pypinyin) is only imported for mixed zh/yue text
+    from moyoyo_tts.text import chinese
+    return chinese.mix_text_normalize(text)
+
 def get_first(text:str) -> str:
     pattern = "[" + "".join(re.escape(sep) for sep in splits) + "]"
     text = re.split(pattern, text)[0].strip()
@@ -138,14 +142,14 @@ class TextPreprocessor:
             if language == "zh":
                 if re.search(r'[A-Za-z]', formattext):
                     formattext = re.sub(r'[a-z]', lambda x: x.group(0).upper(), formattext)
-                    formattext = chinese.mix_text_normalize(formattext)
+                    formattext = _mix_text_normalize(formattext)
                     return self.get_phones_and_bert(formattext,"zh",version)
                 else:
                     phones, word2ph, norm_text = self.clean_text_inf(formattext, language, version)
                     bert = self.get_bert_feature(norm_text, word2ph).to(self.device)
             elif language == "yue" and re.search(r'[A-Za-z]', formattext):
                     formattext = re.sub(r'[a-z]', lambda x: x.group(0).upper(), formattext)
-                    formattext = chinese.mix_text_normalize(formattext)
+                    formattext = _mix_text_normalize(formattext)
                     return self.get_phones_and_bert(formattext,"yue",version)
             else:
                 phones, word2ph, norm_text = self.clean_text_inf(formattext, language, version)
@@ -1 +1,7 @@
-from . import TTS, text_segmentation_method
\ No newline at end of file
+# Submodules are imported on demand: TTS loads the full torch stack, which the
+# ONNX engine and the text frontend do not need.
+def __getattr__(name):
+    if name in ("TTS", "text_segmentation_method"):
+        import importlib
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,50 @@
+"""
+CPU-only precision modes for the TTS pipeline.
+
+``is_half`` is forced off on CPU, so without help the whole pipeline runs in
+fp32. This module provides the two opt-in alternatives:
+
+- ``int8``: dynamic int8 quantization of the ``nn.Linear`` layers in the
+  RoBERTa BERT model and the T2S transformer. Those two dominate CPU time and
+  are almost entirely Linear layers; VITS and CNHuBERT are conv-heavy and gain
+  nothing from dynamic quantization, so they stay in fp32.
+- bf16 autocast for T2S/VITS inference, only where the CPU has native bf16
+  support (AVX512-BF16 / AMX).
+"""
+
+import contextlib
+
+import torch
+import torch.nn as nn
+
+CPU_QUANTIZATION_MODES = ["none", "int8"]
+
+
+def cpu_supports_bf16() -> bool:
+    '''
+        Whether the CPU has native bf16 matmul support.
+        Emulated bf16 is slower than fp32, so autocast is only worth it here.
+    '''
+    try:
+        return bool(torch.cpu._is_avx512_bf16_supported() or torch.cpu._is_amx_tile_supported())
+    except AttributeError:
+        return False
+
+
+def cpu_autocast(enabled: bool):
+    '''
+        bf16 autocast context for CPU inference, or a no-op context.
+    '''
+    if not enabled:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type="cpu", dtype=torch.bfloat16)
+
+
+def quantize_dynamic_int8(model: nn.Module, name: str) -> nn.Module:
+    '''
+        Apply dynamic int8 quantization to the Linear layers of ``model``.
+    '''
+    model = model.float().eval()
+    quantized = torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    print(f"Quantized {name} to int8")
+    return quantized
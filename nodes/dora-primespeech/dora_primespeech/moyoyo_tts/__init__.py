@@ -1,9 +1,23 @@
-from .TTS_infer_pack.TTS import TTS_Config
-from .TTS_infer_pack.tts_infer_module import TTSModule
-from .utils import HParams
+# The exports below pull in torch, transformers and pytorch_lightning, so they
+# are resolved on first access. Importing a submodule (e.g. moyoyo_tts.text)
+# no longer loads the whole inference stack.
+_LAZY_EXPORTS = {
+    "TTS_Config": ".TTS_infer_pack.TTS",
+    "TTSModule": ".TTS_infer_pack.tts_infer_module",
+    "HParams": ".utils",
+}
 
 __all__ = (
-    HParams,
-    TTSModule,
-    TTS_Config
+    "HParams",
+    "TTSModule",
+    "TTS_Config"
 )
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -271,6 +271,21 @@ class SSLModel(nn.Module):
     def forward(self, ref_audio_16k):
         return self.ssl.model(ref_audio_16k)["last_hidden_state"].transpose(1, 2)
 
+    def export(self, ref_audio_16k, project_name):
+        torch.onnx.export(
+            self,
+            (ref_audio_16k,),
+            f"onnx/{project_name}/{project_name}_cnhubert.onnx",
+            input_names=["ref_audio_16k"],
+            output_names=["ssl_content"],
+            dynamic_axes={
+                "ref_audio_16k": {1 : "audio_length"},
+                "ssl_content": {2 : "ssl_length"},
+            },
+            opset_version=17,
+            verbose=False
+        )
+
 
 def export(vits_path, gpt_path, project_name, vits_model="v2"):
     vits = VitsModel(vits_path)
@@ -297,6 +312,7 @@ def export(vits_path, gpt_path, project_name, vits_model="v2"):
     debug = True
 
     # gpt_sovits.export(ref_seq, text_seq, ref_bert, text_bert, ref_audio_sr, ssl_content, project_name)
+    # ssl.export(ref_audio_16k, project_name)
 
     if debug:
         a, b = gpt_sovits(ref_seq, text_seq, ref_bert, text_bert, ref_audio_sr, ssl_content, debug=debug)
@@ -318,6 +334,7 @@ def export(vits_path, gpt_path, project_name, vits_model="v2"):
         "Rate": vits.hps.data.sampling_rate,
         "NumLayers": gpt.t2s_model.num_layers,
         "EmbeddingDim": gpt.t2s_model.embedding_dim,
+        "MaxSec": gpt.max_sec,
         "Dict": "BasicDict",
         "BertPath": "chinese-roberta-wwm-ext-large",
         # "Symbol": symbols,
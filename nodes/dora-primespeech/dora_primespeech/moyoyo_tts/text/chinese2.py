@@ -1,5 +1,6 @@
 import os
 import re
+import threading
 from pathlib import Path
 
 import cn2an
@@ -23,9 +24,26 @@ import jieba_fast.posseg as psg
 # Enable G2PW for Chinese pinyin conversion (can be disabled via environment variable)
 is_g2pw_str = os.environ.get("AIROS_ENABLE_G2PW", "True")
 is_g2pw = True if is_g2pw_str.lower() == 'true' else False
-if is_g2pw:
+
+# G2PW (ONNX session + tokenizer + polyphonic dicts) is built on first use,
+# not at import, so importing this module stays cheap. Callers may warm it up
+# from a background thread via get_g2pw().
+g2pw = None
+_g2pw_lock = threading.Lock()
+
+
+def get_g2pw():
+    global g2pw
+    if g2pw is None:
+        with _g2pw_lock:
+            if g2pw is None:
+                g2pw = _load_g2pw()
+    return g2pw
+
+
+def _load_g2pw():
     # print("当前使用g2pw进行拼音推理")
-    from moyoyo_tts.text.g2pw import G2PWPinyin, correct_pronunciation
+    from moyoyo_tts.text.g2pw import G2PWPinyin
 
     parent_directory = os.path.dirname(current_file_path)
     model_source = os.environ.get("bert_path", "moyoyo_tts/pretrained_models/chinese-roberta-wwm-ext-large")
@@ -74,9 +92,12 @@ Please re-download the G2PW model or check if the extraction was successful.
     
     print(f"[G2PW] ✓ Found G2PW model at: {model_dir_path}")
     model_dir = model_dir_path.as_posix()
-    g2pw = G2PWPinyin(model_dir=model_dir,
+    return G2PWPinyin(model_dir=model_dir,
                       model_source=model_source,
-                      v_to_u=False, neutral_tone_with_five=True)
+                      v_to_u=False, neutral_tone_with_five=True,
+                      intra_op_num_threads=int(os.environ.get("G2PW_NUM_THREADS", "2")),
+                      cache_size=int(os.environ.get("G2PW_CACHE_SIZE", "4096")))
+
 
 rep_map = {
     "：": ",",
@@ -187,10 +208,15 @@ def _merge_erhua(initials: list[str],
 def _g2p(segments):
     phones_list = []
     word2ph = []
+    # Replace all English words in the sentence
+    segments = [re.sub("[a-zA-Z]+", "", seg) for seg in segments]
+    if is_g2pw:
+        from moyoyo_tts.text.g2pw import correct_pronunciation
+        g2pw = get_g2pw()
+        # 所有分句的多音字一次批量推理，结果进入缓存
+        g2pw.prefetch(segments)
     for seg in segments:
         pinyins = []
-        # Replace all English words in the sentence
-        seg = re.sub("[a-zA-Z]+", "", seg)
         seg_cut = psg.lcut(seg)
         seg_cut = tone_modifier.pre_merge_for_modify(seg_cut)
         initials = []
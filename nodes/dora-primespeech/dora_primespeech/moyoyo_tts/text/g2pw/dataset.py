@@ -35,41 +35,48 @@ def prepare_onnx_input(tokenizer,
                        use_mask: bool=False,
                        window_size: int=None,
                        max_len: int=512) -> Dict[str, np.array]:
+    """
+    Build one padded batch for all queries. Queries from the same text share
+    a single tokenization, and texts of different lengths are right-padded
+    (attention mask 0) so queries from several sentences can go through the
+    model in one call.
+    """
     if window_size is not None:
         truncated_texts, truncated_query_ids = _truncate_texts(
             window_size=window_size, texts=texts, query_ids=query_ids)
     input_ids = []
-    token_type_ids = []
-    attention_masks = []
     phoneme_masks = []
     char_ids = []
     position_ids = []
+    # text -> (tokens, text2token, token2text, input_id)
+    tokenized = {}
 
     for idx in range(len(texts)):
         text = (truncated_texts if window_size else texts)[idx].lower()
         query_id = (truncated_query_ids if window_size else query_ids)[idx]
 
-        try:
-            tokens, text2token, token2text = tokenize_and_map(
-                tokenizer=tokenizer, text=text)
-        except Exception:
-            print(f'warning: text "{text}" is invalid')
-            return {}
-
-        text, query_id, tokens, text2token, token2text = _truncate(
-            max_len=max_len,
-            text=text,
-            query_id=query_id,
-            tokens=tokens,
-            text2token=text2token,
-            token2text=token2text)
-
-        processed_tokens = ['[CLS]'] + tokens + ['[SEP]']
-
-        input_id = list(
-            np.array(tokenizer.convert_tokens_to_ids(processed_tokens)))
-        token_type_id = list(np.zeros((len(processed_tokens), ), dtype=int))
-        attention_mask = list(np.ones((len(processed_tokens), ), dtype=int))
+        if text not in tokenized:
+            try:
+                tokens, text2token, token2text = tokenize_and_map(
+                    tokenizer=tokenizer, text=text)
+            except Exception:
+                print(f'warning: text "{text}" is invalid')
+                return {}
+            input_id = tokenizer.convert_tokens_to_ids(
+                ['[CLS]'] + tokens + ['[SEP]'])
+            tokenized[text] = (tokens, text2token, token2text, input_id)
+        tokens, text2token, token2text, input_id = tokenized[text]
+
+        if len(tokens) > max_len - 2:
+            text, query_id, tokens, text2token, token2text = _truncate(
+                max_len=max_len,
+                text=text,
+                query_id=query_id,
+                tokens=tokens,
+                text2token=text2token,
+                token2text=token2text)
+            input_id = tokenizer.convert_tokens_to_ids(
+                ['[CLS]'] + tokens + ['[SEP]'])
 
         query_char = text[query_id]
         phoneme_mask = [1 if i in char2phonemes[query_char] else 0 for i in range(len(labels))] \
@@ -79,16 +86,22 @@ def prepare_onnx_input(tokenizer,
             query_id] + 1  # [CLS] token locate at first place
 
         input_ids.append(input_id)
-        token_type_ids.append(token_type_id)
-        attention_masks.append(attention_mask)
         phoneme_masks.append(phoneme_mask)
         char_ids.append(char_id)
         position_ids.append(position_id)
 
+    seq_len = max(len(input_id) for input_id in input_ids)
+    pad_id = tokenizer.pad_token_id or 0
+    padded_input_ids = np.full((len(input_ids), seq_len), pad_id, dtype=np.int64)
+    attention_masks = np.zeros((len(input_ids), seq_len), dtype=np.int64)
+    for row, input_id in enumerate(input_ids):
+        padded_input_ids[row, :len(input_id)] = input_id
+        attention_masks[row, :len(input_id)] = 1
+
     outputs = {
-        'input_ids': np.array(input_ids).astype(np.int64),
-        'token_type_ids': np.array(token_type_ids).astype(np.int64),
-        'attention_masks': np.array(attention_masks).astype(np.int64),
+        'input_ids': padded_input_ids,
+        'token_type_ids': np.zeros_like(padded_input_ids),
+        'attention_masks': attention_masks,
         'phoneme_masks': np.array(phoneme_masks).astype(np.float32),
         'char_ids': np.array(char_ids).astype(np.int64),
         'position_ids': np.array(position_ids).astype(np.int64),
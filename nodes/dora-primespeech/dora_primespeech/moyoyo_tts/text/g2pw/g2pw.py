@@ -8,7 +8,7 @@ from pypinyin.core import Pinyin, Style
 from pypinyin.seg.simpleseg import simple_seg
 from pypinyin.converter import UltimateConverter
 from pypinyin.contrib.tone_convert import to_tone
-from .onnx_api import G2PWOnnxConverter
+from .onnx_api import DEFAULT_CACHE_SIZE, DEFAULT_INTRA_OP_NUM_THREADS, G2PWOnnxConverter
 
 current_file_path = os.path.dirname(__file__)
 CACHE_PATH = os.path.join(current_file_path, "polyphonic.pickle")
@@ -19,12 +19,16 @@ PP_FIX_DICT_PATH = os.path.join(current_file_path, "polyphonic-fix.rep")
 class G2PWPinyin(Pinyin):
     def __init__(self, model_dir='G2PWModel/', model_source=None,
                  enable_non_tradional_chinese=True,
-                 v_to_u=False, neutral_tone_with_five=False, tone_sandhi=False, **kwargs):
+                 v_to_u=False, neutral_tone_with_five=False, tone_sandhi=False,
+                 intra_op_num_threads=DEFAULT_INTRA_OP_NUM_THREADS,
+                 cache_size=DEFAULT_CACHE_SIZE, **kwargs):
         self._g2pw = G2PWOnnxConverter(
             model_dir=model_dir,
             style='pinyin',
             model_source=model_source,
             enable_non_tradional_chinese=enable_non_tradional_chinese,
+            intra_op_num_threads=intra_op_num_threads,
+            cache_size=cache_size,
         )
         self._converter = Converter(
             self._g2pw, v_to_u=v_to_u,
@@ -35,6 +39,17 @@ class G2PWPinyin(Pinyin):
     def get_seg(self, **kwargs):
         return simple_seg
 
+    def prefetch(self, texts):
+        """
+        Predict every polyphonic character of ``texts`` in one batched model
+        call. The results land in the converter cache, so the per-segment
+        ``lazy_pinyin`` calls that follow do not hit the model again.
+        """
+        hans = [words for text in texts for words in simple_seg(text)
+                if RE_HANS.match(words)]
+        if hans:
+            self._g2pw(hans)
+
 
 class Converter(UltimateConverter):
     def __init__(self, g2pw_instance, v_to_u=False,
@@ -6,6 +6,7 @@ warnings.filterwarnings("ignore")
 import json
 import os
 import zipfile,requests
+from collections import OrderedDict
 from typing import Any
 from typing import Dict
 from typing import List
@@ -26,6 +27,8 @@ from .utils import load_config
 from ..zh_normalization.char_convert import tranditional_to_simplified
 
 model_version = '1.1'
+DEFAULT_INTRA_OP_NUM_THREADS = 2
+DEFAULT_CACHE_SIZE = 4096
 
 
 def predict(session, onnx_input: Dict[str, Any],
@@ -79,13 +82,17 @@ class G2PWOnnxConverter:
                  model_dir: str='G2PWModel/',
                  style: str='bopomofo',
                  model_source: str=None,
-                 enable_non_tradional_chinese: bool=False):
+                 enable_non_tradional_chinese: bool=False,
+                 intra_op_num_threads: int=DEFAULT_INTRA_OP_NUM_THREADS,
+                 inter_op_num_threads: int=0,
+                 cache_size: int=DEFAULT_CACHE_SIZE):
         uncompress_path = download_and_decompress(model_dir)
 
         sess_options = onnxruntime.SessionOptions()
         sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
         sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
-        sess_options.intra_op_num_threads = 2
+        sess_options.intra_op_num_threads = intra_op_num_threads
+        sess_options.inter_op_num_threads = inter_op_num_threads
         try:
             self.session_g2pW = onnxruntime.InferenceSession(os.path.join(uncompress_path, 'g2pW.onnx'),sess_options=sess_options, providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
         except:
@@ -162,6 +169,12 @@ class G2PWOnnxConverter:
         if self.enable_opencc:
             self.cc = OpenCC('s2tw')
 
+        # (sentence, query position) -> converted pinyin/bopomofo
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     def _convert_bopomofo_to_pinyin(self, bopomofo: str) -> str:
         tone = bopomofo[-1]
         assert tone in '12345'
@@ -186,8 +199,10 @@ class G2PWOnnxConverter:
 
         texts, query_ids, sent_ids, partial_results = self._prepare_data(
             sentences=sentences)
+        texts, query_ids, sent_ids = self._fill_from_cache(
+            texts, query_ids, sent_ids, partial_results)
         if len(texts) == 0:
-            # sentences no polyphonic words
+            # sentences no polyphonic words, or all of them cached
             return partial_results
 
         onnx_input = prepare_onnx_input(
@@ -208,11 +223,41 @@ class G2PWOnnxConverter:
             preds = [pred.split(' ')[1] for pred in preds]
 
         results = partial_results
-        for sent_id, query_id, pred in zip(sent_ids, query_ids, preds):
+        for text, sent_id, query_id, pred in zip(texts, sent_ids, query_ids, preds):
             results[sent_id][query_id] = self.style_convert_func(pred)
+            self._cache_put((text, query_id), results[sent_id][query_id])
 
         return results
 
+    def _fill_from_cache(
+            self, texts: List[str], query_ids: List[int], sent_ids: List[int],
+            partial_results: List[List[str]]
+    ) -> Tuple[List[str], List[int], List[int]]:
+        """Resolve cached queries in place and return the ones still to predict."""
+        if self.cache_size <= 0:
+            return texts, query_ids, sent_ids
+        miss_texts, miss_query_ids, miss_sent_ids = [], [], []
+        for text, query_id, sent_id in zip(texts, query_ids, sent_ids):
+            key = (text, query_id)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                partial_results[sent_id][query_id] = self._cache[key]
+                self.cache_hits += 1
+            else:
+                miss_texts.append(text)
+                miss_query_ids.append(query_id)
+                miss_sent_ids.append(sent_id)
+                self.cache_misses += 1
+        return miss_texts, miss_query_ids, miss_sent_ids
+
+    def _cache_put(self, key: Tuple[str, int], value: str):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
     def _prepare_data(
             self, sentences: List[str]
     ) -> Tuple[List[str], List[int], List[int], List[List[str]]]:
@@ -13,22 +13,38 @@ import re
 # Check if MoYoYo TTS is available
 MOYOYO_AVAILABLE = False
 
-# Try to import MoYoYo TTS
+# Add local moyoyo_tts to path
+local_moyoyo_path = Path(__file__).parent
+if local_moyoyo_path.exists() and str(local_moyoyo_path) not in sys.path:
+    sys.path.insert(0, str(local_moyoyo_path))
+    print(f"[PrimeSpeech] Using local moyoyo_tts from: {local_moyoyo_path}")
+
+# Only locate the packages here. Importing the engine pulls in torch,
+# transformers and pytorch_lightning, which is deferred to _init_tts so that
+# importing the node stays cheap and model loading can run off the main thread.
 try:
-    # Add local moyoyo_tts to path
-    local_moyoyo_path = Path(__file__).parent
-    if local_moyoyo_path.exists() and str(local_moyoyo_path) not in sys.path:
-        sys.path.insert(0, str(local_moyoyo_path))
-        print(f"[PrimeSpeech] Using local moyoyo_tts from: {local_moyoyo_path}")
-    
-    # Import MoYoYo TTS
-    from moyoyo_tts.TTS_infer_pack.TTS import TTS_Config, TTS
-    from moyoyo_tts.TTS_infer_pack.text_segmentation_method import get_method as get_seg_method
-    MOYOYO_AVAILABLE = True
-    print("[PrimeSpeech] MoYoYo TTS successfully imported")
-except ImportError as e:
-    print(f"[PrimeSpeech] ERROR: Failed to import MoYoYo TTS: {e}")
-    MOYOYO_AVAILABLE = False
+    MOYOYO_AVAILABLE = all(
+        importlib.util.find_spec(name) is not None
+        for name in ("moyoyo_tts", "torch", "transformers")
+    )
+except (ImportError, ValueError) as e:
+    print(f"[PrimeSpeech] ERROR: Failed to locate MoYoYo TTS: {e}")
+if not MOYOYO_AVAILABLE:
+    print("[PrimeSpeech] ERROR: MoYoYo TTS or its dependencies are not installed")
+
+
+# Short per-language texts used to load the G2P frontend during warmup
+WARMUP_TEXTS = {
+    "zh": "你好。",
+    "all_zh": "你好。",
+    "en": "Hello.",
+    "ja": "こんにちは。",
+    "all_ja": "こんにちは。",
+    "ko": "안녕하세요.",
+    "all_ko": "안녕하세요.",
+    "yue": "你好。",
+    "all_yue": "你好。",
+}
 
 
 class StreamingMoYoYoTTSWrapper:
@@ -142,12 +158,20 @@ class StreamingMoYoYoTTSWrapper:
             "cnhuhbert_base_path": str(self.models_path / "chinese-hubert-base"),
             "bert_base_path": str(self.models_path / "chinese-roberta-wwm-ext-large"),
         }
+        if self.device == "cpu" and self.voice_config:
+            custom_config["cpu_quantization"] = self.voice_config.get("cpu_quantization", "none")
+            custom_config["cpu_bf16"] = self.voice_config.get("cpu_bf16", False)
         
         config_dict = {
             "version": "v2",
             "custom": custom_config
         }
         
+        engine = self.voice_config.get("tts_engine", "torch") if self.voice_config else "torch"
+        if engine == "onnx":
+            self._init_onnx_tts(voice_config, custom_config)
+            return
+
         try:
             self.log("INFO", f"Initializing MoYoYo TTS with voice: {self.voice}")
             self.log("INFO", f"Model paths:")
@@ -161,6 +185,8 @@ class StreamingMoYoYoTTSWrapper:
                 if 'path' in key and not Path(path).exists():
                     self.log("ERROR", f"Model file does not exist: {path}")
             
+            from moyoyo_tts.TTS_infer_pack.TTS import TTS
+
             self.tts = TTS(config_dict)
             
             # Store reference audio info
@@ -181,6 +207,36 @@ class StreamingMoYoYoTTSWrapper:
             self.log("ERROR", traceback.format_exc())
             self.tts = None
     
+    def _init_onnx_tts(self, voice_config, custom_config):
+        """Initialize the ONNX Runtime engine from graphs exported by onnx_export.py."""
+        onnx_dir = self.models_path / "onnx"
+        try:
+            # Imported lazily so the torch T2S/VITS stack is not needed for this engine
+            from moyoyo_tts.TTS_infer_pack.TTS_onnx import OnnxTTS, OnnxTTSConfig
+
+            self.log("INFO", f"Initializing ONNX TTS with voice: {self.voice} from {onnx_dir}")
+            onnx_config = OnnxTTSConfig(
+                str(onnx_dir),
+                self.voice,
+                device=self.device,
+                bert_base_path=custom_config["bert_base_path"],
+                cnhuhbert_base_path=custom_config["cnhuhbert_base_path"],
+                num_threads=self.voice_config.get("num_threads", 0),
+                speed_factor=self.voice_config.get("speed_factor", 1.0),
+            )
+            self.tts = OnnxTTS(onnx_config)
+
+            self.ref_audio_path = str(self.models_path / voice_config["ref_audio"])
+            self.prompt_text = voice_config["prompt_text"]
+            self.tts.set_ref_audio(self.ref_audio_path)
+
+            self.log("INFO", "ONNX TTS initialized successfully")
+        except Exception as e:
+            self.log("ERROR", f"Failed to initialize ONNX TTS: {e}")
+            import traceback
+            self.log("ERROR", traceback.format_exc())
+            self.tts = None
+
     def _split_text_smartly(self, text, max_chunk_chars=50):
         """Split text into smaller chunks for progressive synthesis.
         
@@ -273,10 +329,30 @@ class StreamingMoYoYoTTSWrapper:
             yield chunk
     
     def abort_synthesis(self):
-        """Abort any ongoing synthesis."""
+        """Abort any ongoing synthesis.
+
+        Safe to call from another thread: besides flagging the chunk loop, it
+        sets ``TTS.stop_flag`` so the engine bails out between T2S and VITS
+        and between VITS batches instead of finishing the current chunk.
+        """
         self._abort_synthesis = True
+        if self.tts is not None:
+            self.tts.stop()
         self.log("INFO", "Synthesis abort requested")
     
+    def warmup(self, language="zh"):
+        """Load the text frontend ahead of the first request.
+
+        Caches the prompt phones/BERT features and runs a short text through
+        the configured language's G2P, which imports that language module
+        (for Chinese also the G2PW session) without synthesizing audio.
+        """
+        if self.tts is None:
+            return
+        self.tts.set_prompt_text(self.prompt_text, "zh")
+        warmup_text = WARMUP_TEXTS.get(language, WARMUP_TEXTS["zh"])
+        self.tts.text_preprocessor.segment_and_extract_feature_for_text(warmup_text, language, "v2")
+
     def synthesize_streaming(self, text, language="zh", speed=1.0) -> Generator[Tuple[int, np.ndarray], None, None]:
         """Synthesize speech with real streaming output.
         
@@ -338,6 +414,11 @@ class StreamingMoYoYoTTSWrapper:
                     sample_rate, chunk_audio = result
                     break  # Only yields once when return_fragment=False
                 
+                # A stopped run yields placeholder silence - never stream it
+                if self._abort_synthesis:
+                    self.log("INFO", f"Synthesis aborted during text chunk {chunk_idx + 1}/{len(text_chunks)}")
+                    return
+                
                 # Convert to float32 if needed
                 if chunk_audio.dtype == np.int16:
                     chunk_audio = chunk_audio.astype(np.float32) / 32768.0
@@ -402,6 +483,10 @@ class StreamingMoYoYoTTSWrapper:
                 sample_rate, audio_data = result
                 break
             
+            if self._abort_synthesis:
+                self.log("INFO", "Synthesis aborted")
+                return None, None
+            
             # Convert to float32 if needed
             if audio_data.dtype == np.int16:
                 audio_data = audio_data.astype(np.float32) / 32768.0
@@ -0,0 +1,186 @@
+"""
+Cross-turn prefetch of predictable TTS output.
+
+Greetings, acknowledgements and other recurring phrases reach the node over
+and over and used to be synthesized fresh each time. ``AudioCache`` keeps
+the synthesized audio of short segments, bounded by total bytes.
+``TTSPrefetcher`` decides what to put in it ahead of time:
+
+- phrases listed in ``PREFETCH_PHRASES`` (a file, one phrase per line, or a
+  ``|``-separated list), synthesized once the models are loaded;
+- segments seen at least ``PREFETCH_MIN_COUNT`` times in live traffic.
+
+Prefetch jobs only run while the node is idle: the synthesis queue is
+empty, the user is not speaking (``is_speaking`` from the speech monitor)
+and no segment arrived for ``PREFETCH_IDLE_SECONDS``. A real segment
+cancels an in-flight prefetch job, so prefetching never delays an answer.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def cache_key(text: str, language: str, speed: float) -> Tuple[str, str, float]:
+    """Segments differing only in surrounding whitespace sound the same."""
+    return " ".join(text.split()), language, speed
+
+
+def load_phrases(spec: str) -> List[str]:
+    """Phrases from a file path (one per line) or a ``|``-separated list."""
+    if not spec:
+        return []
+    path = Path(os.path.expanduser(spec))
+    if path.is_file():
+        lines = path.read_text(encoding="utf-8").splitlines()
+    else:
+        lines = spec.split("|")
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+class AudioCache:
+    """LRU of synthesized audio, bounded by total bytes. Thread-safe."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[int, np.ndarray]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key) -> Optional[Tuple[int, np.ndarray]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, sample_rate: int, audio: np.ndarray):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if audio.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1].nbytes
+            self._entries[key] = (sample_rate, audio)
+            self._bytes += audio.nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+
+class TTSPrefetcher:
+    """Chooses phrases to synthesize into the cache while the node is idle.
+
+    Used from the Dora thread only; the cache it consults is shared with
+    the synthesis worker.
+    """
+
+    def __init__(self, cache: AudioCache, language: str, speed: float,
+                 phrases: Iterable[str] = (), max_chars: int = 40, min_count: int = 2,
+                 idle_seconds: float = 1.0, max_tracked: int = 2048):
+        self.cache = cache
+        self.language = language
+        self.speed = speed
+        self.max_chars = max_chars
+        self.min_count = min_count
+        self.idle_seconds = idle_seconds
+        self.max_tracked = max_tracked
+        self.counts: Counter = Counter()
+        self._startup = [phrase for phrase in phrases if len(phrase) <= max_chars]
+        self._failed = set()
+        self._user_speaking = False
+        self._last_activity = time.monotonic()
+        # Nothing left to prefetch: skip the scan until traffic or this time
+        self._recheck_at = 0.0
+        self.prefetched = 0
+
+    def key(self, text: str):
+        return cache_key(text, self.language, self.speed)
+
+    def observe(self, text: str):
+        """Count a segment from live traffic."""
+        self._last_activity = time.monotonic()
+        self._recheck_at = 0.0
+        if len(text) > self.max_chars:
+            return
+        self.counts[" ".join(text.split())] += 1
+        if len(self.counts) > self.max_tracked:
+            # Age the counts so the table stays bounded and recent traffic wins
+            self.counts = Counter({text: count // 2 for text, count in self.counts.items() if count > 1})
+
+    def is_hot(self, text: str) -> bool:
+        """Worth keeping in the cache after a normal synthesis."""
+        key = " ".join(text.split())
+        return self.counts[key] >= self.min_count or key in self._startup
+
+    def set_user_speaking(self, speaking: bool):
+        if speaking:
+            self._last_activity = time.monotonic()
+        self._user_speaking = speaking
+
+    def next_phrase(self, queue_empty: bool) -> Optional[str]:
+        """A phrase to prefetch now, or None if the node is busy or nothing is left."""
+        if not queue_empty or self._user_speaking:
+            return None
+        now = time.monotonic()
+        if now - self._last_activity < self.idle_seconds or now < self._recheck_at:
+            return None
+        for phrase in self._startup:
+            if phrase not in self._failed and self.key(phrase) not in self.cache:
+                return phrase
+        for phrase, count in self.counts.most_common():
+            if count < self.min_count:
+                break
+            if phrase not in self._failed and self.key(phrase) not in self.cache:
+                return phrase
+        # Evictions can make phrases worth prefetching again
+        self._recheck_at = now + max(5.0, 5 * self.idle_seconds)
+        return None
+
+    def mark_failed(self, text: str):
+        """Do not retry a phrase whose synthesis failed."""
+        self._failed.add(" ".join(text.split()))
+
+    def learned(self, limit: int = 200) -> List[str]:
+        return [phrase for phrase, count in self.counts.most_common(limit) if count >= self.min_count]
+
+    def save(self, path: str, limit: int = 200):
+        """Persist learned phrases so the next start can warm them up."""
+        data = {"phrases": self.learned(limit)}
+        tmp = Path(path).with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+    def load(self, path: str):
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for phrase in data.get("phrases", []):
+            if len(phrase) <= self.max_chars and phrase not in self._startup:
+                self._startup.append(phrase)
+        self._recheck_at = 0.0
@@ -0,0 +1,235 @@
+"""
+Background synthesis worker for the PrimeSpeech node.
+
+Synthesis runs on a dedicated thread so the Dora event loop stays responsive
+to control events while audio is being generated. A barge-in ``reset`` can
+therefore cancel the in-flight segment and drop queued segments that belong
+to a stale question instead of waiting for them to finish.
+
+The Dora ``Node`` object must only be used from the thread that polls it, so
+the worker never calls ``send_output`` directly. Outputs and log lines are
+posted to ``outbox`` and flushed by the main loop via ``drain``.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass
+class SynthesisJob:
+    """A single text segment waiting to be synthesized."""
+
+    text: str
+    metadata: Dict[str, Any]
+    submitted_at: float = field(default_factory=time.time)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    cancel_requested_at: Optional[float] = None
+    # Prefetch jobs fill the audio cache; they send no output or completion
+    prefetch: bool = False
+    # Keep the synthesized audio in the audio cache (recurring phrase)
+    cache: bool = False
+
+    @property
+    def question_id(self) -> Optional[Any]:
+        return self.metadata.get("question_id")
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        if self.cancel_requested_at is None:
+            self.cancel_requested_at = time.time()
+        self.cancel_event.set()
+
+
+class SynthesisWorker:
+    """Run synthesis jobs sequentially on a background thread."""
+
+    def __init__(self, process_fn: Callable[["SynthesisJob"], Tuple[str, Dict[str, Any]]],
+                 abort_fn: Optional[Callable[[], None]] = None,
+                 init_fn: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            process_fn: Called on the worker thread for every job. It should
+                check ``job.cancelled`` between fragments, send audio through
+                ``send_output`` and return the ``segment_complete`` status and
+                metadata. The worker sends the completion itself so that each
+                job produces exactly one, even when cancelled mid-way.
+            abort_fn: Called when the in-flight job is cancelled, used to
+                interrupt the TTS engine mid-synthesis.
+            init_fn: Called once on the worker thread before the first job,
+                used to load models in the background. Jobs submitted in the
+                meantime wait in the queue; ``ready`` is set when it returns.
+        """
+        self._process_fn = process_fn
+        self._abort_fn = abort_fn
+        self._init_fn = init_fn
+        self._jobs: Deque[SynthesisJob] = deque()
+        self._cond = threading.Condition()
+        self._current: Optional[SynthesisJob] = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="primespeech-synthesis", daemon=True)
+
+        self.outbox: "queue.Queue[tuple]" = queue.Queue()
+        self.cancel_latencies: List[float] = []
+        self.ready = threading.Event()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Cancel everything and wait briefly for the worker to exit."""
+        self.cancel_stale(None)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def submit(self, job: SynthesisJob):
+        """Queue a job. A real segment cancels queued and in-flight prefetch jobs."""
+        with self._cond:
+            if not job.prefetch:
+                self._jobs = deque(queued for queued in self._jobs if not queued.prefetch)
+                current = self._current
+                if current is not None and current.prefetch and not current.cancelled:
+                    self._cancel_current(current)
+            self._jobs.append(job)
+            self._cond.notify()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs) + (1 if self._current is not None else 0)
+
+    def cancel_stale(self, question_id: Optional[Any] = None):
+        """Cancel work that does not belong to ``question_id``.
+
+        When ``question_id`` is None every queued and in-flight job is
+        cancelled, matching the segmenter's behaviour for a bare reset.
+
+        Returns:
+            tuple: (dropped_queued_jobs, cancelled_in_flight)
+        """
+        def is_stale(job):
+            return question_id is None or job.question_id != question_id
+
+        with self._cond:
+            dropped = [job for job in self._jobs if is_stale(job)]
+            self._jobs = deque(job for job in self._jobs if not is_stale(job))
+            current = self._current
+            cancel_current = current is not None and not current.cancelled and is_stale(current)
+            if cancel_current:
+                self._cancel_current(current)
+
+        for job in dropped:
+            job.cancel()
+            if job.prefetch:
+                continue
+            self.send_output("segment_complete", "cancelled", self._completion_metadata(job, 0.0))
+
+        return sum(1 for job in dropped if not job.prefetch), cancel_current
+
+    def _cancel_current(self, job: SynthesisJob):
+        """Cancel the in-flight ``job``. Must be called with ``_cond`` held.
+
+        Holding the lock keeps ``_run`` from reading the job's outcome or
+        starting the next job in between, so the abort can only reach the
+        engine while ``job`` is still the one running.
+        """
+        job.cancel()
+        if self._abort_fn is not None and self._current is job:
+            try:
+                self._abort_fn()
+            except Exception as e:
+                self.log("WARNING", f"Abort request failed: {e}")
+
+    def send_output(self, output_id: str, value: Any, metadata: Dict[str, Any],
+                    job: Optional[SynthesisJob] = None):
+        """Queue an output for the main thread.
+
+        Outputs tied to a ``job`` are dropped at drain time if the job has
+        been cancelled in the meantime, so stale audio never reaches clients.
+        """
+        self.outbox.put(("output", output_id, value, metadata, job))
+
+    def log(self, level: str, message: str):
+        self.outbox.put(("log", level, message))
+
+    def drain(self, send_output: Callable[[str, Any, Dict[str, Any]], None],
+              send_log: Callable[[str, str], None]) -> int:
+        """Flush queued outputs. Must be called from the Dora thread."""
+        sent = 0
+        while True:
+            try:
+                item = self.outbox.get_nowait()
+            except queue.Empty:
+                return sent
+            if item[0] == "log":
+                send_log(item[1], item[2])
+                continue
+            _, output_id, value, metadata, job = item
+            if job is not None and job.cancelled:
+                continue
+            send_output(output_id, value, metadata)
+            sent += 1
+
+    def _completion_metadata(self, job: SynthesisJob, cancel_latency: float) -> Dict[str, Any]:
+        metadata = {
+            "session_id": job.metadata.get("session_id", "default"),
+            "request_id": job.metadata.get("request_id"),
+            "segment_index": job.metadata.get("segment_index", -1),
+            "segments_remaining": job.metadata.get("segments_remaining", 0),
+            "conversation_id": job.metadata.get("conversation_id"),
+            "question_id": job.question_id,
+            "cancelled": True,
+            "cancel_latency_ms": round(cancel_latency * 1000, 1),
+        }
+        return {key: value for key, value in metadata.items() if value is not None}
+
+    def _run(self):
+        if self._init_fn is not None:
+            try:
+                self._init_fn()
+            except Exception as e:
+                self.log("ERROR", f"Background initialization failed: {e}")
+        self.ready.set()
+
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job = self._jobs.popleft()
+                self._current = job
+
+            completion = None
+            try:
+                if not job.cancelled:
+                    completion = self._process_fn(job)
+            except Exception as e:
+                self.log("ERROR", f"Synthesis worker error: {e}")
+                completion = ("error", {"error": str(e), "error_stage": "synthesis"})
+            finally:
+                # Once _current is cleared cancel_stale can no longer touch this job,
+                # so the cancelled/completed decision below is final.
+                with self._cond:
+                    self._current = None
+                    cancelled = job.cancelled
+
+            if job.prefetch:
+                continue
+            if not cancelled:
+                status, metadata = completion or ("error", {"error": "no synthesis result"})
+                self.send_output("segment_complete", status, metadata)
+            else:
+                latency = time.time() - (job.cancel_requested_at or time.time())
+                self.cancel_latencies.append(latency)
+                self.log("INFO", f"[PrimeSpeech] Cancelled segment {job.metadata.get('segment_index', -1) + 1} "
+                                 f"(question_id={job.question_id}) in {latency * 1000:.1f}ms")
+                self.send_output("segment_complete", "cancelled", self._completion_metadata(job, latency))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Parity test for the ONNX Runtime engine against the torch engine.
+
+Requires graphs exported with moyoyo_tts/onnx_export.py under
+$PRIMESPEECH_MODEL_DIR/moyoyo/onnx/<voice>/. Checks:
+  - CNHuBERT ssl content matches (if the cnhubert graph was exported)
+  - synthesized durations agree within tolerance
+  - log-mel spectrogram distance between the two engines
+  - cold start (engine construction + reference audio) and per-sentence latency
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Ensure dora_primespeech is in path
+sys.path.insert(0, str(Path(__file__).parent / "dora_primespeech"))
+
+SENTENCES = [
+    "你好，很高兴见到你。",
+    "今天我们来学习一元二次方程的求根公式。",
+    "如果判别式小于零，这个方程在实数范围内没有解。",
+]
+
+SSL_TOLERANCE = 1e-3
+DURATION_TOLERANCE = 0.25
+
+
+def build_engines(models_path: Path, voice: str):
+    from moyoyo_tts.TTS_infer_pack.TTS import TTS
+    from moyoyo_tts.TTS_infer_pack.TTS_onnx import OnnxTTS, OnnxTTSConfig
+
+    ref_audio = str(models_path / f"ref_audios/{voice}_ref.wav")
+    bert_path = str(models_path / "chinese-roberta-wwm-ext-large")
+    hubert_path = str(models_path / "chinese-hubert-base")
+
+    start = time.time()
+    torch_tts = TTS({
+        "version": "v2",
+        "custom": {
+            "device": "cpu",
+            "is_half": False,
+            "version": "v2",
+            "t2s_weights_path": str(models_path / f"GPT_weights/{voice}_best_gpt.ckpt"),
+            "vits_weights_path": str(models_path / f"SoVITS_weights/{voice}_best_sovits.pth"),
+            "cnhuhbert_base_path": hubert_path,
+            "bert_base_path": bert_path,
+        },
+    })
+    torch_tts.set_ref_audio(ref_audio)
+    torch_cold = time.time() - start
+
+    start = time.time()
+    onnx_tts = OnnxTTS(OnnxTTSConfig(str(models_path / "onnx"), voice,
+                                     bert_base_path=bert_path, cnhuhbert_base_path=hubert_path))
+    onnx_tts.set_ref_audio(ref_audio)
+    onnx_cold = time.time() - start
+
+    print(f"Cold start: torch {torch_cold:.2f}s, onnx {onnx_cold:.2f}s")
+    return torch_tts, onnx_tts, ref_audio
+
+
+def log_mel(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    import librosa
+
+    mel = librosa.feature.melspectrogram(y=audio.astype(np.float32) / 32768.0, sr=sample_rate, n_mels=80)
+    return np.log(mel + 1e-5)
+
+
+def mel_distance(a: np.ndarray, b: np.ndarray, sample_rate: int) -> float:
+    """Mean absolute log-mel difference after trimming to the shorter clip."""
+    mel_a, mel_b = log_mel(a, sample_rate), log_mel(b, sample_rate)
+    frames = min(mel_a.shape[1], mel_b.shape[1])
+    return float(np.mean(np.abs(mel_a[:, :frames] - mel_b[:, :frames])))
+
+
+def test_ssl_parity(torch_tts, onnx_tts):
+    """The exported CNHuBERT graph must match the torch model closely."""
+    if onnx_tts.ssl is None:
+        print("⚠️  No cnhubert graph exported, ssl parity skipped")
+        return True
+    # The torch engine only caches the quantized prompt semantic, so rerun its ssl model
+    import torch
+    import librosa
+
+    wav16k, _ = librosa.load(onnx_tts.prompt_cache["ref_audio_path"], sr=16000)
+    wav16k = np.concatenate([wav16k, np.zeros(int(onnx_tts.configs.sampling_rate * 0.3), dtype=np.float32)])
+    with torch.no_grad():
+        expected = torch_tts.cnhuhbert_model.model(torch.from_numpy(wav16k)[None, :].float())["last_hidden_state"]
+    expected = expected.transpose(1, 2).numpy()
+    diff = float(np.max(np.abs(expected - onnx_tts.prompt_cache["ssl_content"])))
+    print(f"SSL content max abs diff: {diff:.2e}")
+    return diff < SSL_TOLERANCE
+
+
+def test_synthesis_parity(torch_tts, onnx_tts, ref_audio: str, prompt_text: str):
+    ok = True
+    for text in SENTENCES:
+        inputs = {
+            "text": text,
+            "text_lang": "zh",
+            "prompt_text": prompt_text,
+            "prompt_lang": "zh",
+            "ref_audio_path": ref_audio,
+            "top_k": 3,
+            "seed": 233333,
+            "split_bucket": False,
+        }
+        start = time.time()
+        torch_sr, torch_audio = next(torch_tts.run(inputs))
+        torch_time = time.time() - start
+        start = time.time()
+        onnx_sr, onnx_audio = next(onnx_tts.run(inputs))
+        onnx_time = time.time() - start
+
+        assert torch_sr == onnx_sr, f"sample rate mismatch: {torch_sr} vs {onnx_sr}"
+        ratio = len(onnx_audio) / max(len(torch_audio), 1)
+        distance = mel_distance(torch_audio, onnx_audio, torch_sr)
+        passed = abs(ratio - 1.0) <= DURATION_TOLERANCE
+        ok &= passed
+        print(f"  {'✓' if passed else '✗'} {text[:20]}: torch {torch_time:.3f}s / onnx {onnx_time:.3f}s, "
+              f"duration ratio {ratio:.3f}, log-mel distance {distance:.3f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ONNX engine parity with the torch engine")
+    parser.add_argument("--voice", type=str, default="doubao", help="Voice weights / ONNX project prefix")
+    args = parser.parse_args()
+
+    models_dir = os.environ.get("PRIMESPEECH_MODEL_DIR")
+    if not models_dir:
+        print("PRIMESPEECH_MODEL_DIR is not set")
+        sys.exit(1)
+    models_path = Path(os.path.expanduser(models_dir)) / "moyoyo"
+
+    from benchmark_quantization import prompt_text_for
+
+    prompt_text = prompt_text_for(args.voice)
+    torch_tts, onnx_tts, ref_audio = build_engines(models_path, args.voice)
+
+    results = [
+        ("ssl parity", test_ssl_parity(torch_tts, onnx_tts)),
+        ("synthesis parity", test_synthesis_parity(torch_tts, onnx_tts, ref_audio, prompt_text)),
+    ]
+    print("\n" + "=" * 50)
+    for name, passed in results:
+        print(f"{'✅' if passed else '❌'} {name}")
+    sys.exit(0 if all(passed for _, passed in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,13 @@ def send_log(node, level, message):
     node.send_output("log", pa.array([json.dumps(log_data)]))
 
 
+def send_metric(node, name, value=None, **fields):
+    """Send a structured metric record through the metrics output channel."""
+    record = {"node": "speech-monitor", "name": name, "value": value, "ts": time.time()}
+    record.update({key: val for key, val in fields.items() if val is not None})
+    node.send_output("metrics", pa.array([json.dumps(record)]))
+
+
 def main():
     """Main entry point for speech monitor node"""
     
@@ -251,6 +258,7 @@ def main():
                             "speech_ended",
                             pa.array([speech_end_time])
                         )
+                        send_metric(node, "speech_end")
                         
                         # Send complete audio segment
                         if len(audio_frames) > 0:
@@ -1,18 +1,54 @@
 #!/usr/bin/env python3
 """
 Text Segmenter Node - Sequential segment sender.
-Segments text by punctuation and sends segments ONE AT A TIME.
-Waits for TTS completion before sending next segment.
+Segments text by punctuation and sends segments ONE AT A TIME per session.
+Waits for TTS completion before sending a session's next segment.
+
+Many conversations share one TTS node:
+- Sessions with a segment ready take turns (round-robin), and at most
+  MAX_IN_FLIGHT segments are at the TTS at once, so one long answer cannot
+  starve the other sessions.
+- Completion timeouts live in a heap ordered by deadline; the node sleeps
+  until the earliest one instead of scanning every session on each wakeup.
+- At most MAX_SESSIONS sessions are kept; the least recently active one is
+  evicted first, and a session is removed once its last segment completes.
 """
 
+import heapq
+import itertools
 import os
 import re
 import time
-import json
-from typing import List, Dict, Any
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
 import pyarrow as pa
 from dora import Node
 
+# Compiled once; segment_by_punctuation runs for every incoming text
+SENTENCE_SPLIT = re.compile(r'([。！？.!?])')
+CLAUSE_SPLIT = re.compile(r'([；;])')
+
+
+class _Session:
+    """Segments of one session still to be spoken."""
+
+    __slots__ = ("session_id", "request_id", "segments", "sent", "total", "awaiting",
+                 "queued", "timer", "start_time")
+
+    def __init__(self, session_id: str, request_id: str, segments: List[str]):
+        self.session_id = session_id
+        self.request_id = request_id
+        self.segments: Deque[str] = deque(segments)
+        self.sent = 0
+        self.total = len(segments)
+        # A segment of this session is at the TTS
+        self.awaiting = False
+        # This session is in the round-robin ready queue
+        self.queued = False
+        # Token of the session's live timer; older heap entries are stale
+        self.timer = 0
+        self.start_time = time.time()
+
 
 class SequentialTextSegmenter:
     """Segments text and sends segments sequentially after TTS completion."""
@@ -22,20 +58,25 @@ class SequentialTextSegmenter:
         self.max_length = int(os.getenv("MAX_SEGMENT_LENGTH", "50"))
         self.min_length = int(os.getenv("MIN_SEGMENT_LENGTH", "3"))
         
-        # State for each session
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.completion_timeout = float(os.getenv("COMPLETION_TIMEOUT", "30"))
+        self.max_in_flight = int(os.getenv("MAX_IN_FLIGHT", "4"))
+        self.max_sessions = int(os.getenv("MAX_SESSIONS", "256"))
+
+        # State for each session, least recently active first
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        # Sessions with a segment ready to send, in turn order
+        self.ready: Deque[_Session] = deque()
+        self.in_flight = 0
+        # (deadline, timer token, session)
+        self.timers: List[Tuple[float, int, _Session]] = []
+        self._tokens = itertools.count(1)
         
     def segment_by_punctuation(self, text: str) -> List[str]:
         """Segment text by punctuation marks."""
-        # Define punctuation patterns
-        sentence_marks = r'[。！？.!?]'
-        clause_marks = r'[；;]'
-        phrase_marks = r'[，,、]'
-        
         segments = []
         
         # Split by sentence-ending punctuation
-        parts = re.split(f'({sentence_marks})', text)
+        parts = SENTENCE_SPLIT.split(text)
         
         current_segment = ""
         for i in range(0, len(parts), 2):
@@ -51,7 +92,7 @@ class SequentialTextSegmenter:
             # Check length and split if needed
             if len(segment) > self.max_length:
                 # Further split by clause marks
-                clause_parts = re.split(f'({clause_marks})', segment)
+                clause_parts = CLAUSE_SPLIT.split(segment)
                 for j in range(0, len(clause_parts), 2):
                     if j + 1 < len(clause_parts):
                         clause = clause_parts[j] + clause_parts[j + 1]
@@ -75,56 +116,127 @@ class SequentialTextSegmenter:
         
         return segments
     
-    def send_next_segment(self, node: Node, session_id: str):
+    def add_text(self, node: Node, session_id: str, request_id: str, text: str):
+        """Segment a new text for a session, replacing what it had not sent yet."""
+        segments = self.segment_by_punctuation(text)
+        print(f"[Segmenter] Segmented into {len(segments)} parts")
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            while len(self.sessions) >= self.max_sessions:
+                _, evicted = self.sessions.popitem(last=False)
+                self._release(evicted)
+                print(f"[Segmenter] Evicted session {evicted.session_id} (max {self.max_sessions} sessions)")
+            session = self.sessions[session_id] = _Session(session_id, request_id, segments)
+        else:
+            self.sessions.move_to_end(session_id)
+            session.request_id = request_id
+            session.segments = deque(segments)
+            session.sent = 0
+            session.total = len(segments)
+        self._make_ready(node, session)
+        self.dispatch(node)
+
+    def complete(self, node: Node, session_id: str):
+        """A session's in-flight segment finished (or timed out)."""
+        session = self.sessions.get(session_id)
+        if session is None or not session.awaiting:
+            return
+        self._release(session)
+        self.sessions.move_to_end(session_id)
+        self._make_ready(node, session)
+        self.dispatch(node)
+
+    def dispatch(self, node: Node):
+        """Send one segment per session, taking turns, while TTS has capacity."""
+        while self.ready and self.in_flight < self.max_in_flight:
+            session = self.ready.popleft()
+            session.queued = False
+            if self.sessions.get(session.session_id) is not session or session.awaiting or not session.segments:
+                continue
+            self.send_next_segment(node, session)
+
+    def next_timeout(self) -> Optional[float]:
+        """Seconds until the earliest live deadline, None if there is none."""
+        while self.timers and self.timers[0][1] != self.timers[0][2].timer:
+            heapq.heappop(self.timers)
+        if not self.timers:
+            return None
+        return max(0.0, self.timers[0][0] - time.time())
+
+    def expire(self, node: Node):
+        """Force on sessions whose TTS completion is overdue."""
+        now = time.time()
+        while self.timers and self.timers[0][0] <= now:
+            _, token, session = heapq.heappop(self.timers)
+            if token != session.timer:
+                continue
+            print(f"[Segmenter] Timeout for session {session.session_id}, forcing next segment")
+            self.complete(node, session.session_id)
+
+    def send_next_segment(self, node: Node, session: _Session):
         """Send the next segment for a session."""
-        if session_id not in self.sessions:
+        segment = session.segments.popleft()
+        index = session.sent
+
+        # Send segment
+        metadata = {
+            "session_id": session.session_id,
+            "request_id": session.request_id,
+            "segment_index": index,
+            "total_segments": session.total,
+            "is_first": index == 0,
+            "is_last": index == session.total - 1,
+            "segment_text": segment
+        }
+
+        node.send_output(
+            "text_segment",
+            pa.array([segment]),
+            metadata=metadata
+        )
+
+        print(f"[Segmenter] Sent segment {index + 1}/{session.total} for {session.session_id}: {segment[:30]}...")
+
+        # Mark as sent
+        session.sent += 1
+        session.awaiting = True
+        self.in_flight += 1
+        session.timer = next(self._tokens)
+        heapq.heappush(self.timers, (time.time() + self.completion_timeout, session.timer, session))
+
+    def _make_ready(self, node: Node, session: _Session):
+        if session.awaiting:
             return
-        
-        session = self.sessions[session_id]
-        
-        # Check if there are more segments to send
-        if session["current_index"] < len(session["segments"]):
-            segment = session["segments"][session["current_index"]]
-            
-            # Send segment
-            metadata = {
-                "session_id": session_id,
-                "request_id": session["request_id"],
-                "segment_index": session["current_index"],
-                "total_segments": len(session["segments"]),
-                "is_first": session["current_index"] == 0,
-                "is_last": session["current_index"] == len(session["segments"]) - 1,
-                "segment_text": segment
+        if session.segments:
+            if not session.queued:
+                session.queued = True
+                self.ready.append(session)
+            return
+
+        # All segments sent and spoken
+        print(f"[Segmenter] Session {session.session_id} complete - all segments sent")
+
+        # Send completion status
+        node.send_output(
+            "status",
+            pa.array(["all_segments_sent"]),
+            metadata={
+                "session_id": session.session_id,
+                "total_segments": session.total
             }
-            
-            node.send_output(
-                "text_segment",
-                pa.array([segment]),
-                metadata=metadata
-            )
-            
-            print(f"[Segmenter] Sent segment {session['current_index'] + 1}/{len(session['segments'])}: {segment[:30]}...")
-            
-            # Mark as sent
-            session["current_index"] += 1
-            session["awaiting_completion"] = True
-            session["last_sent_time"] = time.time()
-        else:
-            # All segments sent
-            print(f"[Segmenter] Session {session_id} complete - all segments sent")
-            
-            # Send completion status
-            node.send_output(
-                "status",
-                pa.array(["all_segments_sent"]),
-                metadata={
-                    "session_id": session_id,
-                    "total_segments": len(session["segments"])
-                }
-            )
-            
-            # Clean up session
-            del self.sessions[session_id]
+        )
+
+        # Clean up session
+        if self.sessions.get(session.session_id) is session:
+            del self.sessions[session.session_id]
+
+    def _release(self, session: _Session):
+        """Give back the session's TTS credit and cancel its timer."""
+        if session.awaiting:
+            session.awaiting = False
+            self.in_flight -= 1
+        session.timer = 0
 
 
 def main():
@@ -134,18 +246,12 @@ def main():
     
     print("[Sequential Text Segmenter] Started")
     print(f"[Sequential Text Segmenter] Max segment length: {segmenter.max_length}")
+    print(f"[Sequential Text Segmenter] Max in flight: {segmenter.max_in_flight}, max sessions: {segmenter.max_sessions}")
     
     while True:
-        event = node.next(timeout=0.5)
-        
-        # Check for timeouts
-        current_time = time.time()
-        for session_id, session in list(segmenter.sessions.items()):
-            if session.get("awaiting_completion", False):
-                if current_time - session.get("last_sent_time", 0) > 30:
-                    print(f"[Segmenter] Timeout for session {session_id}, forcing next segment")
-                    session["awaiting_completion"] = False
-                    segmenter.send_next_segment(node, session_id)
+        # Sleep until the next completion deadline at most
+        event = node.next(timeout=segmenter.next_timeout())
+        segmenter.expire(node)
         
         if event is None:
             continue
@@ -159,23 +265,7 @@ def main():
                 request_id = metadata.get("request_id", f"req_{time.time()}")
                 
                 print(f"\n[Segmenter] New text received ({len(text)} chars) for session {session_id}")
-                
-                # Segment the text
-                segments = segmenter.segment_by_punctuation(text)
-                print(f"[Segmenter] Segmented into {len(segments)} parts")
-                
-                # Initialize session
-                segmenter.sessions[session_id] = {
-                    "segments": segments,
-                    "current_index": 0,
-                    "request_id": request_id,
-                    "awaiting_completion": False,
-                    "last_sent_time": 0,
-                    "start_time": time.time()
-                }
-                
-                # Send first segment immediately
-                segmenter.send_next_segment(node, session_id)
+                segmenter.add_text(node, session_id, request_id, text)
                 
             elif event["id"] == "tts_complete":
                 # TTS completed a segment, send next one
@@ -184,13 +274,7 @@ def main():
                 segment_index = metadata.get("segment_index", -1)
                 
                 print(f"[Segmenter] TTS completed segment {segment_index + 1} for session {session_id}")
-                
-                if session_id in segmenter.sessions:
-                    session = segmenter.sessions[session_id]
-                    session["awaiting_completion"] = False
-                    
-                    # Send next segment
-                    segmenter.send_next_segment(node, session_id)
+                segmenter.complete(node, session_id)
                     
         elif event["type"] == "STOP":
             print("[Sequential Text Segmenter] Stopping...")
@@ -200,4 +284,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
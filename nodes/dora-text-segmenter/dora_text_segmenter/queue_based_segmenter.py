@@ -3,16 +3,34 @@
 Queue-based Text Segmenter
 1. No deadlock - first segment sent immediately
 2. Don't judge if segments are complete - just queue them
-3. Send one at a time, triggered by TTS completion
+3. Credit-based flow control - up to SEGMENT_WINDOW segments in flight,
+   each completion (matched by segment_index) frees one credit
 4. Skip segments with only punctuation or numbers
+5. Optionally merge small queued segments up to MERGE_TARGET_LENGTH
+6. With STREAMING_SEGMENTATION (default off), incoming text is treated as
+   LLM token deltas and cut into sentences incrementally per question_id
+   (see streaming.py); a question's tail is flushed when its metadata marks
+   the end of the stream (is_final or session_status) or after
+   FLUSH_TIMEOUT_MS without a delta. Leave it off unless the upstream marks
+   the end of its streams, or every answer's tail waits for the timeout
+
+With a window of 1 this is the old send-one-wait-one behaviour. A window of
+2 or more lets TTS start the next segment while the previous one plays, so
+there is no round trip between segments.
 """
 
 import os
-import time
 import re
+from collections import OrderedDict, deque
+
 import pyarrow as pa
 from dora import Node
-from collections import deque
+
+from dora_text_segmenter.streaming import StreamingSegmenter
+
+# Metadata marking the last delta of an LLM stream
+_END_OF_STREAM = {"ended", "complete", "completed", "finished"}
+
 
 def should_skip_segment(text, punctuation_marks="。！？.!?"):
     """Check if segment should be skipped (only punctuation or numbers)
@@ -28,39 +46,166 @@ def should_skip_segment(text, punctuation_marks="。！？.!?"):
     if not text_stripped:
         return True
 
-    # Build pattern dynamically from configured punctuation marks
-    # Escape special regex characters in punctuation marks
-    escaped_punctuation = re.escape(punctuation_marks)
-
     # Pattern: only whitespace + numbers + configured punctuation marks
     # This allows filtering based on user-configured punctuation
-    skip_pattern = f'^[\\s\\d{escaped_punctuation}]+$'
+    return _skip_pattern(punctuation_marks).match(text_stripped) is not None
 
-    if re.match(skip_pattern, text_stripped):
-        return True
 
-    return False
+_SKIP_PATTERNS = {}
+
+
+def _skip_pattern(punctuation_marks):
+    pattern = _SKIP_PATTERNS.get(punctuation_marks)
+    if pattern is None:
+        pattern = re.compile(f'^[\\s\\d{re.escape(punctuation_marks)}]+$')
+        _SKIP_PATTERNS[punctuation_marks] = pattern
+    return pattern
+
+
+class CreditDispatcher:
+    """Queue of segments sent to TTS with at most ``window`` in flight.
+
+    Every dispatched segment gets an increasing ``segment_index``; TTS echoes
+    it in ``segment_complete`` so completions are matched even when they
+    arrive out of order. Segments waiting in the queue are merged up to
+    ``merge_target`` characters (same question only, never beyond
+    ``max_length``) when a credit frees up, so a busy TTS gets fewer,
+    longer requests and an idle one gets the first segment immediately.
+    """
+
+    def __init__(self, window=2, merge_target=0, max_length=100):
+        self.window = max(1, window)
+        self.merge_target = merge_target
+        self.max_length = max_length
+        self.queue = deque()
+        # segment_index -> segment, oldest first
+        self.in_flight = OrderedDict()
+        self.next_index = 0
+        self.out_of_order = 0
+
+    def offer(self, text, metadata, question_id):
+        """Queue a segment; returns the segments to send now."""
+        self.queue.append({"text": text, "metadata": metadata, "question_id": question_id})
+        return self.pump()
+
+    def complete(self, segment_index):
+        """Release the credit of ``segment_index``; returns the segments to send now."""
+        if segment_index in self.in_flight:
+            if segment_index != next(iter(self.in_flight)):
+                self.out_of_order += 1
+            del self.in_flight[segment_index]
+        elif segment_index is None or segment_index < 0:
+            # TTS that does not echo segment_index: assume in-order completion
+            if self.in_flight:
+                self.in_flight.popitem(last=False)
+        # Otherwise it is a completion for a segment dropped by reset
+        return self.pump()
+
+    def pump(self):
+        ready = []
+        while self.queue and len(self.in_flight) < self.window:
+            segment = self._take()
+            index = self.next_index
+            self.next_index += 1
+            self.in_flight[index] = segment
+            ready.append((index, segment))
+        return ready
+
+    def reset(self, question_id=None):
+        """Drop queued and in-flight segments not belonging to ``question_id``.
+
+        In-flight segments of other questions give back their credit at
+        once; TTS cancels them on the same reset and their late completions
+        are ignored. Returns the number of queued segments cleared.
+        """
+        before = len(self.queue)
+        if question_id is None:
+            self.queue.clear()
+            self.in_flight.clear()
+        else:
+            self.queue = deque(s for s in self.queue if s["question_id"] == question_id)
+            for index in [i for i, s in self.in_flight.items() if s["question_id"] != question_id]:
+                del self.in_flight[index]
+        return before - len(self.queue)
+
+    def _take(self):
+        segment = self.queue.popleft()
+        if not self.merge_target:
+            return segment
+        text = segment["text"]
+        while (
+            len(text) < self.merge_target
+            and self.queue
+            and self.queue[0]["question_id"] == segment["question_id"]
+            and len(text) + len(self.queue[0]["text"]) <= self.max_length
+        ):
+            text += self.queue.popleft()["text"]
+        return {**segment, "text": text}
+
 
 def main():
     node = Node("text-segmenter")
 
     # Configuration from environment
     punctuation_marks = os.getenv("PUNCTUATION_MARKS", "。！？.!?")
+    window = int(os.getenv("SEGMENT_WINDOW", "2"))
+    merge_target = int(os.getenv("MERGE_TARGET_LENGTH", "0"))
+    max_length = int(os.getenv("MAX_SEGMENT_LENGTH", "100"))
     print(f"[Segmenter] Configured punctuation marks for filtering: '{punctuation_marks}'")
+    print(f"[Segmenter] Window: {window} segments in flight, merge target: {merge_target or 'off'}")
 
-    # Simple queue for segments
-    segment_queue = deque()
-    is_sending = False
+    dispatcher = CreditDispatcher(window=window, merge_target=merge_target, max_length=max_length)
+    streaming = None
+    if os.getenv("STREAMING_SEGMENTATION", "false").lower() in ("1", "true", "yes"):
+        streaming = StreamingSegmenter(
+            first_min_chars=int(os.getenv("FIRST_SEGMENT_MIN_CHARS", "6")),
+            first_max_chars=int(os.getenv("FIRST_SEGMENT_MAX_CHARS", "24")),
+            target_length=int(os.getenv("TARGET_SEGMENT_LENGTH", "40")),
+            max_length=max_length,
+            growth=float(os.getenv("SEGMENT_GROWTH", "2.0")),
+        )
+        print(f"[Segmenter] Streaming segmentation: first segment {streaming.first_min_chars}-"
+              f"{streaming.first_max_chars} chars, target {streaming.target_length}")
+    flush_timeout = float(os.getenv("FLUSH_TIMEOUT_MS", "400")) / 1000
+    # Metadata of the latest delta per question, attached to its segments
+    stream_metadata = {}
 
-    # Segment counter
-    segment_counter = 0  # Number of segments in queue
+    def send(ready):
+        for index, segment in ready:
+            node.send_output(
+                "text_segment",
+                pa.array([segment["text"]]),
+                metadata={
+                    **segment["metadata"],
+                    "segment_index": index,
+                    "segments_remaining": len(dispatcher.queue),
+                    "segments_in_flight": len(dispatcher.in_flight),
+                }
+            )
 
-    # Track current question_id for smart reset
-    current_question_id = None
+    def offer(segments, question_id, metadata):
+        for segment in segments:
+            # Skipped segments still pump, so no deadlock even if the
+            # first segments are all punctuation
+            if not should_skip_segment(segment, punctuation_marks):
+                send(dispatcher.offer(segment, metadata, question_id))
+            else:
+                send(dispatcher.pump())
 
     print("[Segmenter] Started")
-    
-    for event in node:
+
+    while True:
+        event = node.next(timeout=flush_timeout / 2 if streaming is not None else None)
+        if streaming is not None:
+            # Checked on every event, so a busy input cannot starve the flush
+            for question_id, rest in streaming.flush_idle(flush_timeout):
+                # The LLM went quiet: speak what it has written so far
+                offer([rest], question_id, stream_metadata.pop(question_id, {}))
+        if event is None:
+            if streaming is None:
+                break
+            continue
+
         if event["type"] == "INPUT":
             if event["id"] == "text":
                 # Received text from LLM
@@ -70,76 +215,30 @@ def main():
                 # Extract question_id from metadata (passed from ASR via LLM)
                 question_id = metadata.get("question_id", None)
 
-                # Update current question_id
-                if question_id is not None:
-                    current_question_id = question_id
-
-                # ALWAYS queue incoming text - don't filter here
-                # Filtering only happens when reset event is received
-                # Check if we should skip this segment
-                if not should_skip_segment(text, punctuation_marks):
-                    # Valid segment - add to queue with question_id
-                    segment_queue.append({
-                        "text": text,
-                        "metadata": metadata,
-                        "question_id": question_id,
-                    })
-
-                    # Increase counter by 1 (in reality, segmenter might split text further)
-                    # For now, we're treating each incoming text as one segment
-                    segment_counter += 1
-                
-                # Try to send a segment if not currently sending
-                # This happens whether we queued the current segment or skipped it
-                # Ensures no deadlock even if first segments are all punctuation
-                if not is_sending and segment_queue:
-                    segment = segment_queue.popleft()
-                    
-                    # Decrease counter BEFORE sending
-                    segment_counter -= 1
-                    
-                    # Send segment to TTS with metadata
-                    node.send_output(
-                        "text_segment",
-                        pa.array([segment["text"]]),
-                        metadata={
-                            "segments_remaining": segment_counter,  # After decrease
-                            **segment["metadata"]
-                        }
-                    )
-
-                    is_sending = True
-                    
+                if streaming is None:
+                    offer([text], question_id, metadata)
+                    continue
+
+                stream_metadata[question_id] = metadata
+                offer(streaming.feed(question_id, text), question_id, metadata)
+                if metadata.get("is_final") or metadata.get("session_status") in _END_OF_STREAM:
+                    rest = streaming.flush(question_id)
+                    offer([rest] if rest else [], question_id, stream_metadata.pop(question_id))
+
             elif event["id"] == "tts_complete":
-                # TTS completed a segment
-                
-                # Send next segment if available
-                if segment_queue:
-                    segment = segment_queue.popleft()
-                    
-                    # Decrease counter BEFORE sending
-                    segment_counter -= 1
-                    
-                    node.send_output(
-                        "text_segment",
-                        pa.array([segment["text"]]),
-                        metadata={
-                            "segments_remaining": segment_counter,  # After decrease
-                            **segment["metadata"]
-                        }
-                    )
-                else:
-                    # No more segments to send
-                    is_sending = False
-                    
+                # TTS completed (or cancelled) a segment - one credit back
+                metadata = event.get("metadata", {})
+                send(dispatcher.complete(metadata.get("segment_index", -1)))
+
             elif event["id"] == "control":
                 # Reset command
                 command = event["value"][0].as_py()
                 if command == "reset":
-                    print(f"[Segmenter] RESET: Cleared {len(segment_queue)} queued segments via control command")
-                    segment_queue.clear()
-                    is_sending = False
-                    segment_counter = 0
+                    stream_metadata.clear()
+                    if streaming is not None:
+                        streaming.drop()
+                    cleared = dispatcher.reset()
+                    print(f"[Segmenter] RESET: Cleared {cleared} queued segments via control command")
 
             elif event["id"] == "reset":
                 # Reset signal - clear only segments from OLD questions (different question_id)
@@ -148,40 +247,24 @@ def main():
 
                 if incoming_question_id is None:
                     # No question_id in reset signal - clear all (backward compatibility)
-                    cleared_count = len(segment_queue)
-                    segment_queue.clear()
-                    is_sending = False
-                    segment_counter = 0
-                    print(f"[Segmenter] RESET: Cleared {cleared_count} queued segments (no question_id)")
+                    stream_metadata.clear()
+                    if streaming is not None:
+                        streaming.drop()
+                    cleared = dispatcher.reset()
+                    print(f"[Segmenter] RESET: Cleared {cleared} queued segments (no question_id)")
                 else:
                     # Smart reset - only clear segments from different question_id
-                    original_count = len(segment_queue)
-                    new_queue = deque()
-                    cleared_count = 0
-
-                    for segment in segment_queue:
-                        seg_question_id = segment.get("question_id", None)
-                        if seg_question_id != incoming_question_id:
-                            # This segment is from a different (old) question - discard it
-                            cleared_count += 1
-                        else:
-                            # Keep segments with same question_id (new question)
-                            new_queue.append(segment)
-
-                    segment_queue = new_queue
-                    segment_counter = len(segment_queue)
-
-                    # Update current_question_id to the new question
-                    current_question_id = incoming_question_id
-
-                    # Reset is_sending if queue is empty
-                    if len(segment_queue) == 0:
-                        is_sending = False
-
-                    print(f"[Segmenter] SMART RESET: Cleared {cleared_count}/{original_count} old segments, kept {len(segment_queue)} from new question_id={incoming_question_id}")
+                    for question_id in [q for q in stream_metadata if q != incoming_question_id]:
+                        del stream_metadata[question_id]
+                    if streaming is not None:
+                        streaming.drop(keep_question_id=incoming_question_id)
+                    cleared = dispatcher.reset(incoming_question_id)
+                    print(f"[Segmenter] SMART RESET: Cleared {cleared} old segments, kept {len(dispatcher.queue)} from new question_id={incoming_question_id}")
+                    send(dispatcher.pump())
 
         elif event["type"] == "STOP":
             break
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,156 @@
+"""
+Incremental sentence segmentation of streaming LLM text.
+
+LLMs stream small token deltas. Forwarding each delta gives TTS tiny
+requests; waiting for the whole answer delays the first audio. The
+StreamingSegmenter keeps a buffer per question_id and cuts it as deltas
+arrive:
+
+- First segment: cut early for a low time-to-first-audio - at the first
+  sentence end, or the first clause break (，、：) after FIRST_SEGMENT_MIN_CHARS,
+  or at FIRST_SEGMENT_MAX_CHARS if no break shows up.
+- Later segments: the target length grows by SEGMENT_GROWTH per segment up
+  to TARGET_SEGMENT_LENGTH, the length TTS synthesizes most efficiently.
+  A segment is cut at the sentence end closest to the target once the
+  target is reached, or at the last break before MAX_SEGMENT_LENGTH.
+
+Delimiters are found once per delta by scanning only the new text, so the
+cost per delta does not grow with the answer.
+"""
+
+import re
+import time
+
+# Sentence-final punctuation plus trailing quotes; "." only before whitespace
+SENTENCE_END = re.compile(r"[。！？!?；;…]+[”’\"')）]*|\.(?=\s)|\n+")
+CLAUSE_END = re.compile(r"[，,、：:]")
+_LEADING = "。！？!?；;…，,、：:”’）) \n"
+
+
+class _Stream:
+    __slots__ = ("buffer", "scanned", "clause_scanned", "sentence_ends", "clause_ends", "segments",
+                 "target", "last_delta")
+
+    def __init__(self, target):
+        self.buffer = ""
+        # Text before this offset has been scanned for delimiters
+        self.scanned = 0
+        self.clause_scanned = 0
+        self.sentence_ends = []
+        self.clause_ends = []
+        self.segments = 0
+        self.target = target
+        self.last_delta = time.monotonic()
+
+
+class StreamingSegmenter:
+    """Per-question incremental segmenter with an adaptive first segment."""
+
+    def __init__(self, first_min_chars=6, first_max_chars=24, target_length=40,
+                 max_length=80, growth=2.0):
+        self.first_min_chars = first_min_chars
+        self.first_max_chars = first_max_chars
+        self.target_length = target_length
+        self.max_length = max(max_length, target_length)
+        self.growth = growth
+        self.streams = {}
+
+    def feed(self, question_id, delta):
+        """Add a delta; returns the segments it completed, in order."""
+        stream = self.streams.get(question_id)
+        if stream is None:
+            stream = self.streams[question_id] = _Stream(self.first_min_chars)
+        stream.buffer += delta
+        stream.last_delta = time.monotonic()
+        self._scan(stream)
+
+        segments = []
+        while True:
+            cut = self._cut(stream)
+            if cut is None:
+                break
+            segment = self._take(stream, cut)
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self, question_id):
+        """Remaining text of a finished stream, or None; forgets the stream."""
+        stream = self.streams.pop(question_id, None)
+        if stream is None:
+            return None
+        rest = stream.buffer.lstrip(_LEADING).strip()
+        return rest or None
+
+    def flush_idle(self, timeout):
+        """Flush streams that got no delta for ``timeout`` seconds.
+
+        Returns (question_id, text) pairs.
+        """
+        now = time.monotonic()
+        flushed = []
+        for question_id in [q for q, s in self.streams.items() if now - s.last_delta >= timeout]:
+            rest = self.flush(question_id)
+            if rest is not None:
+                flushed.append((question_id, rest))
+        return flushed
+
+    def drop(self, keep_question_id=None):
+        """Forget buffered text of every question except ``keep_question_id``."""
+        for question_id in [q for q in self.streams if q != keep_question_id or keep_question_id is None]:
+            del self.streams[question_id]
+
+    def _scan(self, stream):
+        buffer = stream.buffer
+        end = len(buffer)
+        for match in SENTENCE_END.finditer(buffer, stream.scanned):
+            # A terminal 。！？ cuts at once, even at the end of the buffer
+            stream.sentence_ends.append(match.end())
+        # Only a trailing "." needs the next character to decide
+        stream.scanned = end - 1 if buffer.endswith(".") else end
+        for match in CLAUSE_END.finditer(buffer, stream.clause_scanned):
+            stream.clause_ends.append(match.end())
+        stream.clause_scanned = end
+
+    def _cut(self, stream):
+        """Offset to cut the buffer at, or None to wait for more text."""
+        if stream.segments == 0:
+            if stream.sentence_ends:
+                return stream.sentence_ends[0]
+            early = [e for e in stream.clause_ends if e >= self.first_min_chars]
+            if early:
+                return early[0]
+            if len(stream.buffer) >= self.first_max_chars:
+                return self._fallback(stream, self.first_max_chars)
+            return None
+
+        for index, end in enumerate(stream.sentence_ends):
+            if end >= stream.target:
+                # Whichever sentence end lands closer to the target
+                before = stream.sentence_ends[index - 1] if index else 0
+                if before >= stream.target / 2 and stream.target - before < end - stream.target:
+                    return before
+                return end if end <= self.max_length else self._fallback(stream, self.max_length)
+        if len(stream.buffer) >= self.max_length:
+            return self._fallback(stream, self.max_length)
+        return None
+
+    def _fallback(self, stream, limit):
+        ends = [e for e in stream.sentence_ends if e <= limit] or [e for e in stream.clause_ends if e <= limit]
+        if ends:
+            return ends[-1]
+        space = stream.buffer.rfind(" ", 0, limit)
+        return space if space > 0 else limit
+
+    def _take(self, stream, cut):
+        head, rest = stream.buffer[:cut], stream.buffer[cut:]
+        stripped = len(rest) - len(rest.lstrip(_LEADING))
+        shift = cut + stripped
+        stream.buffer = rest[stripped:]
+        stream.sentence_ends = [e - shift for e in stream.sentence_ends if e > shift]
+        stream.clause_ends = [e - shift for e in stream.clause_ends if e > shift]
+        stream.scanned = max(0, stream.scanned - shift)
+        stream.clause_scanned = max(0, stream.clause_scanned - shift)
+        stream.segments += 1
+        stream.target = min(self.target_length, max(stream.target, len(head)) * self.growth)
+        return head.lstrip(_LEADING).strip()
@@ -1,9 +1,21 @@
-"""WebSocket publisher node skeleton."""
+"""WebSocket egress for the hybrid dataflow.
+
+Maps graph outputs to the client protocol of ``server/ws_messages.py`` and
+queues them on the sockets owned by ``WebSocketServerNode``. Each message is
+encoded once, however many sockets a session has. Outputs whose metadata
+carries no ``session_id`` go to every session.
+"""
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from nodes.io.ws_server import WebSocketServerNode
+
+# Outputs a slow client may lose; newer ones supersede them
+_DROPPABLE_TYPES = ("asr.partial",)
 
 
 @dataclass
@@ -13,13 +25,62 @@ class WebSocketPublisherConfig:
     url: str = "ws://localhost:8000/ws"
 
 
+def _text(value: Any) -> str:
+    values = value.to_pylist() if hasattr(value, "to_pylist") else [value]
+    return "".join(str(item) for item in values if item is not None)
+
+
+def _pcm_f32(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    samples = value.to_numpy(zero_copy_only=False)
+    return samples.astype("<f4", copy=False).tobytes()
+
+
 class WebSocketPublisherNode:
     """Send structured events to connected WebSocket clients."""
 
-    def __init__(self, config: WebSocketPublisherConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: WebSocketPublisherConfig | None = None,
+        server: Optional[WebSocketServerNode] = None,
+    ) -> None:
         self.config = config or WebSocketPublisherConfig()
+        self.server = server or WebSocketServerNode()
+        self._tts_seq: Dict[Optional[str], int] = {}
 
     async def send(self, message: Dict[str, Any]) -> None:
         """Serialize and send the given payload."""
 
-        raise NotImplementedError("WebSocketPublisherNode.send requires implementation")
+        payload = dict(message)
+        session_id = payload.pop("session_id", None)
+        droppable = payload.get("type") in _DROPPABLE_TYPES
+        self.server.send(session_id, json.dumps(payload, ensure_ascii=False), droppable)
+
+    def publish(self, input_id: str, value: Any, metadata: Dict[str, Any]) -> int:
+        """Forward one graph output; returns the number of sockets it reached."""
+
+        session_id = metadata.get("session_id") or None
+        if input_id == "tts_audio":
+            pcm = _pcm_f32(value)
+            end = bool(metadata.get("end")) or not pcm
+            seq = self._tts_seq.get(session_id, 0)
+            if not end:
+                seq = self._tts_seq[session_id] = seq + 1
+            else:
+                self._tts_seq.pop(session_id, None)
+            return self.server.send_audio(session_id, seq, pcm, end)
+
+        text = _text(value)
+        if input_id == "asr_partial":
+            message = {"type": "asr.partial", "text": text}
+        elif input_id == "asr_final":
+            message = {"type": "asr.final", "text": text}
+        elif input_id == "answer_text":
+            message = {"type": "tutor.answer.text", "text": text}
+        elif input_id == "slide_cmd":
+            message = {"type": "slide.goto", "section_id": text}
+        else:
+            return 0
+        droppable = message["type"] in _DROPPABLE_TYPES
+        return self.server.send(session_id, json.dumps(message, ensure_ascii=False), droppable)
@@ -1,9 +1,52 @@
-"""WebSocket ingress node stub for Dora integration."""
+"""WebSocket ingress and egress for the hybrid dataflow.
+
+One asyncio process terminates every client socket. ``WebSocketServerNode``
+accepts connections on ``/ws/<session_id>`` and publishes what clients send
+into the graph. ``WebSocketPublisherNode`` (``ws_publisher.py``) fans graph
+outputs back out to the sockets of each session through the same session
+table. ``main`` runs both as the ``ws`` node of ``core/dataflow-hybrid.yml``.
+
+Client audio uses the binary framing of ``server/audio_frames.py`` (8-byte
+header, then PCM). The PCM is handed to Dora as an Arrow array over the
+received bytes, with no copy and no per-sample Python objects. Each socket
+has its own bounded write buffer. A slow client loses audio chunks and
+partial transcripts first, and never holds up the other clients.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import contextlib
+import json
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple, Union
+
+LOGGER = logging.getLogger(__name__)
+
+# Same wire format as server/audio_frames.py
+AUDIO_SUBPROTOCOL = "airos.audio.v1"
+_FRAME_HEADER = struct.Struct("!BBHI")
+FRAME_USER_AUDIO_CHUNK = 1
+FRAME_USER_AUDIO_END = 2
+FRAME_TTS_AUDIO_CHUNK = 3
+FRAME_TTS_AUDIO_END = 4
+FORMAT_PCM_S16LE = 1
+FORMAT_PCM_F32LE = 2
+
+# How long the Dora thread blocks in node.next() before flushing outputs
+POLL_INTERVAL = 0.005
+
+Payload = Union[str, bytes]
+Emit = Callable[[str, Any, Dict[str, Any]], None]
 
 
 @dataclass
@@ -13,27 +56,323 @@ class WebSocketServerConfig:
     host: str = "0.0.0.0"
     port: int = 8765
     path: str = "/ws"
+    sample_rate: int = 16000
+    # Unsent bytes a socket may hold before droppable messages are discarded
+    max_buffer_bytes: int = 1 << 20
+
+    @classmethod
+    def from_env(cls) -> "WebSocketServerConfig":
+        return cls(
+            host=os.getenv("WS_HOST", "0.0.0.0"),
+            port=int(os.getenv("WS_PORT", "8765")),
+            path=os.getenv("WS_PATH", "/ws"),
+            sample_rate=int(os.getenv("WS_SAMPLE_RATE", "16000")),
+            max_buffer_bytes=int(os.getenv("WS_MAX_BUFFER_BYTES", str(1 << 20))),
+        )
+
+
+class ClientSocket:
+    """One client connection and its write buffer.
+
+    ``enqueue`` never blocks. Past ``max_bytes`` the oldest droppable
+    payload is evicted, or an incoming droppable payload is discarded.
+    Other payloads are always accepted.
+    """
+
+    def __init__(self, websocket: Any, session_id: str, binary: bool, max_bytes: int) -> None:
+        self.websocket = websocket
+        self.session_id = session_id
+        self.binary = binary
+        self.max_bytes = max_bytes
+        self._buffer: Deque[Tuple[Payload, bool]] = deque()
+        self._buffered_bytes = 0
+        self._ready = asyncio.Event()
+        # Set once the write loop has ended; nothing is buffered after that
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._buffered_bytes
+
+    def enqueue(self, payload: Payload, droppable: bool = False) -> bool:
+        if self.closed:
+            return False
+        size = len(payload)
+        while self._buffered_bytes + size > self.max_bytes:
+            if not self._evict_droppable():
+                if droppable:
+                    self.dropped += 1
+                    return False
+                break
+        self._buffer.append((payload, droppable))
+        self._buffered_bytes += size
+        self._ready.set()
+        return True
+
+    async def write_loop(self) -> None:
+        try:
+            while True:
+                while not self._buffer:
+                    self._ready.clear()
+                    await self._ready.wait()
+                payload, _ = self._buffer.popleft()
+                self._buffered_bytes -= len(payload)
+                await self.websocket.send(payload)
+                self.sent += 1
+        finally:
+            self.closed = True
+            self._buffer.clear()
+            self._buffered_bytes = 0
+
+    def _evict_droppable(self) -> bool:
+        for index, (payload, droppable) in enumerate(self._buffer):
+            if droppable:
+                del self._buffer[index]
+                self._buffered_bytes -= len(payload)
+                self.dropped += 1
+                return True
+        return False
 
 
 class WebSocketServerNode:
-    """Skeleton implementation for the Dora WebSocket ingress node."""
+    """Terminate client sockets and publish their input into the graph.
 
-    def __init__(self, config: WebSocketServerConfig | None = None) -> None:
+    ``emit(output_id, arrow_array, metadata)`` delivers outputs; ``main``
+    wires it to the Dora node, tests to whatever sink they need.
+    """
+
+    def __init__(self, config: WebSocketServerConfig | None = None, emit: Optional[Emit] = None) -> None:
         self.config = config or WebSocketServerConfig()
+        self.emit = emit or (lambda output_id, value, metadata: None)
+        self.sessions: Dict[str, Set[ClientSocket]] = {}
+        self._server: Any = None
+
+    async def start(self) -> None:
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(
+            self._handle,
+            self.config.host,
+            self.config.port,
+            select_subprotocol=_select_subprotocol,
+            max_size=None,
+            compression=None,
+        )
+        LOGGER.info("WebSocket ingress listening on %s:%d%s", self.config.host, self.config.port, self.config.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
 
-    async def run(self) -> None:  # pragma: no cover - placeholder method
+    async def run(self) -> None:  # pragma: no cover - runs until cancelled
         """Start accepting client connections and emit Dora events."""
 
-        raise NotImplementedError(
-            "WebSocketServerNode.run must be implemented to bridge Dora inputs."
+        await self.start()
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    async def publish_audio(self, frame: Union[bytes, memoryview], session_id: str = "", seq: int = 0) -> None:
+        """Publish raw PCM (s16le) into the Dora graph without copying it."""
+
+        import pyarrow as pa
+
+        samples = pa.Array.from_buffers(pa.int16(), len(frame) // 2, [None, pa.py_buffer(frame)])
+        self.emit(
+            "audio_in",
+            samples,
+            {"session_id": session_id, "seq": seq, "sample_rate": self.config.sample_rate},
         )
 
-    async def publish_audio(self, frame: bytes) -> None:
-        """Publish raw PCM audio into the Dora graph."""
+    async def publish_audio_end(self, session_id: str = "", seq: int = 0) -> None:
+        """Publish the end of a user utterance; it is never text input."""
+
+        import pyarrow as pa
 
-        raise NotImplementedError
+        self.emit("audio_end", pa.array([seq], type=pa.uint32()), {"session_id": session_id, "seq": seq})
 
     async def publish_text(self, message: Dict[str, Any]) -> None:
         """Publish text/control payloads into the Dora graph."""
 
-        raise NotImplementedError
+        import pyarrow as pa
+
+        text = message.get("text") if message.get("type") != "user.control" else message.get("action")
+        if not text:
+            return
+        metadata = {"session_id": message.get("session_id", ""), "type": message.get("type", "")}
+        self.emit("text_in", pa.array([text]), metadata)
+
+    def send(self, session_id: Optional[str], payload: Payload, droppable: bool = False) -> int:
+        """Queue ``payload`` on every socket of a session (all sockets if None)."""
+
+        targets = self._targets(session_id)
+        for client in targets:
+            client.enqueue(payload, droppable)
+        return len(targets)
+
+    def send_audio(self, session_id: Optional[str], seq: int, pcm: Union[bytes, memoryview], end: bool = False) -> int:
+        """Queue f32 TTS audio, encoded once per wire format in use."""
+
+        targets = self._targets(session_id)
+        encoded: Dict[bool, Payload] = {}
+        for client in targets:
+            payload = encoded.get(client.binary)
+            if payload is None:
+                payload = encoded[client.binary] = _encode_tts(seq, pcm, end, client.binary)
+            client.enqueue(payload, droppable=not end)
+        return len(targets)
+
+    def stats(self) -> Dict[str, int]:
+        clients = [client for clients in self.sessions.values() for client in clients]
+        return {
+            "sessions": len(self.sessions),
+            "clients": len(clients),
+            "sent": sum(client.sent for client in clients),
+            "dropped": sum(client.dropped for client in clients),
+            "buffered_bytes": sum(client.buffered_bytes for client in clients),
+        }
+
+    def _targets(self, session_id: Optional[str]) -> list:
+        if session_id is None:
+            return [client for clients in self.sessions.values() for client in clients]
+        return list(self.sessions.get(session_id, ()))
+
+    async def _handle(self, websocket: Any) -> None:
+        path = websocket.request.path.split("?", 1)[0].rstrip("/")
+        prefix = self.config.path.rstrip("/") + "/"
+        if not path.startswith(prefix) or len(path) == len(prefix):
+            await websocket.close(code=4404, reason="expected /ws/<session_id>")
+            return
+        session_id = path[len(prefix):]
+        binary = websocket.subprotocol == AUDIO_SUBPROTOCOL
+        client = ClientSocket(websocket, session_id, binary, self.config.max_buffer_bytes)
+        self.sessions.setdefault(session_id, set()).add(client)
+        writer = asyncio.create_task(client.write_loop())
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    await self._on_binary(session_id, message)
+                else:
+                    await self._on_text(session_id, message)
+        except Exception as exc:  # connection errors end this client only
+            LOGGER.debug("Client on %s closed: %s", session_id, exc)
+        finally:
+            try:
+                writer.cancel()
+                # The writer may already have died on ConnectionClosed
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await writer
+            finally:
+                clients = self.sessions.get(session_id)
+                if clients is not None:
+                    clients.discard(client)
+                    if not clients:
+                        del self.sessions[session_id]
+
+    async def _on_binary(self, session_id: str, data: bytes) -> None:
+        if len(data) < _FRAME_HEADER.size:
+            return
+        frame_type, sample_format, _, seq = _FRAME_HEADER.unpack_from(data)
+        if frame_type == FRAME_USER_AUDIO_END:
+            await self.publish_audio_end(session_id, seq)
+        elif frame_type == FRAME_USER_AUDIO_CHUNK and sample_format == FORMAT_PCM_S16LE:
+            await self.publish_audio(memoryview(data)[_FRAME_HEADER.size:], session_id, seq)
+
+    async def _on_text(self, session_id: str, text: str) -> None:
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            LOGGER.debug("Ignoring non-object message on %s", session_id)
+            return
+        message["session_id"] = session_id
+        kind = message.get("type")
+        # A malformed message is dropped; it must not close the connection
+        try:
+            if kind == "user.audio.chunk":
+                pcm = base64.b64decode(message.get("base64", ""), validate=True)
+                await self.publish_audio(pcm, session_id, int(message.get("seq", 0)))
+            elif kind == "user.audio.end":
+                await self.publish_audio_end(session_id, int(message.get("seq", 0)))
+            elif kind in ("user.question.text", "user.control"):
+                await self.publish_text(message)
+        except (TypeError, ValueError) as exc:  # binascii.Error is a ValueError
+            LOGGER.debug("Ignoring malformed %s on %s: %s", kind, session_id, exc)
+
+
+def _select_subprotocol(connection: Any, subprotocols: Any) -> Optional[str]:
+    """Binary framing if the client offers it, plain JSON otherwise."""
+
+    return AUDIO_SUBPROTOCOL if AUDIO_SUBPROTOCOL in subprotocols else None
+
+
+def _encode_tts(seq: int, pcm: Union[bytes, memoryview], end: bool, binary: bool) -> Payload:
+    if binary:
+        frame_type = FRAME_TTS_AUDIO_END if end else FRAME_TTS_AUDIO_CHUNK
+        return _FRAME_HEADER.pack(frame_type, FORMAT_PCM_F32LE, 0, seq) + (b"" if end else bytes(pcm))
+    if end:
+        return f'{{"type":"tts.audio.end","seq":{seq}}}'
+    return f'{{"type":"tts.audio.chunk","seq":{seq},"base64":"{base64.b64encode(pcm).decode("ascii")}"}}'
+
+
+def main() -> None:  # pragma: no cover - needs a running dataflow
+    """Run ingress and egress as one Dora node.
+
+    The Dora ``Node`` is used only from a polling thread. Graph inputs are
+    handed to the event loop, and outputs from the loop are queued and sent
+    between polls.
+    """
+
+    if __package__ in (None, ""):
+        sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from dora import Node
+    import pyarrow as pa
+
+    from nodes.io.ws_publisher import WebSocketPublisherNode
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    outputs: "queue.Queue[Tuple[str, Any, Dict[str, Any]]]" = queue.Queue()
+    loop = asyncio.new_event_loop()
+    server = WebSocketServerNode(
+        WebSocketServerConfig.from_env(),
+        emit=lambda output_id, value, metadata: outputs.put((output_id, value, metadata)),
+    )
+    publisher = WebSocketPublisherNode(server=server)
+    stopped = threading.Event()
+
+    def poll() -> None:
+        node = Node()
+        while not stopped.is_set():
+            while True:
+                try:
+                    output_id, value, metadata = outputs.get_nowait()
+                except queue.Empty:
+                    break
+                node.send_output(output_id, value if isinstance(value, pa.Array) else pa.array(value), metadata)
+            event = node.next(timeout=POLL_INTERVAL)
+            if event is None:
+                continue
+            if event["type"] == "STOP":
+                break
+            if event["type"] == "INPUT":
+                loop.call_soon_threadsafe(
+                    publisher.publish, event["id"], event["value"], dict(event.get("metadata") or {})
+                )
+        loop.call_soon_threadsafe(loop.stop)
+
+    threading.Thread(target=poll, name="dora-ws", daemon=True).start()
+    loop.run_until_complete(server.start())
+    try:
+        loop.run_forever()
+    finally:
+        stopped.set()
+        loop.run_until_complete(server.stop())
+
+
+if __name__ == "__main__":
+    main()
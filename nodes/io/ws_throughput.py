@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Throughput test for the ``ws`` node.
+
+Starts ``WebSocketServerNode`` in-process with a counting sink in place of
+the Dora node, then connects hundreds of simulated clients. Each client
+streams 20 ms s16le frames in real time, over the binary protocol or, for
+``--json-clients`` of them, as base64 ``user.audio.chunk`` messages without
+a subprotocol. Meanwhile
+a ``WebSocketPublisherNode`` sends every session a timestamped
+``tutor.answer.text`` and a TTS chunk at a fixed rate, the way graph outputs
+would arrive. The report covers ingress frames/s, egress messages/s,
+delivery latency of the answer text, TTS chunks received per wire format
+and messages dropped from the write buffers:
+
+    python -m nodes.io.ws_throughput --clients 300 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from nodes.io.ws_publisher import WebSocketPublisherNode  # noqa: E402
+from nodes.io.ws_server import (  # noqa: E402
+    AUDIO_SUBPROTOCOL,
+    FORMAT_PCM_S16LE,
+    FRAME_USER_AUDIO_CHUNK,
+    WebSocketServerConfig,
+    WebSocketServerNode,
+)
+
+FRAME_SECONDS = 0.02
+_HEADER = struct.Struct("!BBHI")
+
+
+class CountingSink:
+    """Stands in for the Dora node: counts what the server emits."""
+
+    def __init__(self) -> None:
+        self.audio_frames = 0
+        self.audio_bytes = 0
+        self.text_events = 0
+
+    def __call__(self, output_id: str, value: Any, metadata: Dict[str, Any]) -> None:
+        if output_id == "audio_in":
+            self.audio_frames += 1
+            self.audio_bytes += value.buffers()[1].size
+        else:
+            self.text_events += 1
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99)}
+
+
+async def run_client(
+    url: str, duration: float, frame_bytes: int, latencies: List[float], counts: Dict[str, int], binary: bool = True
+) -> None:
+    from websockets.asyncio.client import connect
+
+    subprotocols = [AUDIO_SUBPROTOCOL] if binary else None
+    async with connect(url, subprotocols=subprotocols, max_size=None, compression=None) as websocket:
+
+        async def receive() -> None:
+            async for message in websocket:
+                counts["received"] += 1
+                if isinstance(message, bytes):
+                    counts["tts_binary"] += 1
+                    continue
+                payload = json.loads(message)
+                if payload.get("type") == "tutor.answer.text":
+                    latencies.append(time.perf_counter() - float(payload["text"]))
+                elif payload.get("type") == "tts.audio.chunk":
+                    counts["tts_json"] += 1
+
+        receiver = asyncio.create_task(receive())
+        pcm = bytes(frame_bytes)
+        chunk = json.dumps({"type": "user.audio.chunk", "seq": 0, "base64": base64.b64encode(pcm).decode("ascii")})
+        start = time.perf_counter()
+        seq = 0
+        while time.perf_counter() - start < duration:
+            seq += 1
+            if binary:
+                await websocket.send(_HEADER.pack(FRAME_USER_AUDIO_CHUNK, FORMAT_PCM_S16LE, 0, seq) + pcm)
+            else:
+                await websocket.send(chunk)
+            counts["sent"] += 1
+            await asyncio.sleep(max(0.0, start + seq * FRAME_SECONDS - time.perf_counter()))
+        await asyncio.sleep(0.5)
+        receiver.cancel()
+
+
+async def publish_loop(publisher: WebSocketPublisherNode, duration: float, interval: float, tts_samples: int) -> int:
+    import numpy as np
+
+    pcm = np.zeros(tts_samples, dtype="<f4").tobytes()
+    sessions = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for session_id in list(publisher.server.sessions):
+            publisher.publish("answer_text", repr(time.perf_counter()), {"session_id": session_id})
+            publisher.publish("tts_audio", pcm, {"session_id": session_id})
+            sessions += 1
+        await asyncio.sleep(interval)
+    return sessions
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    sink = CountingSink()
+    config = WebSocketServerConfig(host="127.0.0.1", port=args.port, max_buffer_bytes=args.max_buffer_bytes)
+    server = WebSocketServerNode(config, emit=sink)
+    publisher = WebSocketPublisherNode(server=server)
+    await server.start()
+
+    latencies: List[float] = []
+    counts = {"sent": 0, "received": 0, "tts_binary": 0, "tts_json": 0}
+    frame_bytes = int(config.sample_rate * FRAME_SECONDS) * 2
+    url = f"ws://127.0.0.1:{args.port}{config.path}"
+    started = time.perf_counter()
+    clients = [
+        asyncio.create_task(
+            run_client(f"{url}/s{index}", args.duration, frame_bytes, latencies, counts, binary=index >= args.json_clients)
+        )
+        for index in range(args.clients)
+    ]
+    await asyncio.sleep(0.5)
+    publisher_task = asyncio.create_task(
+        publish_loop(publisher, args.duration - 0.5, args.publish_interval, int(args.tts_sample_rate * args.publish_interval))
+    )
+    dropped_before_close = 0
+    while not publisher_task.done():
+        dropped_before_close = server.stats()["dropped"]
+        await asyncio.sleep(0.25)
+    results = await asyncio.gather(*clients, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    await server.stop()
+
+    errors = [repr(result) for result in results if isinstance(result, Exception)]
+    return {
+        "clients": args.clients,
+        "json_clients": min(args.json_clients, args.clients),
+        "duration_s": round(elapsed, 2),
+        "ingress": {
+            "frames_sent": counts["sent"],
+            "frames_emitted": sink.audio_frames,
+            "frames_per_s": round(sink.audio_frames / elapsed, 1),
+            "mb_per_s": round(sink.audio_bytes / elapsed / 1e6, 2),
+        },
+        "egress": {
+            "messages_received": counts["received"],
+            "messages_per_s": round(counts["received"] / elapsed, 1),
+            "tts_chunks_binary": counts["tts_binary"],
+            "tts_chunks_json": counts["tts_json"],
+            "dropped": dropped_before_close,
+            "answer_latency": percentiles(latencies),
+        },
+        "errors": errors[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput test for the WebSocket ingress/egress node")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json-clients", type=int, default=20, help="Clients using the JSON wire format")
+    parser.add_argument("--publish-interval", type=float, default=0.1, help="Seconds between outputs per session")
+    parser.add_argument("--tts-sample-rate", type=int, default=32000)
+    parser.add_argument("--max-buffer-bytes", type=int, default=1 << 20)
+    parser.add_argument("--output", type=str, default="", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
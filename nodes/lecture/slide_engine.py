@@ -1,9 +1,30 @@
-"""Slide engine node skeleton."""
+"""Slide navigation for lecture sessions.
+
+``NavigationGraph`` is built once per lecture. Every slide, main sections
+then branch slides, gets an integer position. next/prev/exit targets and
+branch entries are stored in flat arrays, so each navigation step is one
+lookup. A session's cursor is just a position into that graph.
+
+After each move the engine hands the narration of the slides the student
+can reach next to a ``prefetch`` callback, typically the TTS node's cache.
+Their audio is then ready before "next" or a branch is requested.
+"""
 
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from server.models import Lecture
+
+# Marks "no target" in the navigation arrays
+NONE = -1
+
+# Called with (slide id, narration text) for slides worth synthesizing early
+Prefetch = Callable[[str, str], None]
 
 
 @dataclass
@@ -14,25 +35,204 @@ class SlideCommand:
     section_id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class SlideEngineState:
     """Track the current position within the lecture."""
 
     current_section: str
+    # Index into the lecture's NavigationGraph
+    position: int = 0
+    lecture_id: Optional[str] = None
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.parts: List[str] = []
+
+    def handle_data(self, data: str) -> None:
+        self.parts.append(data)
+
+
+def _narration_text(slide) -> str:
+    """Text spoken for a slide, by the rule of server/narration.py.
+
+    Kept local because the ``server`` package imports FastAPI on load.
+    """
+
+    if slide.narration:
+        return slide.narration
+    extractor = _TextExtractor()
+    extractor.feed(slide.html)
+    lines = (line.strip() for line in "".join(extractor.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class NavigationGraph:
+    """Indexed next/prev/branch structure of one lecture.
+
+    Positions ``0 .. len(sections) - 1`` are the main sections in order;
+    branch slides follow. In a branch, "next" after the last slide continues
+    with the section after the one the branch started from, "prev" before
+    the first slide and "exit" return to that section.
+    """
+
+    def __init__(self, lecture: "Lecture") -> None:
+        slides = list(lecture.sections)
+        main_count = len(slides)
+        self.lecture_id = lecture.id
+        self.ids: List[str] = [section.id for section in lecture.sections]
+        self.position: Dict[str, int] = {section_id: index for index, section_id in enumerate(self.ids)}
+        self.next = array("i", [index + 1 for index in range(main_count - 1)] + [NONE] * bool(main_count))
+        self.prev = array("i", [NONE] + list(range(main_count - 1)) if main_count else [])
+        self.exit = array("i", [NONE] * main_count)
+        self.branch_entry: Dict[str, int] = {}
+        # Branch entries reachable from each main section
+        self.branches_from: Dict[int, List[int]] = {}
+
+        for branch in lecture.branches:
+            origin = self.position.get(branch.from_section)
+            if origin is None or not branch.slides:
+                continue
+            first = len(self.ids)
+            for offset, slide in enumerate(branch.slides):
+                position = first + offset
+                self.ids.append(slide.id)
+                self.position.setdefault(slide.id, position)
+                slides.append(slide)
+                last = offset == len(branch.slides) - 1
+                after = self.next[origin] if self.next[origin] != NONE else origin
+                self.next.append(after if last else position + 1)
+                self.prev.append(origin if offset == 0 else position - 1)
+                self.exit.append(origin)
+            self.branch_entry[branch.id] = first
+            self.branches_from.setdefault(origin, []).append(first)
+
+        self._slides = slides
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def narration(self, position: int) -> str:
+        return _narration_text(self._slides[position])
+
+    def reachable(self, position: int, depth: int) -> List[int]:
+        """Positions within ``depth`` "next" steps, plus branch entries along the way."""
+
+        found: List[int] = []
+        current = position
+        for _ in range(depth):
+            for entry in self.branches_from.get(current, ()):
+                found.append(entry)
+            current = self.next[current]
+            if current == NONE:
+                break
+            found.append(current)
+        return found
 
 
 class SlideEngineNode:
-    """Handle navigation events and tutor-initiated branching."""
+    """Handle navigation events and tutor-initiated branching.
 
-    def __init__(self, initial_section: str = "intro") -> None:
+    Graphs are shared by every session on the same lecture. A session only
+    owns a ``SlideEngineState``. Calls without a ``session_id`` act on
+    ``self.state``.
+    """
+
+    def __init__(
+        self,
+        initial_section: str = "intro",
+        lecture: Optional["Lecture"] = None,
+        prefetch: Optional[Prefetch] = None,
+        prefetch_depth: int = 2,
+    ) -> None:
         self.state = SlideEngineState(current_section=initial_section)
+        self.graphs: Dict[str, NavigationGraph] = {}
+        self.sessions: Dict[str, SlideEngineState] = {}
+        self.prefetch = prefetch
+        self.prefetch_depth = prefetch_depth
+        self._prefetched: Set[Tuple[str, int]] = set()
+        if lecture is not None:
+            self.load_lecture(lecture)
+
+    def load_lecture(self, lecture: "Lecture") -> NavigationGraph:
+        """(Re)build the navigation graph of ``lecture``.
 
-    def handle_control(self, action: str) -> Optional[SlideCommand]:
+        The first lecture loaded also becomes the one ``self.state`` walks.
+        Cursors already on the lecture keep their section, or go back to
+        the first one if it was removed.
+        """
+
+        graph = self.graphs[lecture.id] = NavigationGraph(lecture)
+        self._prefetched = {key for key in self._prefetched if key[0] != lecture.id}
+        for state in self.sessions.values():
+            if state.lecture_id == lecture.id:
+                state.position = graph.position.get(state.current_section, 0)
+                state.current_section = graph.ids[state.position]
+        if self.state.lecture_id is None or self.state.lecture_id == lecture.id:
+            self.state.lecture_id = lecture.id
+            self._move(self.state, graph.position.get(self.state.current_section, 0))
+        return graph
+
+    def open_session(self, session_id: str, lecture_id: str, section_id: Optional[str] = None) -> SlideCommand:
+        """Start a cursor for ``session_id``; raises KeyError for unknown lectures."""
+
+        graph = self.graphs[lecture_id]
+        position = graph.position.get(section_id, 0) if section_id else 0
+        state = self.sessions[session_id] = SlideEngineState(graph.ids[position], position, lecture_id)
+        return self._move(state, position)
+
+    def close_session(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+
+    def handle_control(self, action: str, session_id: Optional[str] = None) -> Optional[SlideCommand]:
         """Apply a control action and emit a slide command if needed."""
 
-        raise NotImplementedError("SlideEngineNode.handle_control requires implementation")
+        state = self._state(session_id)
+        graph = self._graph(state)
+        position = state.position
+        if action == "next":
+            target = graph.next[position]
+        elif action == "prev":
+            target = graph.prev[position]
+        elif action in ("exit", "back"):
+            target = graph.exit[position]
+        elif action.startswith("goto:"):
+            target = graph.position.get(action[5:], NONE)
+        else:
+            return None
+        if target == NONE:
+            return None
+        return self._move(state, target)
 
-    def handle_branch(self, branch_id: str) -> Optional[SlideCommand]:
+    def handle_branch(self, branch_id: str, session_id: Optional[str] = None) -> Optional[SlideCommand]:
         """Return a slide command directing the client to a branch."""
 
-        raise NotImplementedError("SlideEngineNode.handle_branch requires implementation")
+        state = self._state(session_id)
+        target = self._graph(state).branch_entry.get(branch_id, NONE)
+        if target == NONE:
+            return None
+        return self._move(state, target)
+
+    def _move(self, state: SlideEngineState, position: int) -> SlideCommand:
+        graph = self._graph(state)
+        state.position = position
+        state.current_section = graph.ids[position]
+        if self.prefetch is not None:
+            for target in graph.reachable(position, self.prefetch_depth):
+                key = (graph.lecture_id, target)
+                if key not in self._prefetched:
+                    self._prefetched.add(key)
+                    self.prefetch(graph.ids[target], graph.narration(target))
+        return SlideCommand(type="slide.goto", section_id=state.current_section)
+
+    def _state(self, session_id: Optional[str]) -> SlideEngineState:
+        if session_id is None:
+            return self.state
+        return self.sessions[session_id]
+
+    def _graph(self, state: SlideEngineState) -> NavigationGraph:
+        graph = self.graphs.get(state.lecture_id) if state.lecture_id is not None else None
+        if graph is None:
+            raise RuntimeError("SlideEngineNode has no lecture loaded")
+        return graph
@@ -1,9 +1,35 @@
-"""Local memory node skeleton."""
+"""Local vector memory for tutor context.
+
+Snippets are embedded into one contiguous float32 matrix, one row per entry.
+With a ``path`` the matrix is a ``numpy.memmap`` next to an append-only
+metadata log, so the store survives restarts. Small stores are searched
+exactly with a single matrix product. Above ``ann_threshold`` live entries
+an IVF index (k-means centroids plus one inverted list per centroid) limits
+each query to the rows of its ``nprobe`` nearest clusters. Entries with a
+``ttl_seconds`` expire through a heap checked on every read and write.
+"""
 
 from __future__ import annotations
 
+import heapq
+import json
+import re
+import threading
+import time
+import zlib
 from dataclasses import dataclass
-from typing import List
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+VECTORS_FILE = "vectors.f32"
+ENTRIES_FILE = "entries.jsonl"
+META_FILE = "meta.json"
+
+_WORD = re.compile(r"[a-z0-9]+")
 
 
 @dataclass
@@ -23,15 +49,429 @@ class MemoryEntry:
     ttl_seconds: int | None = None
 
 
+@dataclass
+class MemoryHit:
+    """One search result with its cosine similarity."""
+
+    key: str
+    value: str
+    score: float
+
+
+@dataclass
+class LocalMemoryConfig:
+    """Configuration for the local memory store."""
+
+    # Directory for the memory-mapped matrix and metadata; None keeps it in RAM
+    path: Optional[str] = None
+    dim: int = 256
+    initial_capacity: int = 1024
+    # Live entries above which queries go through the IVF index
+    ann_threshold: int = 50_000
+    # Clusters probed per query
+    nprobe: int = 8
+    kmeans_iterations: int = 8
+
+
+class HashingEmbedder:
+    """Dependency-free embedding from hashed character and word n-grams.
+
+    Good enough for matching a question against lecture snippets that share
+    its wording, in Chinese or English. Pass a model-backed embedder to
+    ``LocalMemoryNode`` for semantic recall.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 256, ngrams: Tuple[int, ...] = (1, 2, 3)) -> None:
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = text.lower()
+            chars = "".join(text.split())
+            features = [chars[i:i + n] for n in self.ngrams for i in range(len(chars) - n + 1)]
+            features.extend(_WORD.findall(text))
+            for feature in features:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vectors[row, digest % self.dim] += sign
+        return _normalize(vectors)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+class _IVFIndex:
+    """Inverted-file index over rows of the memory matrix."""
+
+    # Rows assigned per block, to bound the (rows x clusters) score matrix
+    BLOCK_ROWS = 65536
+
+    def __init__(self, centroids: np.ndarray) -> None:
+        self.centroids = centroids
+        self.lists: List[List[int]] = [[] for _ in range(len(centroids))]
+        # Rows the centroids were trained for, and rows added or removed since
+        self.trained_rows = 0
+        self.added = 0
+        self.removed = 0
+
+    @classmethod
+    def build(
+        cls, vectors: np.ndarray, rows: np.ndarray, iterations: int, rng: np.random.Generator
+    ) -> "_IVFIndex":
+        clusters = max(int(np.sqrt(len(rows))), 1)
+        # Train on a sample; assignment below covers every row
+        sample = rows if len(rows) <= 64 * clusters else rng.choice(rows, 64 * clusters, replace=False)
+        data = vectors[sample]
+        centroids = data[rng.choice(len(data), clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            counts = np.bincount(assignment, minlength=clusters)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            filled = counts > 0
+            sums = centroids.copy()
+            sums[filled] = np.add.reduceat(data[np.argsort(assignment, kind="stable")], starts[filled], axis=0)
+            centroids = _normalize(sums)
+
+        index = cls(centroids)
+        for start in range(0, len(rows), cls.BLOCK_ROWS):
+            block = rows[start:start + cls.BLOCK_ROWS]
+            for row, cluster in zip(block.tolist(), np.argmax(vectors[block] @ centroids.T, axis=1).tolist()):
+                index.lists[cluster].append(row)
+        index.trained_rows = len(rows)
+        return index
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        self.lists[int(np.argmax(self.centroids @ vector))].append(row)
+        self.added += 1
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the ``nprobe`` clusters nearest to ``query``.
+
+        Rewritten or reused rows may sit in several lists until the next
+        rebuild, so the result is deduplicated; callers filter dead rows.
+        """
+
+        probe = _top_k(self.centroids @ query, min(nprobe, len(self.centroids)))
+        lists = [self.lists[cluster] for cluster in probe.tolist() if self.lists[cluster]]
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([np.asarray(rows, dtype=np.int64) for rows in lists])
+        return np.unique(rows) if self.added else rows
+
+
 class LocalMemoryNode:
-    """Minimal interface for a vector-backed memory component."""
+    """Vector-backed memory of snippets the tutor can cite as context.
 
-    def query(self, request: MemoryQuery) -> List[str]:
-        """Return top-k snippets for the provided query."""
+    Writing an existing key replaces its snippet in place. Rows of deleted
+    or expired entries are reused by later writes.
+    """
+
+    def __init__(
+        self,
+        config: LocalMemoryConfig | None = None,
+        embedder: Optional[Embedder] = None,
+    ) -> None:
+        self.config = config or LocalMemoryConfig()
+        self.embedder = embedder or HashingEmbedder(self.config.dim)
+        self._lock = threading.RLock()
+        self._rng = np.random.default_rng(0)
+        self._keys: List[Optional[str]] = []
+        self._values: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        # (expires_at, row, generation); stale when the row was rewritten since
+        self._expiry: List[Tuple[float, int, int]] = []
+        self._generation: List[int] = []
+        self._expires_at: List[Optional[float]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors = np.zeros((0, self.config.dim), dtype=np.float32)
+        self._ivf: Optional[_IVFIndex] = None
+        self._log = None
+
+        self._dir = Path(self.config.path) if self.config.path else None
+        if self._dir is not None:
+            self._open()
+        else:
+            self._grow(self.config.initial_capacity)
 
-        raise NotImplementedError("LocalMemoryNode.query requires implementation")
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.time())
+            return len(self._rows)
 
     def write(self, entry: MemoryEntry) -> None:
         """Persist a new snippet into the memory store."""
 
-        raise NotImplementedError("LocalMemoryNode.write requires implementation")
+        self.write_batch([entry])
+
+    def write_batch(self, entries: Sequence[MemoryEntry]) -> None:
+        """Embed and store several snippets with one embedder call."""
+
+        if not entries:
+            return
+        vectors = self._embed([entry.value for entry in entries])
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            for entry, vector in zip(entries, vectors):
+                expires_at = now + entry.ttl_seconds if entry.ttl_seconds else None
+                row = self._store(entry.key, entry.value, vector, expires_at)
+                self._append_log({"row": row, "key": entry.key, "value": entry.value, "expires_at": expires_at})
+            self._flush_log()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return False
+            self._remove(row)
+            self._flush_log()
+            return True
+
+    def query(self, request: MemoryQuery) -> List[str]:
+        """Return top-k snippets for the provided query."""
+
+        return [hit.value for hit in self.search_batch([request])[0]]
+
+    def query_batch(self, requests: Sequence[MemoryQuery]) -> List[List[str]]:
+        return [[hit.value for hit in hits] for hits in self.search_batch(requests)]
+
+    def search_batch(self, requests: Sequence[MemoryQuery]) -> List[List[MemoryHit]]:
+        """Top-k hits for each query, embedding all of them at once."""
+
+        if not requests:
+            return []
+        queries = self._embed([request.text for request in requests])
+        with self._lock:
+            self._expire(time.time())
+            if not self._rows:
+                return [[] for _ in requests]
+            if self._ivf is not None:
+                return [
+                    self._search_ivf(query, request.top_k)
+                    for query, request in zip(queries, requests)
+                ]
+            return self._search_exact(queries, [request.top_k for request in requests])
+
+    def close(self) -> None:
+        """Flush the matrix and compact the metadata log."""
+
+        with self._lock:
+            if self._log is None:
+                return
+            self._vectors.flush()
+            self._log.close()
+            self._log = None
+            self._compact()
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.embedder(texts), dtype=np.float32)
+        if vectors.shape != (len(texts), self.config.dim):
+            raise ValueError(
+                f"Embedder returned shape {vectors.shape}, expected ({len(texts)}, {self.config.dim})"
+            )
+        return _normalize(vectors)
+
+    def _search_exact(self, queries: np.ndarray, top_ks: List[int]) -> List[List[MemoryHit]]:
+        used = len(self._keys)
+        # One (rows x queries) product scores every query against every row
+        scores = self._vectors[:used] @ queries.T
+        scores[~self._alive[:used]] = -np.inf
+        results = []
+        for column, top_k in enumerate(top_ks):
+            best = _top_k(scores[:, column], min(top_k, len(self._rows)))
+            results.append(self._hits(best, scores[best, column]))
+        return results
+
+    def _search_ivf(self, query: np.ndarray, top_k: int) -> List[MemoryHit]:
+        rows = self._ivf.candidates(query, self.config.nprobe)
+        rows = rows[self._alive[rows]]
+        if len(rows) == 0:
+            return []
+        scores = self._vectors[rows] @ query
+        best = _top_k(scores, min(top_k, len(rows)))
+        return self._hits(rows[best], scores[best])
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[MemoryHit]:
+        return [
+            MemoryHit(key=self._keys[row], value=self._values[row], score=float(score))
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def _store(self, key: str, value: str, vector: np.ndarray, expires_at: Optional[float]) -> int:
+        row = self._rows.get(key)
+        if row is None:
+            row = self._free.pop() if self._free else len(self._keys)
+            if row == len(self._keys):
+                if row >= len(self._vectors):
+                    self._grow(max(len(self._vectors) * 2, self.config.initial_capacity))
+                self._keys.append(None)
+                self._values.append(None)
+                self._generation.append(0)
+                self._expires_at.append(None)
+            self._rows[key] = row
+            self._alive[row] = True
+            if self._ivf is not None:
+                self._ivf.add(row, vector)
+        elif self._ivf is not None:
+            # The vector changed, so it may belong to another cluster
+            self._ivf.add(row, vector)
+        self._keys[row] = key
+        self._values[row] = value
+        self._vectors[row] = vector
+        self._generation[row] += 1
+        self._expires_at[row] = expires_at
+        if expires_at is not None:
+            heapq.heappush(self._expiry, (expires_at, row, self._generation[row]))
+        self._maybe_rebuild_index()
+        return row
+
+    def _remove(self, row: int) -> None:
+        key = self._keys[row]
+        del self._rows[key]
+        self._alive[row] = False
+        self._keys[row] = None
+        self._values[row] = None
+        self._expires_at[row] = None
+        self._generation[row] += 1
+        self._free.append(row)
+        self._append_log({"row": row, "deleted": True})
+        if self._ivf is None:
+            return
+        if len(self._rows) < self.config.ann_threshold // 2:
+            self._ivf = None
+            return
+        # Removed rows still skew the centroids they were trained into
+        self._ivf.removed += 1
+        self._maybe_rebuild_index()
+
+    def _expire(self, now: float) -> None:
+        removed = False
+        while self._expiry and self._expiry[0][0] <= now:
+            _, row, generation = heapq.heappop(self._expiry)
+            if self._generation[row] == generation and self._alive[row]:
+                self._remove(row)
+                removed = True
+        if removed:
+            self._flush_log()
+
+    def _maybe_rebuild_index(self) -> None:
+        """Build the IVF index past the threshold and rebuild it as the store changes.
+
+        The index is rebuilt once the store has doubled, or once as many rows
+        have been added or removed as it was trained on.
+        """
+
+        live = len(self._rows)
+        if live < self.config.ann_threshold:
+            return
+        ivf = self._ivf
+        if ivf is not None and live < ivf.trained_rows * 2 and ivf.added + ivf.removed < ivf.trained_rows:
+            return
+        rows = np.flatnonzero(self._alive[:len(self._keys)])
+        self._ivf = _IVFIndex.build(self._vectors, rows, self.config.kmeans_iterations, self._rng)
+
+    def _grow(self, capacity: int) -> None:
+        """Resize the matrix (and the file behind it) to ``capacity`` rows."""
+
+        dim = self.config.dim
+        if self._dir is None:
+            vectors = np.zeros((capacity, dim), dtype=np.float32)
+            vectors[:len(self._vectors)] = self._vectors
+        else:
+            path = self._dir / VECTORS_FILE
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            with path.open("r+b" if path.exists() else "w+b") as handle:
+                handle.truncate(capacity * dim * 4)
+            vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._vectors = vectors
+        self._alive = alive
+
+    def _open(self) -> None:
+        """Attach to the on-disk store, replaying its metadata log."""
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        meta_path = self._dir / META_FILE
+        meta = {"dim": self.config.dim, "embedder": getattr(self.embedder, "name", "custom")}
+        if meta_path.exists():
+            stored = json.loads(meta_path.read_text(encoding="utf-8"))
+            if stored != meta:
+                raise ValueError(f"Memory at {self._dir} was built with {stored}, not {meta}")
+        else:
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+        vectors_path = self._dir / VECTORS_FILE
+        rows = vectors_path.stat().st_size // (self.config.dim * 4) if vectors_path.exists() else 0
+        self._grow(max(rows, self.config.initial_capacity))
+
+        entries: Dict[int, dict] = {}
+        log_path = self._dir / ENTRIES_FILE
+        if log_path.exists():
+            with log_path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        entries.pop(record["row"], None)
+                    else:
+                        entries[record["row"]] = record
+
+        used = max(entries, default=-1) + 1
+        self._keys = [None] * used
+        self._values = [None] * used
+        self._generation = [0] * used
+        self._expires_at = [None] * used
+        for row, record in entries.items():
+            self._keys[row] = record["key"]
+            self._values[row] = record["value"]
+            self._expires_at[row] = record.get("expires_at")
+            self._rows[record["key"]] = row
+            self._alive[row] = True
+            if record.get("expires_at") is not None:
+                self._expiry.append((record["expires_at"], row, 0))
+        heapq.heapify(self._expiry)
+        self._free = [row for row in range(used - 1, -1, -1) if not self._alive[row]]
+        self._compact()
+        self._log = log_path.open("a", encoding="utf-8")
+        self._maybe_rebuild_index()
+
+    def _compact(self) -> None:
+        """Rewrite the metadata log with only the live entries."""
+
+        path = self._dir / ENTRIES_FILE
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as handle:
+            for key, row in self._rows.items():
+                record = {"row": row, "key": key, "value": self._values[row], "expires_at": self._expires_at[row]}
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        tmp.replace(path)
+
+    def _append_log(self, record: dict) -> None:
+        if self._log is not None:
+            self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _flush_log(self) -> None:
+        if self._log is not None:
+            self._log.flush()
@@ -1,9 +1,50 @@
-"""Intent router node skeleton."""
+"""Two-tier intent router between ASR/text input and the tutor and slides.
+
+Tier one is an Aho-Corasick automaton over control and small-talk phrases,
+compiled once. It settles most utterances in microseconds. A short
+utterance that is mostly a control phrase ("下一页", "pause") is a control,
+and one with no phrase at all is a question. Only utterances that mix the
+two, such as "下一页的公式是什么意思", go to tier two, a small local
+classifier. Concurrent requests are batched into one model call. Neither
+tier involves an LLM, so controls are never held up by one.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import math
+import re
+from collections import Counter, deque
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Longest match wins, so "继续讲" is a resume while "下一页" alone is a next
+CONTROL_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "next": ("下一页", "下一张", "下一节", "翻页", "往后翻", "next", "next slide", "next page"),
+    "prev": ("上一页", "上一张", "上一节", "往前翻", "返回", "previous", "prev", "go back", "back"),
+    "pause": ("暂停", "停一下", "等一下", "先停", "pause", "stop", "hold on", "wait"),
+    "resume": ("继续", "接着讲", "继续讲", "resume", "continue", "go on", "go ahead"),
+}
+SMALLTALK_PHRASES: Tuple[str, ...] = (
+    "你好", "您好", "老师好", "谢谢", "谢谢老师", "好的", "明白了", "懂了",
+    "hello", "hi", "thanks", "thank you", "ok", "okay", "got it",
+)
+# Wording that makes an utterance a question even if it names a control
+QUESTION_MARKERS: Tuple[str, ...] = (
+    "?", "？", "吗", "呢", "什么", "为什么", "怎么", "如何", "哪", "是不是", "能不能",
+    "what", "why", "how", "which", "can you", "could you",
+)
+
+# Share of the utterance a phrase must cover to settle it in tier one
+RULE_COVERAGE = 0.6
+# Classifier answers below this confidence fall back to "question"
+MIN_CONFIDENCE = 0.5
+
+_PUNCTUATION = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+# Labels are "question", "smalltalk" or "control:<action>"
+IntentModel = Callable[[Sequence[str]], List[Tuple[str, float]]]
 
 
 @dataclass
@@ -13,12 +54,292 @@ class IntentResult:
     question: str | None = None
     control: str | None = None
     smalltalk: str | None = None
+    # "rule" for tier one, "model" for the classifier
+    tier: str = "rule"
+    confidence: float = 1.0
+
+
+@dataclass(frozen=True)
+class PhraseMatch:
+    start: int
+    end: int
+    label: str
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton finding all labelled phrases in one pass.
+
+    Phrases are matched as given, so callers normalize both sides the same
+    way. ASCII phrases only match on word boundaries, so "next" is not
+    found in "context".
+    """
+
+    def __init__(self, phrases: Dict[str, str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (phrase length, label) of every phrase ending there
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for phrase, label in phrases.items():
+            if phrase:
+                self._insert(phrase, label)
+        self._link()
+
+    def find(self, text: str) -> List[PhraseMatch]:
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, label in self._out[state]:
+                start = index + 1 - length
+                if _on_word_boundary(text, start, index + 1):
+                    matches.append(PhraseMatch(start, index + 1, label))
+        return matches
+
+    def _insert(self, phrase: str, label: str) -> None:
+        state = 0
+        for char in phrase:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(phrase), label))
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    def is_word(index: int) -> bool:
+        return 0 <= index < len(text) and text[index].isascii() and text[index].isalnum()
+
+    if is_word(start) and is_word(start - 1):
+        return False
+    return not (is_word(end - 1) and is_word(end))
+
+
+def _longest_non_overlapping(matches: List[PhraseMatch]) -> List[PhraseMatch]:
+    chosen: List[PhraseMatch] = []
+    for match in sorted(matches, key=lambda m: (-(m.end - m.start), m.start)):
+        if all(match.end <= other.start or match.start >= other.end for other in chosen):
+            chosen.append(match)
+    return chosen
+
+
+# Seed utterances for the default classifier, per label
+SEED_EXAMPLES: Dict[str, Tuple[str, ...]] = {
+    "control:next": ("下一页吧", "翻到下一页", "讲下一个", "我们看下一页", "next slide please", "move on to the next page"),
+    "control:prev": ("回到上一页", "再看一下上一页", "往前翻一页", "go back to the previous slide", "previous page please"),
+    "control:pause": ("先暂停一下", "停一下我想想", "等一下老师", "please pause", "hold on a second", "stop it", "stop here"),
+    "control:resume": ("继续讲吧", "好了可以继续了", "接着往下讲", "好的继续", "please continue", "go on please", "ok continue"),
+    "smalltalk": ("谢谢老师讲得很好", "老师你好呀", "好的我明白了", "thanks a lot", "hello teacher"),
+    "question": (
+        "下一页的公式是什么意思", "上一页那个判别式为什么小于零", "暂停的时候能不能讲讲配方法",
+        "为什么要把二次项系数化为一", "求根公式怎么推导", "这个例子里的a等于多少",
+        "what does the next formula mean", "why is the discriminant negative",
+        "can you explain the previous step again",
+    ),
+}
+
+
+class NgramClassifier:
+    """Multinomial naive Bayes over character bigrams.
+
+    Small enough to train from ``SEED_EXAMPLES`` at startup and to classify
+    a batch in well under a millisecond. Replace it with any callable of the
+    ``IntentModel`` shape to use a trained model.
+    """
+
+    def __init__(self, examples: Dict[str, Sequence[str]] = SEED_EXAMPLES, alpha: float = 0.5) -> None:
+        self.alpha = alpha
+        self._counts: Dict[str, Counter] = {}
+        self._totals: Dict[str, int] = {}
+        vocabulary = set()
+        for label, texts in examples.items():
+            counts = Counter()
+            for text in texts:
+                counts.update(self._features(text))
+            self._counts[label] = counts
+            self._totals[label] = sum(counts.values())
+            vocabulary.update(counts)
+        self._vocabulary = len(vocabulary) + 1
+        total_examples = sum(len(texts) for texts in examples.values())
+        self._priors = {label: math.log(len(texts) / total_examples) for label, texts in examples.items()}
+
+    def __call__(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        return [self._classify(text) for text in texts]
+
+    def _classify(self, text: str) -> Tuple[str, float]:
+        features = self._features(text)
+        scores = {}
+        for label, counts in self._counts.items():
+            denominator = math.log(self._totals[label] + self.alpha * self._vocabulary)
+            scores[label] = self._priors[label] + sum(
+                math.log(counts[feature] + self.alpha) - denominator for feature in features
+            )
+        best = max(scores, key=scores.get)
+        peak = scores[best]
+        confidence = 1.0 / sum(math.exp(score - peak) for score in scores.values())
+        return best, confidence
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        chars = normalize(text).replace(" ", "_")
+        return [chars[i:i + 2] for i in range(len(chars) - 1)] or [chars]
+
+
+class _MicroBatcher:
+    """Collect concurrent classifier requests into one model call.
+
+    A batch is sent when ``max_batch`` requests are waiting or ``max_wait``
+    seconds after the first one, whichever comes first. The model runs in
+    the default executor so a heavier classifier does not block the loop.
+    """
+
+    def __init__(self, model: IntentModel, max_batch: int, max_wait: float) -> None:
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+
+    async def submit(self, text: str) -> Tuple[str, float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            labels = await asyncio.get_running_loop().run_in_executor(
+                None, self.model, [text for text, _ in batch]
+            )
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), label in zip(batch, labels):
+            if not future.done():
+                future.set_result(label)
 
 
 class IntentRouterNode:
     """Route text utterances to question/control/smalltalk streams."""
 
+    def __init__(
+        self,
+        model: Optional[IntentModel] = None,
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        phrases = {
+            normalize(phrase): f"control:{action}"
+            for action, items in CONTROL_PHRASES.items()
+            for phrase in items
+        }
+        phrases.update({normalize(phrase): "smalltalk" for phrase in SMALLTALK_PHRASES})
+        self._matcher = PhraseMatcher(phrases)
+        self._question_markers = PhraseMatcher({marker: "question" for marker in QUESTION_MARKERS})
+        self.model = model or NgramClassifier()
+        self._batcher = _MicroBatcher(self.model, max_batch, max_wait_ms / 1000)
+
     def classify(self, text_stream: Iterable[str]) -> Iterable[IntentResult]:
         """Map each utterance to one of the supported intents."""
 
-        raise NotImplementedError("IntentRouterNode.classify requires implementation")
+        for text in text_stream:
+            result = self.match_rules(text)
+            if result is None:
+                result = self._from_label(text, *self.model([text])[0])
+            yield result
+
+    def classify_batch(self, texts: Sequence[str]) -> List[IntentResult]:
+        """Classify several utterances, sending all ambiguous ones to the model at once."""
+
+        results: List[Optional[IntentResult]] = [self.match_rules(text) for text in texts]
+        ambiguous = [index for index, result in enumerate(results) if result is None]
+        if ambiguous:
+            labels = self.model([texts[index] for index in ambiguous])
+            for index, (label, confidence) in zip(ambiguous, labels):
+                results[index] = self._from_label(texts[index], label, confidence)
+        return results
+
+    async def route(self, text: str) -> IntentResult:
+        """Classify one utterance; model calls are batched with concurrent ones."""
+
+        result = self.match_rules(text)
+        if result is not None:
+            return result
+        label, confidence = await self._batcher.submit(text)
+        return self._from_label(text, label, confidence)
+
+    def match_rules(self, text: str) -> Optional[IntentResult]:
+        """Tier one: a definite intent, or None when the model must decide.
+
+        Text with nothing left after normalization (punctuation, whitespace)
+        yields an empty result with no question, control or smalltalk.
+        """
+
+        normalized = normalize(text)
+        if not normalized:
+            return IntentResult()
+        matches = _longest_non_overlapping(self._matcher.find(normalized))
+        if not matches:
+            return IntentResult(question=text)
+        is_question = bool(self._question_markers.find(text.lower()))
+        labels = {match.label for match in matches}
+        covered = sum(match.end - match.start for match in matches)
+        coverage = covered / len(normalized)
+        if is_question or coverage < RULE_COVERAGE:
+            return None
+        if len(labels) > 1:
+            # "好的，继续": smalltalk around a single control is that control
+            controls = labels - {"smalltalk"}
+            if len(controls) != 1 or "smalltalk" not in labels:
+                return None
+            labels = controls
+        return self._from_label(text, labels.pop(), 1.0, tier="rule")
+
+    @staticmethod
+    def _from_label(text: str, label: str, confidence: float, tier: str = "model") -> IntentResult:
+        if confidence < MIN_CONFIDENCE:
+            label = "question"
+        if label.startswith("control:"):
+            return IntentResult(control=label.split(":", 1)[1], tier=tier, confidence=confidence)
+        if label == "smalltalk":
+            return IntentResult(smalltalk=text, tier=tier, confidence=confidence)
+        return IntentResult(question=text, tier=tier, confidence=confidence)
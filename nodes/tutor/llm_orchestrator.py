@@ -1,9 +1,41 @@
-"""Tutor orchestration node skeleton."""
+"""Streaming tutor orchestration.
+
+The orchestrator streams tokens from an OpenAI-compatible chat endpoint and
+emits ``answer_text`` one sentence at a time, as soon as each sentence
+closes. TTS can start on the first sentence while the LLM is still writing
+the rest.
+
+Each prompt starts with the same system + lecture messages for every turn
+of a lecture. Retrieved context and the question go last. That prefix is
+rendered once per lecture and kept byte-identical. Local backends can then
+reuse its KV cache: llama.cpp with ``cache_prompt``, vLLM and SGLang
+automatically. ``python -m nodes.tutor.stub_llm_server`` is a stand-in
+endpoint for working offline.
+"""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import asyncio
+import contextlib
+import hashlib
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_SYSTEM_PROMPT = (
+    "你是一位耐心的数学老师，正在给学生讲课。用简短、口语化的中文回答学生的问题，"
+    "每句话不要太长，不要使用 Markdown 或公式排版。"
+)
+
+# Sentence-final punctuation; "." only counts before whitespace (not "3.14")
+_SENTENCE_END = re.compile(r"[。！？!?；;…]+[”’\"')）]*|\.(?=\s)|\n+")
+_CLAUSE_END = re.compile(r"[，,、：:]")
+# Punctuation that can trail a quote the previous sentence already closed
+_LEADING_PUNCTUATION = "。！？!?；;…，,、 "
 
 
 @dataclass
@@ -12,6 +44,9 @@ class TutorRequest:
 
     text: str
     context: list[str]
+    question_id: str = ""
+    session_id: Optional[str] = None
+    lecture_id: Optional[str] = None
 
 
 @dataclass
@@ -22,10 +57,258 @@ class TutorResponse:
     branch: Optional[str] = None
 
 
+@dataclass
+class AnswerSentence:
+    """One ``answer_text`` emission.
+
+    Sentences are yielded as soon as they close. A completed (not cancelled)
+    answer ends with one ``final`` emission: the unterminated tail of the
+    answer, or an empty marker if the last sentence was already sent.
+    """
+
+    question_id: str
+    index: int
+    text: str
+    final: bool = False
+
+
+@dataclass
+class TutorOrchestratorConfig:
+    """Configuration for the tutor orchestrator."""
+
+    base_url: str = "http://127.0.0.1:8089/v1"
+    model: str = "local"
+    api_key: str = ""
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    temperature: float = 0.3
+    max_tokens: int = 512
+    # Sentences shorter than this are merged into the next one
+    min_sentence_chars: int = 4
+    # Longer runs are split at the last clause break to start TTS sooner
+    max_sentence_chars: int = 60
+    # Ask the backend to keep the shared prefix cached between requests
+    cache_prompt: bool = True
+    timeout: float = 60.0
+    extra_body: Dict[str, object] = field(default_factory=dict)
+
+
+class SentenceSplitter:
+    """Incremental sentence segmentation over a token stream."""
+
+    def __init__(self, min_chars: int = 4, max_chars: int = 60) -> None:
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._scanned = 0
+
+    def feed(self, token: str) -> List[str]:
+        """Add a token; return the sentences it completed."""
+
+        self._buffer += token
+        sentences = []
+        while True:
+            match = _SENTENCE_END.search(self._buffer, self._scanned)
+            if match is None:
+                # Only a trailing "." may still turn out to end a sentence
+                self._scanned = max(self._scanned, len(self._buffer) - 1)
+                break
+            end = match.end()
+            if len(self._buffer[:end].strip()) < self.min_chars:
+                # Too short to synthesize on its own; keep it for the next sentence
+                self._scanned = end
+                continue
+            sentences.append(self._take(end))
+        if len(self._buffer) > self.max_chars:
+            breaks = [m.end() for m in _CLAUSE_END.finditer(self._buffer, 0, self.max_chars)]
+            if not breaks:
+                space = self._buffer.rfind(" ", 0, self.max_chars)
+                breaks = [space if space > 0 else self.max_chars]
+            sentences.append(self._take(breaks[-1]))
+        return [sentence for sentence in sentences if sentence]
+
+    def flush(self) -> Optional[str]:
+        """The remaining text once the stream ends."""
+
+        rest = self._take(len(self._buffer))
+        return rest or None
+
+    def _take(self, end: int) -> str:
+        text, self._buffer = self._buffer[:end].lstrip(_LEADING_PUNCTUATION).strip(), self._buffer[end:]
+        self._scanned = 0
+        return text
+
+
+class PromptPrefixCache:
+    """Rendered system + lecture messages, one per lecture.
+
+    Every turn of a lecture reuses the same message objects. The JSON
+    prefix sent to the backend is therefore identical and its KV cache can
+    be reused. ``get`` also returns a digest of the prefix, sent as a cache
+    key hint.
+    """
+
+    def __init__(self, system_prompt: str, lecture_loader: Optional[Callable[[str], str]] = None) -> None:
+        self.system_prompt = system_prompt
+        self.lecture_loader = lecture_loader
+        self._prefixes: Dict[Optional[str], Tuple[str, List[Dict[str, str]]]] = {}
+
+    def get(self, lecture_id: Optional[str]) -> Tuple[str, List[Dict[str, str]]]:
+        cached = self._prefixes.get(lecture_id)
+        if cached is None:
+            messages = [{"role": "system", "content": self.system_prompt}]
+            if lecture_id and self.lecture_loader is not None:
+                lecture = self.lecture_loader(lecture_id)
+                if lecture:
+                    messages.append({"role": "system", "content": f"本节课的讲义：\n{lecture}"})
+            digest = hashlib.sha1(json.dumps(messages, ensure_ascii=False).encode("utf-8")).hexdigest()
+            cached = self._prefixes[lecture_id] = (digest, messages)
+        return cached
+
+    def invalidate(self, lecture_id: Optional[str] = None) -> None:
+        if lecture_id is None:
+            self._prefixes.clear()
+        else:
+            self._prefixes.pop(lecture_id, None)
+
+
+class OpenAICompatibleLLM:
+    """Token stream from ``/chat/completions`` with ``stream: true``."""
+
+    def __init__(self, config: TutorOrchestratorConfig) -> None:
+        self.config = config
+        headers = {"Authorization": f"Bearer {config.api_key}"} if config.api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=config.base_url.rstrip("/"), headers=headers, timeout=config.timeout
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], prefix_key: str) -> AsyncIterator[str]:
+        payload: Dict[str, object] = {
+            "model": self.config.model,
+            "messages": messages,
+            "stream": True,
+            "temperature": self.config.temperature,
+            "max_tokens": self.config.max_tokens,
+        }
+        if self.config.cache_prompt:
+            payload["cache_prompt"] = True
+            payload["prompt_cache_key"] = prefix_key
+        payload.update(self.config.extra_body)
+        async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+async def _until_cancelled(tokens: AsyncIterator[str], cancelled: asyncio.Event) -> AsyncIterator[str]:
+    """Relay ``tokens`` until exhausted or ``cancelled`` is set, even mid-wait."""
+
+    waiter = asyncio.ensure_future(cancelled.wait())
+    try:
+        while True:
+            pending = asyncio.ensure_future(tokens.__anext__())
+            done, _ = await asyncio.wait({pending, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if pending not in done:
+                pending.cancel()
+                with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                    await pending
+                return
+            try:
+                yield pending.result()
+            except StopAsyncIteration:
+                return
+    finally:
+        waiter.cancel()
+        await tokens.aclose()
+
+
 class TutorOrchestratorNode:
-    """Coordinate LLM prompting and branching decisions."""
+    """Coordinate LLM prompting and branching decisions.
+
+    ``stream`` yields the answer sentence by sentence. ``cancel`` stops an
+    answer by ``question_id``, and a new question on a session cancels the
+    answer still streaming there.
+    """
+
+    def __init__(
+        self,
+        config: TutorOrchestratorConfig | None = None,
+        lecture_loader: Optional[Callable[[str], str]] = None,
+        llm: Optional[OpenAICompatibleLLM] = None,
+    ) -> None:
+        self.config = config or TutorOrchestratorConfig()
+        self.prefixes = PromptPrefixCache(self.config.system_prompt, lecture_loader)
+        self.llm = llm or OpenAICompatibleLLM(self.config)
+        self._cancelled: Dict[str, asyncio.Event] = {}
+        self._by_session: Dict[str, str] = {}
 
     def generate(self, request: TutorRequest) -> TutorResponse:
-        """Produce a tutor response for the provided request."""
+        """Produce a tutor response for the provided request.
+
+        Blocking convenience wrapper around ``stream`` for callers without an
+        event loop.
+        """
+
+        async def collect() -> TutorResponse:
+            sentences = [sentence.text async for sentence in self.stream(request)]
+            return TutorResponse(answer_text="".join(sentences))
+
+        return asyncio.run(collect())
+
+    async def stream(self, request: TutorRequest) -> AsyncIterator[AnswerSentence]:
+        # Not derived from the text: the same question may be asked on two sessions
+        question_id = request.question_id or uuid.uuid4().hex
+        if request.session_id is not None:
+            previous = self._by_session.get(request.session_id)
+            if previous is not None:
+                self.cancel(previous)
+            self._by_session[request.session_id] = question_id
+        cancelled = self._cancelled[question_id] = asyncio.Event()
+
+        prefix_key, prefix = self.prefixes.get(request.lecture_id)
+        messages = prefix + [{"role": "user", "content": self._user_message(request)}]
+        splitter = SentenceSplitter(self.config.min_sentence_chars, self.config.max_sentence_chars)
+        index = 0
+        try:
+            async for token in _until_cancelled(self.llm.stream(messages, prefix_key), cancelled):
+                for sentence in splitter.feed(token):
+                    yield AnswerSentence(question_id, index, sentence)
+                    index += 1
+            if cancelled.is_set():
+                return
+            yield AnswerSentence(question_id, index, splitter.flush() or "", final=True)
+        finally:
+            self._cancelled.pop(question_id, None)
+            if request.session_id is not None and self._by_session.get(request.session_id) == question_id:
+                del self._by_session[request.session_id]
+
+    def cancel(self, question_id: str) -> bool:
+        """Stop streaming the answer to ``question_id``; False if none is active."""
+
+        cancelled = self._cancelled.get(question_id)
+        if cancelled is None:
+            return False
+        cancelled.set()
+        return True
+
+    async def aclose(self) -> None:
+        for cancelled in self._cancelled.values():
+            cancelled.set()
+        await self.llm.aclose()
 
-        raise NotImplementedError("TutorOrchestratorNode.generate requires implementation")
+    @staticmethod
+    def _user_message(request: TutorRequest) -> str:
+        if not request.context:
+            return request.text
+        context = "\n".join(f"- {snippet}" for snippet in request.context)
+        return f"参考资料：\n{context}\n\n学生的问题：{request.text}"
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Stand-in for a local OpenAI-compatible LLM server.
+
+Serves ``POST /v1/chat/completions`` with ``stream: true`` (SSE) or a plain
+JSON reply, so the tutor orchestrator can be developed and tested with no
+model. Answers are canned text built from the question. Latency is modelled
+on a real local backend: prefill time grows with the uncached prompt, then
+tokens arrive at a fixed rate. Requests whose messages, all but the last,
+match an earlier request count as prefix-cache hits and only pay prefill
+for the last message.
+
+    python -m nodes.tutor.stub_llm_server --port 8089 --token-ms 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+ANSWER_TEMPLATE = (
+    "好问题！你问的是“{question}”。我们先回顾一下刚才讲的内容。"
+    "关键是先把方程整理成标准形式，再看判别式的符号。"
+    "如果判别式大于零，方程有两个不同的实数根；等于零时有一个重根。"
+    "你可以拿上一页的例子自己试一试。"
+)
+
+
+def _tokens(text: str) -> List[str]:
+    """Split like a tokenizer would: one to three characters per token."""
+
+    tokens, index, step = [], 0, 1
+    while index < len(text):
+        tokens.append(text[index:index + step])
+        index += step
+        step = step % 3 + 1
+    return tokens
+
+
+class StubLLM:
+    def __init__(self, token_ms: float, prefill_us_per_char: float, cache_entries: int = 64) -> None:
+        self.token_ms = token_ms
+        self.prefill_us_per_char = prefill_us_per_char
+        self._prefixes: "OrderedDict[str, None]" = OrderedDict()
+        self._cache_entries = cache_entries
+        self.stats = {"requests": 0, "prefix_hits": 0}
+
+    def prefill_seconds(self, messages: List[Dict[str, str]]) -> Tuple[float, bool]:
+        prefix = json.dumps(messages[:-1], ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        hit = digest in self._prefixes
+        if hit:
+            self._prefixes.move_to_end(digest)
+            self.stats["prefix_hits"] += 1
+        else:
+            self._prefixes[digest] = None
+            while len(self._prefixes) > self._cache_entries:
+                self._prefixes.popitem(last=False)
+        chars = len(messages[-1].get("content", "")) + (0 if hit else len(prefix))
+        return chars * self.prefill_us_per_char / 1e6, hit
+
+    def answer(self, messages: List[Dict[str, str]]) -> str:
+        question = messages[-1].get("content", "") if messages else ""
+        question = question.rsplit("学生的问题：", 1)[-1].strip()[:40]
+        return ANSWER_TEMPLATE.format(question=question)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return method, path, body
+
+
+def _response(status: str, body: bytes, content_type: str = "application/json") -> bytes:
+    return (
+        f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    ).encode("latin-1") + body
+
+
+async def handle(llm: StubLLM, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        method, path, body = await _read_request(reader)
+        if method == "GET" and path.rstrip("/").endswith("/stats"):
+            writer.write(_response("200 OK", json.dumps(llm.stats).encode()))
+            return
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            writer.write(_response("404 Not Found", b'{"error": "not found"}'))
+            return
+
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [])
+        llm.stats["requests"] += 1
+        prefill, hit = llm.prefill_seconds(messages)
+        tokens = _tokens(llm.answer(messages))[: int(request.get("max_tokens", 512))]
+        created = int(time.time())
+        await asyncio.sleep(prefill)
+
+        if not request.get("stream"):
+            reply = {
+                "object": "chat.completion",
+                "created": created,
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_cache_hit": hit},
+            }
+            writer.write(_response("200 OK", json.dumps(reply, ensure_ascii=False).encode("utf-8")))
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        for token in tokens:
+            chunk = {
+                "object": "chat.completion.chunk",
+                "created": created,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            writer.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            await writer.drain()
+            await asyncio.sleep(llm.token_ms / 1000)
+        writer.write(b"data: [DONE]\n\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        # Client went away, e.g. the answer was cancelled
+        pass
+    finally:
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+        writer.close()
+
+
+async def serve(host: str, port: int, llm: StubLLM) -> asyncio.AbstractServer:
+    return await asyncio.start_server(lambda r, w: handle(llm, r, w), host, port)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    llm = StubLLM(args.token_ms, args.prefill_us_per_char)
+    server = await serve(args.host, args.port, llm)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for an OpenAI-compatible LLM")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--token-ms", type=float, default=30.0, help="Delay between streamed tokens")
+    parser.add_argument("--prefill-us-per-char", type=float, default=200.0,
+                        help="Prefill cost per uncached prompt character")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,125 @@
-"""Text multiplexer node skeleton."""
+"""Merge typed questions and ASR transcripts into one utterance stream.
+
+A student often types a question while ASR is still finalizing the same
+question spoken aloud. Both copies would otherwise reach the tutor and each
+start an LLM + TTS run. The mux keeps, per session, the utterances of the
+last ``window_seconds``. A new one whose normalized text is close enough to
+one of them is dropped as a duplicate. The first copy is forwarded at once,
+so nothing waits on the window. Each forwarded utterance gets a
+``question_id``; downstream nodes key answers and resets on it.
+"""
 
 from __future__ import annotations
 
-from typing import Iterable, Optional
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from nodes.nlu.intent_router import normalize
+
+SOURCE_WS = "ws"
+SOURCE_ASR = "asr"
+
+
+@dataclass
+class TextMuxConfig:
+    """Configuration for the text multiplexer."""
+
+    # How long an utterance suppresses near-duplicates of itself
+    window_seconds: float = 3.0
+    # Bigram Dice similarity at which two utterances count as the same
+    similarity: float = 0.6
+    # Also drop repeats from the same source; off because saying "下一页"
+    # twice in a row means two page turns
+    dedup_same_source: bool = False
+
+
+@dataclass
+class MuxedUtterance:
+    """One utterance forwarded to the intent router."""
+
+    question_id: str
+    text: str
+    source: str
+    session_id: Optional[str] = None
+    timestamp: float = 0.0
+
+
+def _bigrams(text: str) -> Counter:
+    if len(text) < 2:
+        return Counter([text]) if text else Counter()
+    return Counter(text[index:index + 2] for index in range(len(text) - 1))
+
+
+def similarity(left: Counter, right: Counter) -> float:
+    """Dice coefficient of two bigram multisets."""
+
+    total = sum(left.values()) + sum(right.values())
+    if not total:
+        return 1.0
+    return 2 * sum((left & right).values()) / total
 
 
 class TextMuxNode:
     """Merges text from direct WS input and ASR final transcripts."""
 
+    def __init__(self, config: TextMuxConfig | None = None) -> None:
+        self.config = config or TextMuxConfig()
+        # session -> recent (timestamp, source, bigrams, question_id)
+        self._recent: Dict[Optional[str], Deque[Tuple[float, str, Counter, str]]] = {}
+        self.forwarded = 0
+        self.duplicates = 0
+
+    def push(
+        self,
+        source: str,
+        text: str,
+        session_id: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Optional[MuxedUtterance]:
+        """Offer one utterance; returns it if forwarded, None if a duplicate."""
+
+        now = time.monotonic() if now is None else now
+        key = normalize(text).replace(" ", "")
+        if not key:
+            return None
+        grams = _bigrams(key)
+        recent = self._recent.setdefault(session_id, deque())
+        while recent and now - recent[0][0] > self.config.window_seconds:
+            recent.popleft()
+        for _, seen_source, seen_grams, _ in recent:
+            if seen_source == source and not self.config.dedup_same_source:
+                continue
+            if similarity(grams, seen_grams) >= self.config.similarity:
+                self.duplicates += 1
+                return None
+
+        question_id = uuid.uuid4().hex[:12]
+        recent.append((now, source, grams, question_id))
+        self.forwarded += 1
+        return MuxedUtterance(question_id, text.strip(), source, session_id, now)
+
+    def forget(self, session_id: Optional[str]) -> None:
+        self._recent.pop(session_id, None)
+
     def merge(self, ws_text: Iterable[str], asr_text: Iterable[str]) -> Iterable[str]:
-        """Yield resolved text utterances."""
+        """Yield resolved text utterances.
+
+        The two streams are taken as arriving together and interleaved,
+        typed text first, so one time window covers them all.
+        """
 
-        raise NotImplementedError("TextMuxNode.merge requires implementation")
+        ws_iter, asr_iter = iter(ws_text), iter(asr_text)
+        pending = [(SOURCE_WS, ws_iter), (SOURCE_ASR, asr_iter)]
+        now = time.monotonic()
+        while pending:
+            for source, stream in list(pending):
+                text = next(stream, None)
+                if text is None:
+                    pending.remove((source, stream))
+                    continue
+                utterance = self.push(source, text, now=now)
+                if utterance is not None:
+                    yield utterance.text
@@ -1,17 +1,73 @@
-"""Entrypoint for running the lecture demo server with ``python -m``."""
+"""Entrypoint for running the lecture demo server with ``python -m``.
+
+With ``AIROS_WORKERS=N`` the server starts N worker processes, each with its
+own event loop on consecutive ports starting at ``AIROS_PORT``. Sessions are
+owned by the worker that created them, and the returned ``ws_url`` points
+back at that worker's port. Workers share sessions through
+``AIROS_SESSION_STORE``, which must then be a ``redis://`` URL; a per-process
+store is refused. When a dataflow node id is configured, worker
+``i`` joins the graph as ``<node id>-<i>``, and each of those ids must be
+declared as a dynamic node.
+"""
 
 from __future__ import annotations
 
+import dataclasses
+import logging
+import multiprocessing
+
 import uvicorn
 
-from .config import get_settings
+from .config import Settings, get_settings
 from .main import create_app
+from .session_store import is_shared_store
+
+LOGGER = logging.getLogger(__name__)
+
+
+def worker_settings(settings: Settings, index: int) -> Settings:
+    """Settings for worker ``index`` of a multi-worker deployment."""
+
+    return dataclasses.replace(
+        settings,
+        port=settings.port + index,
+        worker_id="-".join(filter(None, [settings.worker_id, f"w{index}"])),
+        dataflow_node_id=(
+            f"{settings.dataflow_node_id}-{index}" if settings.dataflow_node_id else ""
+        ),
+    )
+
+
+def serve(settings: Settings) -> None:
+    app = create_app(settings)
+    uvicorn.run(app, host=settings.host, port=settings.port, log_level="info")
 
 
 def main() -> None:
     settings = get_settings()
-    app = create_app(settings)
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    if settings.workers <= 1:
+        serve(settings)
+        return
+
+    if not is_shared_store(settings.session_store_url):
+        # Each worker would get its own empty store and could not adopt sessions
+        raise SystemExit(
+            f"AIROS_WORKERS={settings.workers} needs a shared session store such as "
+            f"redis://host:6379/0; '{settings.session_store_url}' is per process"
+        )
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=serve, args=(worker_settings(settings, index),), name=f"airos-w{index}")
+        for index in range(settings.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:  # pragma: no cover - interactive shutdown
+        for process in processes:
+            process.terminate()
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entrypoint
@@ -0,0 +1,97 @@
+"""Binary WebSocket framing for audio.
+
+Clients that offer the ``airos.audio.v1`` subprotocol at connect time send and
+receive audio as binary frames instead of base64 strings inside JSON. Each
+frame is a fixed 8-byte header followed by the raw payload::
+
+    offset  size  field
+    0       1     frame type      (FrameType)
+    1       1     sample format   (SampleFormat)
+    2       2     reserved, zero
+    4       4     sequence number (unsigned, big-endian)
+    8       ...   PCM samples or one Opus packet
+
+Control messages stay JSON text frames. Audio frames never go through
+pydantic validation.
+"""
+
+from __future__ import annotations
+
+import base64
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Union
+
+AUDIO_SUBPROTOCOL = "airos.audio.v1"
+
+_HEADER = struct.Struct("!BBHI")
+HEADER_SIZE = _HEADER.size
+
+
+class FrameType(IntEnum):
+    """Kind of binary frame, mirroring the JSON audio message types."""
+
+    USER_AUDIO_CHUNK = 1
+    USER_AUDIO_END = 2
+    TTS_AUDIO_CHUNK = 3
+    TTS_AUDIO_END = 4
+
+
+class SampleFormat(IntEnum):
+    """Encoding of the frame payload."""
+
+    PCM_S16LE = 1
+    PCM_F32LE = 2
+    OPUS = 3
+
+
+@dataclass(slots=True)
+class AudioFrame:
+    """A decoded binary audio frame."""
+
+    type: FrameType
+    seq: int
+    sample_format: SampleFormat = SampleFormat.PCM_S16LE
+    payload: Union[bytes, memoryview] = b""
+
+    @property
+    def is_end(self) -> bool:
+        return self.type in (FrameType.USER_AUDIO_END, FrameType.TTS_AUDIO_END)
+
+
+def encode_audio_frame(frame: AudioFrame) -> bytes:
+    """Serialize a frame header and payload for ``send_bytes``."""
+
+    return _HEADER.pack(frame.type, frame.sample_format, 0, frame.seq) + bytes(frame.payload)
+
+
+def decode_audio_frame(data: bytes) -> AudioFrame:
+    """Parse a binary frame received from the client.
+
+    The payload is returned as a ``memoryview`` into ``data`` so no copy is
+    made. Raises ``ValueError`` for truncated frames or unknown types.
+    """
+
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Audio frame shorter than {HEADER_SIZE}-byte header")
+    frame_type, sample_format, _, seq = _HEADER.unpack_from(data)
+    return AudioFrame(
+        type=FrameType(frame_type),
+        seq=seq,
+        sample_format=SampleFormat(sample_format),
+        payload=memoryview(data)[HEADER_SIZE:],
+    )
+
+
+def audio_frame_to_json(frame: AudioFrame) -> str:
+    """Render an outbound frame as the legacy base64 JSON message text.
+
+    The message is formatted directly: base64 never needs JSON escaping, and
+    this avoids building a dict only to serialize it.
+    """
+
+    if frame.type == FrameType.TTS_AUDIO_END:
+        return f'{{"type":"tts.audio.end","seq":{frame.seq}}}'
+    encoded = base64.b64encode(frame.payload).decode("ascii")
+    return f'{{"type":"tts.audio.chunk","seq":{frame.seq},"base64":"{encoded}"}}'
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for outbound WebSocket serialization.
+
+Compares the previous path (re-validate with a TypeAdapter, ``model_dump``,
+stdlib ``json.dumps``) with ``encode_outbound`` on a single core, for a
+text-only stream and for audio-heavy streams where one text message is
+followed by many TTS chunks. Run from the repository root:
+
+    python -m server.benchmark_outbound --messages 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+from typing import Callable, Dict, List
+
+from pydantic import TypeAdapter
+
+from .audio_frames import AudioFrame, FrameType, SampleFormat, encode_audio_frame
+from .dataflow import OutboundMessage
+from .ws_messages import AsrPartial, ServerMessage, TutorAnswerText
+from .ws_router import encode_outbound
+
+# 20 ms of 32 kHz float32 PCM, PrimeSpeech's output rate
+CHUNK_BYTES = 640 * 4
+
+_server_adapter = TypeAdapter(ServerMessage)
+
+
+def legacy_encode(message: OutboundMessage, binary_audio: bool):
+    """Serialization as done before pre-validated messages."""
+
+    if isinstance(message, AudioFrame):
+        if binary_audio:
+            return encode_audio_frame(message)
+        return json.dumps(
+            {
+                "type": "tts.audio.chunk",
+                "seq": message.seq,
+                "base64": base64.b64encode(message.payload).decode("ascii"),
+            }
+        )
+    return json.dumps(_server_adapter.validate_python(message).model_dump())
+
+
+def build_stream(count: int, audio_per_text: int) -> List[OutboundMessage]:
+    payload = bytes(CHUNK_BYTES)
+    stream: List[OutboundMessage] = []
+    seq = 0
+    while len(stream) < count:
+        stream.append(AsrPartial(text="今天我们来学习一元二次方程"))
+        stream.append(TutorAnswerText(text="判别式小于零时，方程在实数范围内没有解。"))
+        for _ in range(audio_per_text):
+            seq += 1
+            stream.append(
+                AudioFrame(FrameType.TTS_AUDIO_CHUNK, seq, SampleFormat.PCM_F32LE, payload)
+            )
+    return stream[:count]
+
+
+def measure(encode: Callable, stream: List[OutboundMessage], binary_audio: bool) -> Dict:
+    start = time.perf_counter()
+    total_bytes = 0
+    for message in stream:
+        total_bytes += len(encode(message, binary_audio))
+    elapsed = time.perf_counter() - start
+    return {
+        "messages_per_sec": len(stream) / elapsed,
+        "mb_per_sec": total_bytes / elapsed / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark outbound WS serialization")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--audio-per-text", type=int, default=50,
+                        help="TTS chunks emitted per pair of text messages")
+    parser.add_argument("--output", type=str, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    scenarios = [
+        ("text only", build_stream(args.messages, 0), False),
+        ("audio, binary frames", build_stream(args.messages, args.audio_per_text), True),
+        ("audio, base64 JSON", build_stream(args.messages, args.audio_per_text), False),
+    ]
+
+    results = {}
+    print(f"{'scenario':<24}{'legacy msg/s':>16}{'fast msg/s':>16}{'speedup':>10}")
+    for name, stream, binary_audio in scenarios:
+        legacy = measure(legacy_encode, stream, binary_audio)
+        fast = measure(encode_outbound, stream, binary_audio)
+        speedup = fast["messages_per_sec"] / legacy["messages_per_sec"]
+        results[name] = {"legacy": legacy, "fast": fast, "speedup": speedup}
+        print(f"{name:<24}{legacy['messages_per_sec']:>16,.0f}"
+              f"{fast['messages_per_sec']:>16,.0f}{speedup:>9.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
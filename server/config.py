@@ -11,9 +11,34 @@ class Settings:
     """Application configuration values."""
 
     version: str = "0.1.0"
-    ws_url_template: str = "ws://localhost:8000/ws/{session_id}"
+    host: str = "0.0.0.0"
+    port: int = 8000
+    # ``{port}`` is this worker's port, so clients connect back to the worker
+    # that created their session
+    ws_url_template: str = "ws://localhost:{port}/ws/{session_id}"
     dataflow_path: str = "core/dataflow-hybrid.yml"
     lecture_config_dir: str = "configs"
+    # Seconds between checks for edited lecture files; 0 disables reloading
+    lecture_reload_interval: float = 2.0
+    # Output of ``python -m server.render_narration``, used by replay sessions
+    narration_dir: str = "narration"
+    narration_voice: str = "Doubao"
+    # Dynamic node id to join the dataflow as; empty runs with simulated answers
+    dataflow_node_id: str = ""
+    outbound_queue_size: int = 256
+    # TTS audio the client may hold beyond its playback position
+    audio_lead_seconds: float = 0.5
+    # Paced audio held per session before the rest waits in its outbox
+    audio_buffer_seconds: float = 10.0
+    # Assumed until a TTS output reports its ``sample_rate`` metadata
+    tts_sample_rate: int = 32000
+    session_idle_ttl: float = 1800.0
+    max_sessions: int = 10_000
+    session_sweep_interval: float = 30.0
+    # memory://, local-redis:// or redis://host:6379/0
+    session_store_url: str = "memory://"
+    workers: int = 1
+    worker_id: str = ""
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -21,11 +46,27 @@ class Settings:
 
         return cls(
             version=os.getenv("AIROS_SERVER_VERSION", "0.1.0"),
+            host=os.getenv("AIROS_HOST", "0.0.0.0"),
+            port=int(os.getenv("AIROS_PORT", "8000")),
             ws_url_template=os.getenv(
-                "AIROS_WS_URL_TEMPLATE", "ws://localhost:8000/ws/{session_id}"
+                "AIROS_WS_URL_TEMPLATE", "ws://localhost:{port}/ws/{session_id}"
             ),
             dataflow_path=os.getenv("AIROS_DATAFLOW_PATH", "core/dataflow-hybrid.yml"),
             lecture_config_dir=os.getenv("AIROS_LECTURE_CONFIG_DIR", "configs"),
+            lecture_reload_interval=float(os.getenv("AIROS_LECTURE_RELOAD_INTERVAL", "2")),
+            narration_dir=os.getenv("AIROS_NARRATION_DIR", "narration"),
+            narration_voice=os.getenv("AIROS_NARRATION_VOICE", "Doubao"),
+            dataflow_node_id=os.getenv("AIROS_DATAFLOW_NODE_ID", ""),
+            outbound_queue_size=int(os.getenv("AIROS_OUTBOUND_QUEUE_SIZE", "256")),
+            audio_lead_seconds=float(os.getenv("AIROS_AUDIO_LEAD_SECONDS", "0.5")),
+            audio_buffer_seconds=float(os.getenv("AIROS_AUDIO_BUFFER_SECONDS", "10")),
+            tts_sample_rate=int(os.getenv("AIROS_TTS_SAMPLE_RATE", "32000")),
+            session_idle_ttl=float(os.getenv("AIROS_SESSION_IDLE_TTL", "1800")),
+            max_sessions=int(os.getenv("AIROS_MAX_SESSIONS", "10000")),
+            session_sweep_interval=float(os.getenv("AIROS_SESSION_SWEEP_INTERVAL", "30")),
+            session_store_url=os.getenv("AIROS_SESSION_STORE", "memory://"),
+            workers=int(os.getenv("AIROS_WORKERS", "1")),
+            worker_id=os.getenv("AIROS_WORKER_ID", ""),
         )
 
 
@@ -1,61 +1,221 @@
-"""Placeholder dataflow adapter that mimics Dora integration."""
+"""Adapter between websocket sessions and the Dora dataflow.
+
+With a node id configured the adapter joins the running graph as a dynamic
+node (see ``server.dora_bridge``) and multiplexes every session over that one
+connection, tagging outputs with ``session_id`` metadata and routing inputs
+back by the same key. Without one it falls back to synthetic responses so
+the server can be exercised end-to-end without a graph.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import base64
+import json
 import logging
-from dataclasses import dataclass
-from typing import Dict
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
 
 from pydantic import TypeAdapter
 
-from .ws_messages import ClientMessage, ServerMessage, SlideGoto, TutorAnswerText
+from .audio_frames import AudioFrame, FrameType, SampleFormat
+from .dora_bridge import DoraBridge, DoraEvent
+from .metrics import ServerMetrics
+from .outbox import SessionOutbox
+from .pacing import AudioPacer
+from .ws_messages import (
+    AsrFinal,
+    AsrPartial,
+    ClientMessage,
+    ServerMessage,
+    SlideGoto,
+    TutorAnswerText,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 _client_adapter = TypeAdapter(ClientMessage)
-_server_adapter = TypeAdapter(ServerMessage)
+
+# Outbound audio is queued as raw frames and encoded per connection, either as
+# a binary frame or as the legacy base64 JSON message. Other messages are
+# constructed as typed models, which validates them once; they are not
+# re-validated on the way out.
+OutboundMessage = Union[ServerMessage, AudioFrame]
 
 
 @dataclass(slots=True)
 class SessionChannels:
     """Queues used to communicate with websocket endpoints."""
 
-    outbound: "asyncio.Queue[ServerMessage]"
+    outbound: SessionOutbox
+    pacer: AudioPacer
+    tts_seq: int = 0
+    # TTS frames from the dataflow waiting, in order, for room in ``outbound``
+    audio_backlog: Deque[AudioFrame] = field(default_factory=deque)
+    feeder: Optional[asyncio.Task] = None
+
+
+def _event_text(event: DoraEvent) -> str:
+    values = event.value.to_pylist() if hasattr(event.value, "to_pylist") else [event.value]
+    return "".join(str(value) for value in values if value is not None)
+
+
+# Dataflow inputs meaning the user started talking over the tutor
+_BARGE_IN_INPUTS = ("speech_started", "barge_in")
+
+# Dataflow inputs that mark a step of the user's turn, for latency metrics
+_TURN_EVENTS = {
+    "asr_final": "asr_result",
+    "asr_transcription": "asr_result",
+    "answer_text": "llm_first_token",
+    "tts_audio": "tts_first_audio",
+    "audio": "tts_first_audio",
+}
+
+# Dataflow inputs that only time a turn step and are never sent to clients,
+# e.g. the LLM text of a dataflow whose clients are served by another node
+_TIMING_INPUTS = {
+    "llm_text": "llm_first_token",
+}
+
+
+def _event_pcm_f32(event: DoraEvent) -> bytes:
+    value = event.value
+    # PrimeSpeech sends pa.array([samples]): a list<float> array of one row
+    while hasattr(value, "flatten") and hasattr(value.type, "value_type"):
+        value = value.flatten()
+    samples = value.to_numpy(zero_copy_only=False)
+    return samples.astype("<f4", copy=False).tobytes()
 
 
 class DataflowAdapter:
     """Bridge between the HTTP/WebSocket API and the Dora runtime."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        node_id: str = "",
+        queue_size: int = 256,
+        metrics: Optional[ServerMetrics] = None,
+        audio_lead: float = 0.5,
+        audio_buffer_seconds: float = 10.0,
+        tts_sample_rate: int = 32000,
+    ) -> None:
+        # Only touched from the event loop without awaiting, so no lock is needed
         self._channels: Dict[str, SessionChannels] = {}
-        self._lock = asyncio.Lock()
+        self._queue_size = queue_size
+        self._audio_lead = audio_lead
+        self._audio_buffer_seconds = audio_buffer_seconds
+        self._tts_sample_rate = tts_sample_rate
+        self._metrics = metrics or ServerMetrics()
+        self._bridge: Optional[DoraBridge] = (
+            DoraBridge(node_id, self._on_event) if node_id else None
+        )
+        self._input_handlers: Dict[str, Callable[[SessionChannels, DoraEvent], OutboundMessage]] = {
+            "asr_partial": lambda _, event: AsrPartial(text=_event_text(event)),
+            "asr_final": lambda _, event: AsrFinal(text=_event_text(event)),
+            "asr_transcription": lambda _, event: AsrFinal(text=_event_text(event)),
+            "answer_text": lambda _, event: TutorAnswerText(text=_event_text(event)),
+            "slide_cmd": lambda _, event: SlideGoto(section_id=_event_text(event)),
+            "tts_audio": self._tts_chunk,
+            "audio": self._tts_chunk,
+            "tts_audio_end": self._tts_end,
+            "segment_complete": self._tts_end,
+        }
+        self.unrouted = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._bridge is not None and self._bridge.running
+
+    async def start(self) -> None:
+        """Join the dataflow if a node id was configured."""
+
+        if self._bridge is None:
+            LOGGER.info("No dataflow node configured; using simulated responses")
+            return
+        self._bridge.start(asyncio.get_running_loop())
+
+    async def stop(self) -> None:
+        if self._bridge is not None:
+            await asyncio.to_thread(self._bridge.stop)
 
     async def ensure_session(self, session_id: str) -> SessionChannels:
         """Create channel queues for a session if they do not exist."""
 
-        async with self._lock:
-            channel = self._channels.get(session_id)
-            if channel is None:
-                channel = SessionChannels(outbound=asyncio.Queue())
-                self._channels[session_id] = channel
-            return channel
+        channel = self._channels.get(session_id)
+        if channel is None:
+            channel = SessionChannels(
+                outbound=SessionOutbox(self._queue_size),
+                pacer=AudioPacer(
+                    lead_seconds=self._audio_lead,
+                    max_buffered_seconds=self._audio_buffer_seconds,
+                    sample_rate=self._tts_sample_rate,
+                ),
+            )
+            self._channels[session_id] = channel
+        return channel
 
     async def close_session(self, session_id: str) -> None:
         """Remove queues associated with a session."""
 
-        async with self._lock:
-            self._channels.pop(session_id, None)
+        channel = self._channels.pop(session_id, None)
+        if channel is not None and channel.feeder is not None:
+            channel.feeder.cancel()
+        self._metrics.end_session(session_id)
+
+    def interrupt_audio(self, session_id: str) -> None:
+        """Drop the session's queued TTS audio at once (barge-in or seek).
+
+        If the client may be mid-stream it is sent an end marker, so it
+        stops waiting for the rest of the interrupted audio.
+        """
+
+        channel = self._channels.get(session_id)
+        if channel is None:
+            return
+        dropped = channel.outbound.drop_audio() + len(channel.audio_backlog)
+        channel.audio_backlog.clear()
+        if channel.pacer.flush() or dropped:
+            channel.outbound.put(AudioFrame(type=FrameType.TTS_AUDIO_END, seq=channel.tts_seq))
 
     async def route_inbound(self, session_id: str, payload: dict) -> None:
         """Handle inbound WebSocket messages.
 
-        For now this implementation emits synthetic responses so that the
-        server can be exercised end-to-end before the Dora graph is wired up.
+        Without a dataflow connection synthetic responses are emitted instead.
         """
 
         message = _client_adapter.validate_python(payload)
         LOGGER.debug("Inbound WS message: %s", message)
+        self._metrics.ws_messages.inc(kind=message.type)
+        if message.type == "user.playback.ack":
+            channel = self._channels.get(session_id)
+            if channel is not None:
+                channel.pacer.ack(message.seq)
+            return
+        if message.type == "user.question.text":
+            self._metrics.turn_event(session_id, "question")
+            # A new question supersedes the answer still being spoken
+            self.interrupt_audio(session_id)
+
+        if self._bridge is not None:
+            metadata = {"session_id": session_id}
+            if message.type == "user.question.text":
+                self._bridge.send("text", message.text, metadata)
+            elif message.type == "user.control":
+                self._bridge.send("control", message.action, metadata)
+            elif message.type == "user.audio.chunk":
+                await self.route_audio(
+                    session_id,
+                    AudioFrame(
+                        type=FrameType.USER_AUDIO_CHUNK,
+                        seq=message.seq,
+                        payload=base64.b64decode(message.base64),
+                    ),
+                )
+            elif message.type == "user.audio.end":
+                self._bridge.send("audio_end", [message.seq], metadata)
+            return
 
         if message.type == "user.question.text":
             await self._simulate_tutor_answer(session_id, message.text)
@@ -64,6 +224,139 @@ class DataflowAdapter:
         else:
             LOGGER.debug("No-op handler for message type %s", message.type)
 
+    async def route_audio(self, session_id: str, frame: AudioFrame) -> None:
+        """Handle a binary audio frame from the client.
+
+        PCM is forwarded to the ``audio`` output as float32 samples, the
+        format the ASR nodes consume. Opus frames are not decoded server-side.
+        """
+
+        self._metrics.ws_messages.inc(kind="binary_audio")
+        if self._bridge is None:
+            LOGGER.debug(
+                "Inbound audio frame for %s: type=%s seq=%d bytes=%d",
+                session_id,
+                frame.type.name,
+                frame.seq,
+                len(frame.payload),
+            )
+            return
+
+        metadata = {"session_id": session_id, "seq": frame.seq}
+        if frame.is_end:
+            self._bridge.send("audio_end", [frame.seq], metadata)
+            return
+
+        import numpy as np
+
+        if frame.sample_format == SampleFormat.PCM_S16LE:
+            samples = np.frombuffer(frame.payload, dtype="<i2").astype(np.float32) / 32768.0
+        elif frame.sample_format == SampleFormat.PCM_F32LE:
+            samples = np.frombuffer(frame.payload, dtype="<f4")
+        else:
+            LOGGER.warning("Dropping %s audio frame for %s", frame.sample_format.name, session_id)
+            return
+        self._bridge.send("audio", samples, metadata)
+
+    def _on_event(self, event: DoraEvent) -> None:
+        """Route a dataflow input to its session; runs on the event loop."""
+
+        self._metrics.dataflow_events.inc(input=event.input_id)
+        if event.input_id.endswith("metrics"):
+            self._ingest_metrics(event)
+            return
+        if event.input_id in _TIMING_INPUTS:
+            self._metrics.turn_event(event.session_id or "", _TIMING_INPUTS[event.input_id])
+            return
+
+        handler = self._input_handlers.get(event.input_id)
+        if handler is None and event.input_id not in _BARGE_IN_INPUTS:
+            LOGGER.debug("Ignoring dataflow input '%s'", event.input_id)
+            return
+
+        session_id = event.session_id
+        turn_event = _TURN_EVENTS.get(event.input_id)
+        if turn_event is not None:
+            self._metrics.turn_event(session_id or "", turn_event)
+        if session_id is None:
+            targets: List[SessionChannels] = list(self._channels.values())
+        else:
+            channel = self._channels.get(session_id)
+            if channel is None:
+                self.unrouted += 1
+                LOGGER.debug("Dropping '%s' for closed session %s", event.input_id, session_id)
+                return
+            targets = [channel]
+
+        if handler is None:
+            for session in ([session_id] if session_id is not None else list(self._channels)):
+                self.interrupt_audio(session)
+            return
+        for channel in targets:
+            message = handler(channel, event)
+            if isinstance(message, AudioFrame):
+                self._put_audio(channel, message)
+            else:
+                channel.outbound.put(message)
+
+    def _put_audio(self, channel: SessionChannels, frame: AudioFrame) -> None:
+        """Queue TTS audio without dropping it when the client lags.
+
+        The dataflow cannot be paused for one session, since all sessions
+        share one node, so audio the outbox has no room for waits in the
+        session's backlog. It is discarded only on barge-in or close.
+        """
+
+        if not channel.audio_backlog and len(channel.outbound) < channel.outbound.maxsize:
+            channel.outbound.put(frame)
+            return
+        channel.audio_backlog.append(frame)
+        if channel.feeder is None or channel.feeder.done():
+            channel.feeder = asyncio.get_running_loop().create_task(self._feed_audio(channel))
+
+    @staticmethod
+    async def _feed_audio(channel: SessionChannels) -> None:
+        while channel.audio_backlog:
+            await channel.outbound.wait_for_space()
+            if channel.audio_backlog:
+                channel.outbound.put(channel.audio_backlog.popleft())
+
+    def _ingest_metrics(self, event: DoraEvent) -> None:
+        values = event.value.to_pylist() if hasattr(event.value, "to_pylist") else [event.value]
+        for value in values:
+            try:
+                record = json.loads(value) if isinstance(value, str) else dict(value)
+            except (TypeError, ValueError):
+                LOGGER.debug("Ignoring malformed metric from '%s'", event.input_id)
+                continue
+            self._metrics.ingest(record, event.session_id)
+
+    def queue_stats(self) -> Dict[str, float]:
+        """Outbound queue depth, drops and lag aggregated over sessions."""
+
+        snapshots = [channel.outbound.snapshot() for channel in self._channels.values()]
+        return {
+            "depth": sum(snapshot["depth"] for snapshot in snapshots),
+            "max_depth": max((snapshot["depth"] for snapshot in snapshots), default=0),
+            "dropped": sum(snapshot["dropped"] for snapshot in snapshots),
+            "max_lag_ms": max((snapshot["last_lag_ms"] for snapshot in snapshots), default=0.0),
+        }
+
+    def _tts_chunk(self, channel: SessionChannels, event: DoraEvent) -> AudioFrame:
+        channel.tts_seq += 1
+        sample_rate = event.metadata.get("sample_rate")
+        if sample_rate:
+            channel.pacer.sample_rate = int(sample_rate)
+        return AudioFrame(
+            type=FrameType.TTS_AUDIO_CHUNK,
+            seq=channel.tts_seq,
+            sample_format=SampleFormat.PCM_F32LE,
+            payload=_event_pcm_f32(event),
+        )
+
+    def _tts_end(self, channel: SessionChannels, event: DoraEvent) -> AudioFrame:
+        return AudioFrame(type=FrameType.TTS_AUDIO_END, seq=channel.tts_seq)
+
     async def _simulate_tutor_answer(self, session_id: str, text: str) -> None:
         channel = await self.ensure_session(session_id)
         response = TutorAnswerText(
@@ -71,17 +364,32 @@ class DataflowAdapter:
                 "(stub) 我已经收到你的问题：“" + text + "”。完整的数据流集成将填充实际回答。"
             )
         )
-        await channel.outbound.put(response)
+        channel.outbound.put(response)
 
     async def _simulate_slide_response(self, session_id: str, action: str) -> None:
         channel = await self.ensure_session(session_id)
         section_id = "intro" if action == "prev" else "quadratic_formula"
         response = SlideGoto(section_id=section_id)
-        await channel.outbound.put(response)
+        channel.outbound.put(response)
 
-    async def next_outbound(self, session_id: str) -> ServerMessage:
+    async def next_outbound(self, session_id: str) -> OutboundMessage:
         """Await the next outbound message destined for the client."""
 
         channel = await self.ensure_session(session_id)
-        message = await channel.outbound.get()
-        return _server_adapter.validate_python(message)
+        return await channel.outbound.get()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-session queue depth, drop counts and delivery lag."""
+
+        return {
+            "connected": self.connected,
+            "unrouted": self.unrouted,
+            "sessions": {
+                session_id: {
+                    **channel.outbound.snapshot(),
+                    **channel.pacer.snapshot(),
+                    "audio_backlog": len(channel.audio_backlog),
+                }
+                for session_id, channel in self._channels.items()
+            },
+        }
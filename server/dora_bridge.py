@@ -0,0 +1,119 @@
+"""Connection to the Dora graph as a dynamic node.
+
+The server attaches to a running dataflow the same way ``wserver`` does in
+``apps/openai-chat/dataflow.yml``: a node declared with ``path: dynamic`` is
+started by this process under its node id. One connection is shared by all
+websocket sessions; the session is carried in the ``session_id`` metadata key.
+
+A Dora ``Node`` must only be used from the thread that polls it, so the
+bridge owns a dedicated thread. Inputs are handed to the asyncio loop with
+``call_soon_threadsafe`` and outputs requested from the loop are queued and
+sent by the bridge thread between polls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# How long the bridge thread blocks in node.next() before flushing sends
+POLL_INTERVAL = 0.02
+
+
+@dataclass(slots=True)
+class DoraEvent:
+    """An input event received from the dataflow."""
+
+    input_id: str
+    value: Any
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.metadata.get("session_id")
+
+
+class DoraBridge:
+    """Own a Dora dynamic node on a background thread."""
+
+    def __init__(self, node_id: str, on_event: Callable[[DoraEvent], None]) -> None:
+        self.node_id = node_id
+        self._on_event = on_event
+        self._sends: "queue.Queue[tuple]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Connect to the dataflow and start polling for inputs."""
+
+        try:
+            from dora import Node
+        except ImportError as exc:  # pragma: no cover - depends on deployment
+            raise RuntimeError(
+                "dora-rs is required to connect the server to a dataflow"
+            ) from exc
+
+        self._loop = loop
+        node = Node(self.node_id)
+        self._thread = threading.Thread(
+            target=self._run, args=(node,), name=f"dora-{self.node_id}", daemon=True
+        )
+        self._thread.start()
+        LOGGER.info("Connected to dataflow as dynamic node '%s'", self.node_id)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def send(self, output_id: str, value: Any, metadata: Dict[str, Any]) -> None:
+        """Queue an output; safe to call from the event loop."""
+
+        self._sends.put((output_id, value, metadata))
+
+    def _run(self, node: Any) -> None:
+        import pyarrow as pa
+
+        while not self._stop.is_set():
+            self._flush_sends(node, pa)
+            event = node.next(timeout=POLL_INTERVAL)
+            if event is None:
+                continue
+            if event["type"] == "STOP":
+                LOGGER.info("Dataflow stopped; closing bridge")
+                break
+            if event["type"] != "INPUT":
+                continue
+            dora_event = DoraEvent(
+                input_id=event["id"],
+                value=event["value"],
+                metadata=dict(event.get("metadata") or {}),
+            )
+            self._loop.call_soon_threadsafe(self._on_event, dora_event)
+        self._flush_sends(node, pa)
+
+    def _flush_sends(self, node: Any, pa: Any) -> None:
+        while True:
+            try:
+                output_id, value, metadata = self._sends.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if isinstance(value, str):
+                    value = pa.array([value])
+                elif not isinstance(value, pa.Array):
+                    value = pa.array(value)
+                node.send_output(output_id, value, metadata=metadata)
+            except Exception:  # pragma: no cover - surfaced in logs only
+                LOGGER.exception("Failed to send '%s' to the dataflow", output_id)
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import PlainTextResponse
 
 from .config import Settings
+from .dataflow import DataflowAdapter
 from .lecture_store import BranchNotFoundError, LectureNotFoundError, LectureStore
+from .metrics import ServerMetrics
 from .models import (
     BranchResponse,
     HealthResponse,
@@ -13,11 +16,16 @@ from .models import (
     SessionCreateRequest,
     SessionCreateResponse,
 )
+from .precompressed import json_response
 from .sessions import SessionManager
 
 
 def create_http_router(
-    settings: Settings, session_manager: SessionManager, lectures: LectureStore
+    settings: Settings,
+    session_manager: SessionManager,
+    lectures: LectureStore,
+    dataflow: DataflowAdapter,
+    metrics: ServerMetrics,
 ) -> APIRouter:
     """Build the HTTP API router."""
 
@@ -27,6 +35,16 @@ def create_http_router(
     async def health() -> HealthResponse:
         return HealthResponse(ok=True, version=settings.version)
 
+    @router.get("/metrics", response_class=PlainTextResponse)
+    async def prometheus_metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    @router.get("/dataflow/metrics")
+    async def dataflow_metrics() -> dict:
+        return dataflow.metrics()
+
     @router.post("/sessions", response_model=SessionCreateResponse)
     async def create_session(payload: SessionCreateRequest) -> SessionCreateResponse:
         try:
@@ -37,13 +55,15 @@ def create_http_router(
                 detail=f"Unknown lecture_id '{payload.lecture_id}'",
             ) from exc
         session = await session_manager.create_session(payload)
-        ws_url = settings.ws_url_template.format(session_id=session.session_id)
+        ws_url = settings.ws_url_template.format(
+            session_id=session.session_id, port=settings.port
+        )
         return SessionCreateResponse(session_id=session.session_id, ws_url=ws_url)
 
     @router.get("/lectures/{lecture_id}", response_model=Lecture)
-    async def get_lecture(lecture_id: str) -> Lecture:
+    async def get_lecture(lecture_id: str, request: Request) -> Response:
         try:
-            return lectures.get_lecture(lecture_id)
+            return json_response(request, lectures.lecture_body(lecture_id))
         except LectureNotFoundError as exc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -51,14 +71,14 @@ def create_http_router(
             ) from exc
 
     @router.get("/lectures/{lecture_id}/branch/{branch_id}", response_model=BranchResponse)
-    async def get_branch(lecture_id: str, branch_id: str) -> BranchResponse:
+    async def get_branch(lecture_id: str, branch_id: str, request: Request) -> Response:
         try:
-            branch = lectures.get_branch(lecture_id, branch_id)
+            body = lectures.branch_body(lecture_id, branch_id)
         except (LectureNotFoundError, BranchNotFoundError) as exc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Unknown branch '{branch_id}' for lecture '{lecture_id}'",
             ) from exc
-        return BranchResponse(lecture_id=lecture_id, branch=branch)
+        return json_response(request, body)
 
     return router
@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
 from pathlib import Path
 from threading import RLock
-from typing import Dict
+from typing import Callable, Dict, Optional, Tuple
 
 import yaml
 
-from .models import Lecture, LectureBranch
+from .models import BranchResponse, Lecture, LectureBranch, LectureSection
+from .precompressed import PrecompressedBody
+
+LOGGER = logging.getLogger(__name__)
 
 
 class LectureNotFoundError(KeyError):
@@ -19,41 +26,176 @@ class BranchNotFoundError(KeyError):
     """Raised when a requested branch is missing."""
 
 
+class SectionNotFoundError(KeyError):
+    """Raised when a requested section is missing."""
+
+
+@dataclass(slots=True)
+class _IndexedLecture:
+    """A lecture with its sections and branches indexed by id."""
+
+    lecture: Lecture
+    sections: Dict[str, LectureSection]
+    branches: Dict[str, LectureBranch]
+    # Encoded response bodies, built on first request
+    bodies: Dict[Tuple[str, ...], PrecompressedBody] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, lecture: Lecture) -> "_IndexedLecture":
+        return cls(
+            lecture=lecture,
+            sections={section.id: section for section in lecture.sections},
+            branches={branch.id: branch for branch in lecture.branches},
+        )
+
+
 class LectureStore:
-    """Simple in-memory cache of lecture configurations."""
+    """In-memory cache of lecture configurations.
+
+    ``reload`` re-parses only the ``lecture_*.yml`` files whose size or
+    modification time changed and drops lectures whose file disappeared.
+    ``start`` polls for such changes every ``reload_interval`` seconds.
+    A file that fails to parse fails the initial load; later it is logged
+    and skipped until it changes again.
+    """
 
-    def __init__(self, config_dir: Path) -> None:
+    def __init__(self, config_dir: Path, reload_interval: float = 0.0) -> None:
         self._config_dir = config_dir
-        self._lectures: Dict[str, Lecture] = {}
+        self.reload_interval = reload_interval
+        self._watcher: Optional[asyncio.Task] = None
+        self._lectures: Dict[str, _IndexedLecture] = {}
+        # path -> (mtime_ns, size, lecture id)
+        self._files: Dict[Path, Tuple[int, int, str]] = {}
+        # path -> (mtime_ns, size) of files that last failed to load
+        self._failed: Dict[Path, Tuple[int, int]] = {}
         self._lock = RLock()
-        self._load_all()
+        self.reload(strict=True)
+
+    def reload(self, strict: bool = False) -> list[str]:
+        """Load new or changed lecture files; returns the affected lecture ids.
+
+        With ``strict`` a file that fails to load raises instead of being
+        skipped.
+        """
 
-    def _load_all(self) -> None:
+        changed: list[str] = []
         with self._lock:
+            seen = set()
             for path in sorted(self._config_dir.glob("lecture_*.yml")):
-                with path.open("r", encoding="utf-8") as handle:
-                    raw = yaml.safe_load(handle)
-                lecture = Lecture.model_validate(raw)
-                self._lectures[lecture.id] = lecture
+                seen.add(path)
+                stat = path.stat()
+                previous = self._files.get(path)
+                version = (stat.st_mtime_ns, stat.st_size)
+                if (previous is not None and previous[:2] == version) or self._failed.get(path) == version:
+                    continue
+                try:
+                    with path.open("r", encoding="utf-8") as handle:
+                        raw = yaml.safe_load(handle)
+                    lecture = Lecture.model_validate(raw)
+                except Exception:
+                    if strict:
+                        raise
+                    # Keep serving the last good version, if any, while the file is being edited
+                    LOGGER.exception("Failed to reload %s", path)
+                    self._failed[path] = version
+                    continue
+                self._failed.pop(path, None)
+                if previous is not None and previous[2] != lecture.id:
+                    self._lectures.pop(previous[2], None)
+                    changed.append(previous[2])
+                self._lectures[lecture.id] = _IndexedLecture.build(lecture)
+                self._files[path] = (*version, lecture.id)
+                changed.append(lecture.id)
+
+            for path in set(self._failed) - seen:
+                del self._failed[path]
+            for path in set(self._files) - seen:
+                _, _, lecture_id = self._files.pop(path)
+                self._lectures.pop(lecture_id, None)
+                changed.append(lecture_id)
+
+        if changed:
+            LOGGER.info("Loaded lectures: %s", ", ".join(changed))
+        return changed
+
+    async def start(self) -> None:
+        """Start watching the config directory if reloading is enabled."""
+
+        if self.reload_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._watcher
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception:  # pragma: no cover - keep watching after errors
+                LOGGER.exception("Lecture reload failed")
+
+    def _indexed(self, lecture_id: str) -> _IndexedLecture:
+        try:
+            return self._lectures[lecture_id]
+        except KeyError as exc:  # pragma: no cover - simple mapping access
+            raise LectureNotFoundError(lecture_id) from exc
 
     def get_lecture(self, lecture_id: str) -> Lecture:
         """Return the lecture data for ``lecture_id``."""
 
+        return self._indexed(lecture_id).lecture
+
+    def get_section(self, lecture_id: str, section_id: str) -> LectureSection:
+        """Return a main-line section of the given lecture."""
+
         try:
-            return self._lectures[lecture_id]
-        except KeyError as exc:  # pragma: no cover - simple mapping access
-            raise LectureNotFoundError(lecture_id) from exc
+            return self._indexed(lecture_id).sections[section_id]
+        except KeyError as exc:
+            raise SectionNotFoundError(section_id) from exc
 
     def get_branch(self, lecture_id: str, branch_id: str) -> LectureBranch:
         """Return branch content for the given lecture."""
 
-        lecture = self.get_lecture(lecture_id)
-        for branch in lecture.branches:
-            if branch.id == branch_id:
-                return branch
-        raise BranchNotFoundError(branch_id)
+        try:
+            return self._indexed(lecture_id).branches[branch_id]
+        except KeyError as exc:
+            raise BranchNotFoundError(branch_id) from exc
 
     def list_lectures(self) -> list[Lecture]:
         """Return all available lectures."""
 
-        return list(self._lectures.values())
+        return [indexed.lecture for indexed in self._lectures.values()]
+
+    def lecture_body(self, lecture_id: str) -> PrecompressedBody:
+        """Encoded JSON for ``GET /lectures/{lecture_id}``."""
+
+        indexed = self._indexed(lecture_id)
+        return self._body(indexed, ("lecture",), lambda: indexed.lecture)
+
+    def branch_body(self, lecture_id: str, branch_id: str) -> PrecompressedBody:
+        """Encoded JSON for ``GET /lectures/{lecture_id}/branch/{branch_id}``."""
+
+        indexed = self._indexed(lecture_id)
+        branch = self.get_branch(lecture_id, branch_id)
+        return self._body(
+            indexed,
+            ("branch", branch_id),
+            lambda: BranchResponse(lecture_id=lecture_id, branch=branch),
+        )
+
+    @staticmethod
+    def _body(
+        indexed: _IndexedLecture, key: Tuple[str, ...], build: Callable
+    ) -> PrecompressedBody:
+        body = indexed.bodies.get(key)
+        if body is None:
+            # A reload swaps in a new _IndexedLecture, which drops stale bodies
+            payload = build().model_dump_json(by_alias=True).encode("utf-8")
+            body = PrecompressedBody.from_json(payload)
+            indexed.bodies[key] = body
+        return body
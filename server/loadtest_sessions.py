@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Load test for session registry eviction.
+
+Creates sessions in rounds (10k by default), attaches and detaches each one
+with its dataflow channel the way the websocket endpoint does, then runs the
+sweeper with a short idle TTL. Memory is measured with tracemalloc after
+every round. The run fails if the registry or the channel map keep entries
+after eviction, or if memory keeps growing after the first round.
+
+    python -m server.loadtest_sessions --sessions 10000 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+
+from .dataflow import DataflowAdapter
+from .models import SessionCreateRequest
+from .sessions import SessionManager
+
+# Allowed growth between the first and last round once the registry is warm
+MEMORY_GROWTH_TOLERANCE_KB = 512
+
+
+async def run_round(
+    sessions: SessionManager, dataflow: DataflowAdapter, count: int, cycles: int, ttl: float
+) -> dict:
+    request = SessionCreateRequest(lecture_id="quadratic", locale="zh-CN", mode="live")
+
+    start = time.perf_counter()
+    session_ids = [(await sessions.create_session(request)).session_id for _ in range(count)]
+    create_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for session_id in session_ids:
+            await sessions.get(session_id)
+            await sessions.mark_connected(session_id)
+            await dataflow.ensure_session(session_id)
+            await sessions.detach(session_id)
+    attach_time = time.perf_counter() - start
+
+    peak_sessions = len(sessions)
+    await asyncio.sleep(ttl)
+    evicted = await sessions.sweep()
+
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    return {
+        "create_per_sec": count / create_time,
+        "attach_detach_per_sec": count * cycles / attach_time,
+        "peak_sessions": peak_sessions,
+        "evicted": evicted,
+        "remaining_sessions": len(sessions),
+        "remaining_channels": len(dataflow.metrics()["sessions"]),
+        "memory_kb": current / 1024,
+    }
+
+
+async def main_async(args) -> bool:
+    sessions = SessionManager(idle_ttl=args.ttl, max_sessions=args.sessions)
+    dataflow = DataflowAdapter()
+    sessions.add_eviction_hook(dataflow.close_session)
+
+    tracemalloc.start()
+    results = []
+    for index in range(args.rounds):
+        result = await run_round(sessions, dataflow, args.sessions, args.cycles, args.ttl)
+        results.append(result)
+        print(f"round {index + 1}: {result['create_per_sec']:>10,.0f} create/s  "
+              f"{result['attach_detach_per_sec']:>10,.0f} attach+detach/s  "
+              f"peak {result['peak_sessions']:>6}  evicted {result['evicted']:>6}  "
+              f"left {result['remaining_sessions']}/{result['remaining_channels']}  "
+              f"mem {result['memory_kb']:>8.0f} KiB")
+    tracemalloc.stop()
+
+    ok = True
+    if any(r["remaining_sessions"] or r["remaining_channels"] for r in results):
+        print("❌ Sessions or channels survived eviction")
+        ok = False
+    if len(results) > 1:
+        growth = results[-1]["memory_kb"] - results[0]["memory_kb"]
+        print(f"Memory growth after round 1: {growth:+.0f} KiB")
+        if growth > MEMORY_GROWTH_TOLERANCE_KB:
+            print("❌ Memory is not flat across rounds")
+            ok = False
+    print("✅ Session registry stays bounded" if ok else "❌ Load test failed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session registry load test")
+    parser.add_argument("--sessions", type=int, default=10_000, help="Sessions per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--cycles", type=int, default=3, help="Attach/detach cycles per session")
+    parser.add_argument("--ttl", type=float, default=0.1, help="Idle TTL in seconds")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
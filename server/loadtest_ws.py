@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+WebSocket load generator for the lecture server.
+
+Each simulated student creates a session through ``POST /sessions`` and then
+holds one websocket open. On it the student:
+
+  - streams PCM as ``user.audio.chunk`` in real time (20 ms frames), from a
+    16 kHz mono WAV file or a synthetic tone, closing each utterance with
+    ``user.audio.end``;
+  - asks a ``user.question.text`` every few seconds and flips slides with
+    ``user.control``, with jitter so clients do not move in lockstep;
+  - records the latency from each question to the first
+    ``tutor.answer.text`` and from each control to the next ``slide.goto``,
+    message/byte throughput in both directions, and gaps in TTS audio
+    sequence numbers (chunks the server dropped).
+
+``--offline`` starts the app in-process without a dataflow node, so the
+stub DataflowAdapter answers and the harness runs with no graph or models.
+Results are printed and written as a JSON report:
+
+    python -m server.loadtest_ws --offline --clients 200 --duration 30
+    python -m server.loadtest_ws --url http://localhost:8000 --clients 50 --binary
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import socket
+import struct
+import sys
+import time
+import wave
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from .audio_frames import (
+    AUDIO_SUBPROTOCOL,
+    AudioFrame,
+    FrameType,
+    SampleFormat,
+    decode_audio_frame,
+    encode_audio_frame,
+)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+UTTERANCE_SECONDS = 3.0
+
+QUESTIONS = [
+    "为什么判别式小于零时没有实数解？",
+    "配方法的第一步是什么？",
+    "维也塔公式可以用来做什么？",
+    "求根公式里的正负号是什么意思？",
+]
+
+
+@dataclass
+class ClientStats:
+    """What one simulated student observed."""
+
+    connected: bool = False
+    error: Optional[str] = None
+    sent: Counter = field(default_factory=Counter)
+    received: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    seq_gaps: int = 0
+
+
+def load_pcm(path: Optional[str]) -> bytes:
+    """16-bit mono PCM at 16 kHz: from a WAV file, or a 1 s synthetic tone."""
+
+    if path:
+        with wave.open(path, "rb") as handle:
+            if (handle.getframerate(), handle.getnchannels(), handle.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                raise SystemExit(f"{path}: expected 16 kHz mono 16-bit PCM")
+            return handle.readframes(handle.getnframes())
+    samples = (
+        int(8000 * math.sin(2 * math.pi * 220 * n / SAMPLE_RATE) * (0.5 + 0.5 * math.sin(n / 800)))
+        for n in range(SAMPLE_RATE)
+    )
+    return struct.pack(f"<{SAMPLE_RATE}h", *samples)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class SimulatedStudent:
+    def __init__(self, index: int, args: argparse.Namespace, pcm: bytes) -> None:
+        self.index = index
+        self.args = args
+        self.pcm = pcm
+        self.stats = ClientStats()
+        self._pending: Dict[str, List[float]] = defaultdict(list)
+        self._last_tts_seq: Optional[int] = None
+        self._rng = random.Random(index)
+
+    async def run(self, http: httpx.AsyncClient, deadline: float) -> None:
+        try:
+            response = await http.post(
+                "/sessions",
+                json={"lecture_id": self.args.lecture, "locale": "zh-CN", "mode": "live"},
+            )
+            response.raise_for_status()
+            ws_url = response.json()["ws_url"]
+            if self.args.ws_base:
+                ws_url = self.args.ws_base.rstrip("/") + ws_url[ws_url.index("/ws/"):]
+            subprotocols = [AUDIO_SUBPROTOCOL] if self.args.binary else None
+            async with websockets.connect(ws_url, subprotocols=subprotocols, max_size=None) as ws:
+                self.stats.connected = True
+                binary = ws.subprotocol == AUDIO_SUBPROTOCOL
+                tasks = [
+                    asyncio.create_task(self._receive(ws)),
+                    asyncio.create_task(self._send_audio(ws, binary, deadline)),
+                    asyncio.create_task(self._send_interactions(ws, deadline)),
+                ]
+                await asyncio.sleep(max(deadline - time.monotonic(), 0))
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as exc:  # reported per client, the run continues
+            self.stats.error = f"{type(exc).__name__}: {exc}"
+
+    def unanswered(self) -> int:
+        """Questions and controls still waiting for their reply."""
+
+        return sum(len(pending) for pending in self._pending.values())
+
+    async def _send(self, ws, payload, kind: str) -> None:
+        await ws.send(payload)
+        self.stats.sent[kind] += 1
+        self.stats.bytes_sent += len(payload)
+
+    async def _send_audio(self, ws, binary: bool, deadline: float) -> None:
+        frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+        frames_per_utterance = int(UTTERANCE_SECONDS * 1000 / FRAME_MS)
+        offset = self._rng.randrange(0, max(len(self.pcm) - frame_bytes, 1), 2)
+        seq = 0
+        next_send = time.monotonic()
+        while time.monotonic() < deadline:
+            chunk = self.pcm[offset:offset + frame_bytes]
+            offset = (offset + frame_bytes) % max(len(self.pcm) - frame_bytes, 1)
+            seq += 1
+            if binary:
+                await self._send(ws, encode_audio_frame(
+                    AudioFrame(FrameType.USER_AUDIO_CHUNK, seq, SampleFormat.PCM_S16LE, chunk)
+                ), "user.audio.chunk")
+            else:
+                await self._send(ws, json.dumps({
+                    "type": "user.audio.chunk",
+                    "seq": seq,
+                    "base64": base64.b64encode(chunk).decode("ascii"),
+                }), "user.audio.chunk")
+            if seq % frames_per_utterance == 0:
+                await self._send(ws, json.dumps({"type": "user.audio.end", "seq": seq}), "user.audio.end")
+            # Real-time pacing without drift
+            next_send += FRAME_MS / 1000
+            await asyncio.sleep(max(next_send - time.monotonic(), 0))
+
+    async def _send_interactions(self, ws, deadline: float) -> None:
+        await asyncio.sleep(self._rng.uniform(0, self.args.question_interval))
+        while time.monotonic() < deadline:
+            if self._rng.random() < self.args.control_ratio:
+                action = self._rng.choice(["next", "prev"])
+                self._pending["slide.goto"].append(time.monotonic())
+                await self._send(ws, json.dumps({"type": "user.control", "action": action}), "user.control")
+            else:
+                text = self._rng.choice(QUESTIONS)
+                self._pending["tutor.answer.text"].append(time.monotonic())
+                await self._send(ws, json.dumps({"type": "user.question.text", "text": text}),
+                                 "user.question.text")
+            interval = self.args.question_interval
+            await asyncio.sleep(self._rng.uniform(0.5 * interval, 1.5 * interval))
+
+    async def _receive(self, ws) -> None:
+        async for message in ws:
+            now = time.monotonic()
+            self.stats.bytes_received += len(message)
+            if isinstance(message, bytes):
+                frame = decode_audio_frame(message)
+                kind = "tts.audio.end" if frame.is_end else "tts.audio.chunk"
+                self._track_seq(kind, frame.seq)
+            else:
+                payload = json.loads(message)
+                kind = payload.get("type", "unknown")
+                if kind.startswith("tts.audio"):
+                    self._track_seq(kind, payload.get("seq", 0))
+            self.stats.received[kind] += 1
+            pending = self._pending.get(kind)
+            if pending:
+                self.stats.latencies[kind].append(now - pending.pop(0))
+
+    def _track_seq(self, kind: str, seq: int) -> None:
+        if kind != "tts.audio.chunk":
+            return
+        if self._last_tts_seq is not None and seq > self._last_tts_seq + 1:
+            self.stats.seq_gaps += seq - self._last_tts_seq - 1
+        self._last_tts_seq = seq
+
+
+def build_report(args: argparse.Namespace, students: List[SimulatedStudent], elapsed: float,
+                 server_stats: Optional[dict]) -> dict:
+    sent: Counter = Counter()
+    received: Counter = Counter()
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    for student in students:
+        sent.update(student.stats.sent)
+        received.update(student.stats.received)
+        for kind, values in student.stats.latencies.items():
+            latencies[kind].extend(values)
+        if student.stats.error:
+            errors[student.stats.error.split(":")[0]] += 1
+
+    unanswered = sum(student.unanswered() for student in students)
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_s": round(elapsed, 2),
+        "clients": {
+            "requested": len(students),
+            "connected": sum(student.stats.connected for student in students),
+            "failed": sum(student.stats.error is not None for student in students),
+            "errors": dict(errors),
+        },
+        "throughput": {
+            "sent_msgs_per_s": round(sum(sent.values()) / elapsed, 1),
+            "received_msgs_per_s": round(sum(received.values()) / elapsed, 1),
+            "sent_bytes_per_s": round(sum(s.stats.bytes_sent for s in students) / elapsed),
+            "received_bytes_per_s": round(sum(s.stats.bytes_received for s in students) / elapsed),
+        },
+        "sent": dict(sent),
+        "received": dict(received),
+        "latency": {kind: percentiles(values) for kind, values in latencies.items()},
+        "drops": {
+            "tts_seq_gaps": sum(student.stats.seq_gaps for student in students),
+            "unanswered_requests": unanswered,
+            "server": server_stats,
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_offline_server():
+    """Serve the app in-process with the stub dataflow adapter."""
+
+    import uvicorn
+
+    from .config import Settings
+    from .main import create_app
+
+    port = free_port()
+    settings = Settings(port=port, ws_url_template="ws://127.0.0.1:{port}/ws/{session_id}")
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(settings), host="127.0.0.1", port=port, log_level="warning",
+    ))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def run(args: argparse.Namespace) -> dict:
+    server = task = None
+    base_url = args.url
+    if args.offline:
+        server, task, base_url = await start_offline_server()
+        print(f"Offline mode: stub server on {base_url}")
+
+    pcm = load_pcm(args.wav)
+    students = [SimulatedStudent(index, args, pcm) for index in range(args.clients)]
+    limits = httpx.Limits(max_connections=max(args.clients, 10))
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as http:
+        start = time.monotonic()
+        deadline = start + args.ramp + args.duration
+        runs = []
+        for index, student in enumerate(students):
+            runs.append(asyncio.create_task(student.run(http, deadline)))
+            # Spread connection setup over the ramp-up period
+            if args.ramp and index < len(students) - 1:
+                await asyncio.sleep(args.ramp / len(students))
+        await asyncio.gather(*runs)
+        elapsed = time.monotonic() - start
+
+        server_stats = None
+        try:
+            server_stats = (await http.get("/dataflow/metrics")).json()
+            # Per-session detail is too large for the report; keep totals
+            sessions = server_stats.pop("sessions", {})
+            server_stats["outbox_dropped"] = sum(s.get("dropped", 0) for s in sessions.values())
+            server_stats["outbox_max_lag_ms"] = max(
+                (s.get("max_lag_ms", 0) for s in sessions.values()), default=0
+            )
+        except (httpx.HTTPError, ValueError):
+            pass
+
+    if server is not None:
+        server.should_exit = True
+        await task
+    return build_report(args, students, elapsed, server_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket load test for the lecture server")
+    parser.add_argument("--url", type=str, default="http://localhost:8000", help="Server base URL")
+    parser.add_argument("--ws-base", type=str, default=None,
+                        help="Override the host part of returned ws_url values, e.g. ws://lb:8000")
+    parser.add_argument("--offline", action="store_true", help="Run against an in-process stub server")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds at full load")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds to open all clients")
+    parser.add_argument("--lecture", type=str, default="quad_eq_v1")
+    parser.add_argument("--wav", type=str, default=None, help="16 kHz mono WAV to stream")
+    parser.add_argument("--binary", action="store_true", help=f"Negotiate {AUDIO_SUBPROTOCOL} frames")
+    parser.add_argument("--question-interval", type=float, default=8.0,
+                        help="Mean seconds between questions/controls per client")
+    parser.add_argument("--control-ratio", type=float, default=0.3,
+                        help="Fraction of interactions that are slide controls")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    clients = report["clients"]
+    print(f"\nClients: {clients['connected']}/{clients['requested']} connected, {clients['failed']} failed")
+    for key, value in report["throughput"].items():
+        print(f"  {key:<22} {value:,}")
+    for kind, stats in report["latency"].items():
+        if stats["count"]:
+            print(f"  {kind:<22} p50 {stats['p50_ms']}ms  p90 {stats['p90_ms']}ms  "
+                  f"p99 {stats['p99_ms']}ms  (n={stats['count']})")
+    print(f"  TTS seq gaps: {report['drops']['tts_seq_gaps']}, "
+          f"unanswered: {report['drops']['unanswered_requests']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResults saved to {args.output}")
+    else:
+        print("\n" + json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if clients["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 from fastapi import FastAPI
 
@@ -10,6 +12,9 @@ from .config import Settings, get_settings
 from .dataflow import DataflowAdapter
 from .http_api import create_http_router
 from .lecture_store import LectureStore
+from .metrics import ServerMetrics
+from .narration import NarrationStore
+from .session_store import create_session_store
 from .sessions import SessionManager
 from .ws_router import create_ws_router
 
@@ -18,13 +23,59 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     """Build a fully configured FastAPI application."""
 
     settings = settings or get_settings()
-    session_manager = SessionManager()
-    lecture_store = LectureStore(Path(settings.lecture_config_dir))
-    dataflow = DataflowAdapter()
+    session_manager = SessionManager(
+        idle_ttl=settings.session_idle_ttl,
+        max_sessions=settings.max_sessions,
+        sweep_interval=settings.session_sweep_interval,
+        store=create_session_store(settings.session_store_url, settings.session_idle_ttl),
+        worker_id=settings.worker_id,
+    )
+    lecture_store = LectureStore(
+        Path(settings.lecture_config_dir), reload_interval=settings.lecture_reload_interval
+    )
+    narration = NarrationStore(Path(settings.narration_dir), settings.narration_voice)
+    metrics = ServerMetrics()
+    dataflow = DataflowAdapter(
+        node_id=settings.dataflow_node_id,
+        queue_size=settings.outbound_queue_size,
+        metrics=metrics,
+        audio_lead=settings.audio_lead_seconds,
+        audio_buffer_seconds=settings.audio_buffer_seconds,
+        tts_sample_rate=settings.tts_sample_rate,
+    )
+    metrics.add_gauge(
+        "airos_active_sessions",
+        "Sessions held by this worker",
+        lambda: {(): len(session_manager)},
+    )
+    metrics.add_gauge(
+        "airos_outbound_queue",
+        "Outbound websocket queues summed or maxed over sessions",
+        lambda: {(stat,): value for stat, value in dataflow.queue_stats().items()},
+        labelnames=("stat",),
+    )
 
-    app = FastAPI(title="Airos Voice Agent Demo Server", version=settings.version)
-    app.include_router(create_http_router(settings, session_manager, lecture_store))
-    app.include_router(create_ws_router(session_manager, dataflow))
+    session_manager.add_eviction_hook(dataflow.close_session)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        await dataflow.start()
+        await session_manager.start()
+        await lecture_store.start()
+        try:
+            yield
+        finally:
+            await lecture_store.stop()
+            await session_manager.stop()
+            await dataflow.stop()
+
+    app = FastAPI(
+        title="Airos Voice Agent Demo Server", version=settings.version, lifespan=lifespan
+    )
+    app.include_router(
+        create_http_router(settings, session_manager, lecture_store, dataflow, metrics)
+    )
+    app.include_router(create_ws_router(session_manager, dataflow, lecture_store, narration))
 
     return app
 
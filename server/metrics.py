@@ -0,0 +1,275 @@
+"""Prometheus-style metrics for the lecture server.
+
+Only the text exposition format is implemented, so there is no dependency
+on ``prometheus_client``. Nodes report stage timings over their ``metrics``
+output as JSON objects::
+
+    {"node": "asr", "name": "asr_rtf", "value": 0.21, "ts": 1718000000.1,
+     "session_id": "sess_..."}
+
+``name`` selects what is recorded: ``speech_end``, ``asr_result``,
+``llm_first_token`` and ``tts_first_audio`` are turn events, and
+``asr_rtf``/``tts_rtf`` are observed directly. ``ts`` is wall-clock time on
+the same host, used to measure the gap between events of one turn.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.family} {self.documentation}", f"# TYPE {self.family} {self.kind}"]
+
+    @property
+    def family(self) -> str:
+        """Name of the metric family the samples belong to."""
+
+        return self.name
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    @property
+    def family(self) -> str:
+        return f"{self.name}_total"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.family}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A gauge whose values are read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self._collect().items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+@dataclass(slots=True)
+class _HistogramSeries:
+    counts: List[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries(counts=[0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series.counts[index] += 1
+                break
+        series.total += value
+        series.count += 1
+
+    def samples(self) -> Iterable[str]:
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{inf} {series.count}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series.total)}"
+            yield f"{self.name}_count{labels} {series.count}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+@dataclass(slots=True)
+class _Turn:
+    started: float
+    asr_result: Optional[float] = None
+    llm_first_token: Optional[float] = None
+
+
+class ServerMetrics:
+    """The metrics the server exposes, plus per-session turn tracking.
+
+    A turn starts at ``speech_end`` (or when a text question arrives) and
+    ends at the first synthesized audio. Stage latencies are measured
+    between consecutive events of the same session.
+    """
+
+    # Bound on sessions with an open turn, in case a turn never completes
+    MAX_OPEN_TURNS = 10_000
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.vad_to_asr = register(Histogram(
+            "airos_vad_to_asr_seconds", "Speech end to ASR result"))
+        self.asr_rtf = register(Histogram(
+            "airos_asr_rtf", "ASR processing time over audio duration", buckets=RTF_BUCKETS))
+        self.llm_first_token = register(Histogram(
+            "airos_llm_first_token_seconds", "ASR result (or text question) to first LLM text"))
+        self.tts_first_audio = register(Histogram(
+            "airos_tts_first_audio_seconds", "First LLM text to first synthesized audio"))
+        self.tts_rtf = register(Histogram(
+            "airos_tts_rtf", "TTS synthesis time over audio duration", buckets=RTF_BUCKETS))
+        self.turn_latency = register(Histogram(
+            "airos_turn_latency_seconds", "Speech end (or text question) to first audio"))
+        self.dataflow_events = register(Counter(
+            "airos_dataflow_events", "Inputs received from the dataflow", ("input",)))
+        self.ws_messages = register(Counter(
+            "airos_ws_messages", "WebSocket messages received from clients", ("kind",)))
+        self.node_metrics = register(Counter(
+            "airos_node_metrics", "Structured metric records received from nodes", ("node", "name")))
+        self._turns: "OrderedDict[str, _Turn]" = OrderedDict()
+
+    def add_gauge(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.registry.register(Gauge(name, documentation, collect, labelnames))
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def ingest(self, record: Dict[str, Any], session_id: Optional[str] = None) -> None:
+        """Record one structured metric from a node's ``metrics`` output."""
+
+        name = record.get("name", "")
+        self.node_metrics.inc(node=record.get("node", ""), name=name)
+        session = record.get("session_id") or session_id or ""
+        ts = float(record.get("ts") or time.time())
+        value = record.get("value")
+        if name == "asr_rtf" and value is not None:
+            self.asr_rtf.observe(float(value))
+        elif name == "tts_rtf" and value is not None:
+            self.tts_rtf.observe(float(value))
+        else:
+            self.turn_event(session, name, ts)
+
+    def turn_event(self, session: str, name: str, ts: Optional[float] = None) -> None:
+        """Advance the open turn of ``session`` with a named event."""
+
+        ts = ts if ts is not None else time.time()
+        if name in ("speech_end", "question"):
+            self._turns[session] = _Turn(started=ts)
+            self._turns.move_to_end(session)
+            while len(self._turns) > self.MAX_OPEN_TURNS:
+                self._turns.popitem(last=False)
+            return
+
+        if session not in self._turns and "" in self._turns:
+            # Nodes upstream of ASR may not know the session; use their turn
+            session = ""
+        turn = self._turns.get(session)
+        if turn is None:
+            return
+        if name == "asr_result" and turn.asr_result is None:
+            turn.asr_result = ts
+            self.vad_to_asr.observe(max(ts - turn.started, 0.0))
+        elif name == "llm_first_token" and turn.llm_first_token is None:
+            turn.llm_first_token = ts
+            reference = turn.asr_result if turn.asr_result is not None else turn.started
+            self.llm_first_token.observe(max(ts - reference, 0.0))
+        elif name == "tts_first_audio":
+            if turn.llm_first_token is not None:
+                self.tts_first_audio.observe(max(ts - turn.llm_first_token, 0.0))
+            self.turn_latency.observe(max(ts - turn.started, 0.0))
+            del self._turns[session]
+
+    def end_session(self, session_id: str) -> None:
+        self._turns.pop(session_id, None)
@@ -46,6 +46,9 @@ class LectureSection(BaseModel):
     id: str
     title: Optional[str] = None
     html: str
+    narration: Optional[str] = Field(
+        default=None, description="Text spoken for this slide; defaults to its visible text"
+    )
 
 
 class LectureBranch(BaseModel):
@@ -0,0 +1,187 @@
+"""Pre-rendered lecture narration used by replay-mode sessions.
+
+``python -m server.render_narration`` synthesizes every section and branch
+slide offline. It writes one file of little-endian float32 PCM per item and
+an ``index.json`` per lecture and voice::
+
+    <root>/<lecture id>/<voice>/index.json
+    <root>/<lecture id>/<voice>/<item id>.f32
+
+The index records, for each item, the digest of the text it was rendered
+from, the sample rate, the chunk size used for streaming and the start/end
+time of every sentence. Replay sessions read the chunks directly and never
+touch the TTS engine.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import re
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import Lecture
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump when rendering changes in a way that invalidates existing audio
+NARRATION_FORMAT_VERSION = 1
+INDEX_FILE = "index.json"
+BYTES_PER_SAMPLE = 4
+
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|\n+")
+
+
+@dataclass(slots=True)
+class NarrationItem:
+    """Text to narrate for one section or branch slide."""
+
+    item_id: str
+    text: str
+
+
+@dataclass(slots=True)
+class NarrationTrack:
+    """Index entry for one rendered item."""
+
+    item_id: str
+    digest: str
+    sample_rate: int
+    num_samples: int
+    chunk_samples: int
+    # (start_ms, end_ms, sentence)
+    sentences: List[Tuple[int, int, str]] = field(default_factory=list)
+
+    @property
+    def audio_file(self) -> str:
+        return f"{self.item_id}.f32"
+
+    @property
+    def duration_ms(self) -> int:
+        return self.num_samples * 1000 // self.sample_rate if self.sample_rate else 0
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.parts: List[str] = []
+
+    def handle_data(self, data: str) -> None:
+        self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of a slide, one line per block of text."""
+
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    lines = (line.strip() for line in "".join(extractor.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def narration_items(lecture: Lecture) -> List[NarrationItem]:
+    """Everything that needs audio in ``lecture``: sections, then branch slides."""
+
+    slides = list(lecture.sections)
+    for branch in lecture.branches:
+        slides.extend(branch.slides)
+    return [
+        NarrationItem(item_id=slide.id, text=slide.narration or html_to_text(slide.html))
+        for slide in slides
+    ]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_END.split(text) if part.strip()]
+
+
+def narration_digest(voice: str, text: str) -> str:
+    """Identify rendered audio by voice, text and format version."""
+
+    key = f"{NARRATION_FORMAT_VERSION}\0{voice}\0{text}".encode("utf-8")
+    return hashlib.sha1(key).hexdigest()
+
+
+def voice_dir(root: Path, lecture_id: str, voice: str) -> Path:
+    return root / lecture_id / voice.lower().replace(" ", "")
+
+
+def load_index(directory: Path) -> Dict[str, NarrationTrack]:
+    path = directory / INDEX_FILE
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as handle:
+        raw = json.load(handle)
+    tracks = {}
+    for entry in raw.get("items", []):
+        entry["sentences"] = [tuple(sentence) for sentence in entry.get("sentences", [])]
+        track = NarrationTrack(**entry)
+        tracks[track.item_id] = track
+    return tracks
+
+
+def save_index(directory: Path, tracks: Dict[str, NarrationTrack]) -> None:
+    path = directory / INDEX_FILE
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "version": NARRATION_FORMAT_VERSION,
+                "items": [asdict(track) for track in tracks.values()],
+            },
+            handle,
+            ensure_ascii=False,
+            indent=2,
+        )
+    tmp.replace(path)
+
+
+class NarrationStore:
+    """Read-only access to rendered narration for one voice.
+
+    Indexes are loaded lazily and reloaded when ``index.json`` changes, so a
+    re-render is picked up without restarting the server.
+    """
+
+    def __init__(self, root: Path, voice: str) -> None:
+        self.root = root
+        self.voice = voice
+        self._indexes: Dict[str, Tuple[int, Dict[str, NarrationTrack]]] = {}
+        self._lock = RLock()
+
+    def track(self, lecture_id: str, item_id: str) -> Optional[NarrationTrack]:
+        """Index entry for ``item_id``, or None if it was never rendered."""
+
+        return self._index(lecture_id).get(item_id)
+
+    def chunks(self, lecture_id: str, track: NarrationTrack) -> Iterator[bytes]:
+        """Yield the item's PCM in ``chunk_samples``-sized pieces."""
+
+        if track.num_samples == 0:
+            return
+        path = voice_dir(self.root, lecture_id, self.voice) / track.audio_file
+        chunk_bytes = track.chunk_samples * BYTES_PER_SAMPLE
+        with path.open("rb") as handle, mmap.mmap(
+            handle.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for offset in range(0, len(data), chunk_bytes):
+                yield data[offset:offset + chunk_bytes]
+
+    def _index(self, lecture_id: str) -> Dict[str, NarrationTrack]:
+        directory = voice_dir(self.root, lecture_id, self.voice)
+        try:
+            mtime = (directory / INDEX_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            cached = self._indexes.get(lecture_id)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, load_index(directory))
+                self._indexes[lecture_id] = cached
+            return cached[1]
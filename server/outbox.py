@@ -0,0 +1,193 @@
+"""Bounded per-session outbound queue with a drop/coalesce policy."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .audio_frames import AudioFrame, FrameType
+
+
+def is_droppable(message: Any) -> bool:
+    """Whether a message may be discarded when a client falls behind.
+
+    Only partial ASR hypotheses, which the next one supersedes. TTS audio is
+    paced instead: producers wait for room (``put_wait``) and it is dropped
+    only on barge-in (``drop_audio``). End markers, final transcripts,
+    answers and slide commands are never dropped, because clients rely on
+    them to settle state.
+    """
+
+    return getattr(message, "type", None) == "asr.partial"
+
+
+def _is_tts_chunk(message: Any) -> bool:
+    if isinstance(message, AudioFrame):
+        return message.type == FrameType.TTS_AUDIO_CHUNK
+    return getattr(message, "type", None) == "tts.audio.chunk"
+
+
+def _is_tts_audio(message: Any) -> bool:
+    """Chunks and end markers, which must reach the client in order."""
+
+    if isinstance(message, AudioFrame):
+        return message.type in (FrameType.TTS_AUDIO_CHUNK, FrameType.TTS_AUDIO_END)
+    return getattr(message, "type", None) in ("tts.audio.chunk", "tts.audio.end")
+
+
+@dataclass(slots=True)
+class OutboxMetrics:
+    """Counters describing how far a client lags behind the dataflow."""
+
+    enqueued: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    max_depth: int = 0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+    total_lag_ms: float = 0.0
+
+    def as_dict(self, depth: int) -> Dict[str, float]:
+        return {
+            "depth": depth,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "max_depth": self.max_depth,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "avg_lag_ms": round(self.total_lag_ms / self.delivered, 2) if self.delivered else 0.0,
+        }
+
+
+class SessionOutbox:
+    """Outbound messages for one websocket, bounded to ``maxsize``.
+
+    ``put`` never blocks the producer. An ``asr.partial`` replaces the
+    partial at the tail of the queue, if any. When the queue is full the oldest
+    partial is evicted. If none is left, an incoming partial is discarded
+    instead. Other messages are always accepted, so the bound may be
+    exceeded only by those; producers of bulk audio use ``put_wait`` to
+    stay within it.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.metrics = OutboxMetrics()
+        self._items: Deque[Tuple[float, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, message: Any) -> bool:
+        """Queue ``message``; returns False if it was dropped."""
+
+        now = time.monotonic()
+        if getattr(message, "type", None) == "asr.partial" and self._coalesce(message):
+            return True
+
+        if len(self._items) >= self.maxsize:
+            if not self._evict_droppable():
+                if is_droppable(message):
+                    self.metrics.dropped += 1
+                    return False
+
+        self._items.append((now, message))
+        self.metrics.enqueued += 1
+        self.metrics.max_depth = max(self.metrics.max_depth, len(self._items))
+        self._ready.set()
+        return True
+
+    async def put_wait(self, message: Any) -> None:
+        """Queue ``message`` once there is room, for producers that can wait."""
+
+        await self.wait_for_space()
+        self.put(message)
+
+    async def wait_for_space(self) -> None:
+        while len(self._items) >= self.maxsize:
+            self._space.clear()
+            await self._space.wait()
+
+    async def get(self, timeout: Optional[float] = None, include_audio: bool = True) -> Any:
+        """Wait for and return the next message, or None after ``timeout``.
+
+        With ``include_audio`` false, TTS audio is left queued and the first
+        other message is returned, so a paused audio stream does not hold up
+        answers or slide commands.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            index = self._next_index(include_audio)
+            if index is not None:
+                break
+            self._ready.clear()
+            if deadline is None:
+                await self._ready.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        if index == 0:
+            queued_at, message = self._items.popleft()
+        else:
+            queued_at, message = self._items[index]
+            del self._items[index]
+        self._space.set()
+        lag_ms = (time.monotonic() - queued_at) * 1000
+        self.metrics.delivered += 1
+        self.metrics.last_lag_ms = lag_ms
+        self.metrics.max_lag_ms = max(self.metrics.max_lag_ms, lag_ms)
+        self.metrics.total_lag_ms += lag_ms
+        return message
+
+    def snapshot(self) -> Dict[str, float]:
+        return self.metrics.as_dict(len(self._items))
+
+    def drop_audio(self) -> int:
+        """Discard queued TTS audio chunks, keeping everything else."""
+
+        kept = deque(item for item in self._items if not _is_tts_chunk(item[1]))
+        dropped = len(self._items) - len(kept)
+        if dropped:
+            self._items = kept
+            self._space.set()
+        return dropped
+
+    def _next_index(self, include_audio: bool) -> Optional[int]:
+        if include_audio:
+            return 0 if self._items else None
+        for index, (_, queued) in enumerate(self._items):
+            if not _is_tts_audio(queued):
+                return index
+        return None
+
+    def _coalesce(self, message: Any) -> bool:
+        # Only a partial at the tail: one queued before a final belongs to
+        # the previous utterance and must stay ahead of that final
+        if not self._items or getattr(self._items[-1][1], "type", None) != "asr.partial":
+            return False
+        # Keep the original enqueue time so lag reflects the oldest pending partial
+        self._items[-1] = (self._items[-1][0], message)
+        self.metrics.coalesced += 1
+        return True
+
+    def _evict_droppable(self) -> bool:
+        for index, (_, queued) in enumerate(self._items):
+            if is_droppable(queued):
+                del self._items[index]
+                self.metrics.dropped += 1
+                return True
+        return False
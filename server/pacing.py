@@ -0,0 +1,177 @@
+"""Real-time pacing of synthesized audio on its way to the client.
+
+TTS nodes produce audio in bursts: a dozen fragments at once, then nothing
+while the next sentence is synthesized. Forwarding them as they arrive makes
+the client either buffer without bound or run dry between bursts. The pacer
+sits between a session's outbox and its websocket and releases
+``tts.audio.chunk`` frames so the client holds roughly ``lead_seconds`` of
+audio that it has not played yet.
+
+The client's playback position comes from ``user.playback.ack`` messages
+(the seq of the last chunk it finished playing). Between acks, and for
+clients that never send them, playback is assumed to advance in real time.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from .audio_frames import AudioFrame, FrameType, SampleFormat
+
+_BYTES_PER_SAMPLE = {SampleFormat.PCM_S16LE: 2, SampleFormat.PCM_F32LE: 4}
+
+# Sent chunks remembered for mapping acks to playback positions
+_MAX_TRACKED_CHUNKS = 512
+# Slack on the lead so a wake-up right at ``delay()`` releases the chunk
+_TIMER_SLACK = 0.001
+
+
+def frame_seconds(frame: AudioFrame, sample_rate: int) -> float:
+    """Playback duration of an audio chunk; 0 for end markers and Opus."""
+
+    width = _BYTES_PER_SAMPLE.get(frame.sample_format)
+    if frame.is_end or width is None or sample_rate <= 0:
+        return 0.0
+    return len(frame.payload) / (width * sample_rate)
+
+
+@dataclass(slots=True)
+class PacerMetrics:
+    released: int = 0
+    interrupted: int = 0
+    underruns: int = 0
+    acks: int = 0
+
+
+class AudioPacer:
+    """Jitter buffer releasing one session's TTS audio at real-time rate.
+
+    Positions are seconds on a single timeline of sent audio. ``_anchor`` is
+    a known (position, monotonic time) pair, from the latest ack or from
+    the moment the client ran dry. Playback is extrapolated from it and never
+    passes what was sent. Audio is never dropped except by ``flush``. Once
+    ``max_buffered_seconds`` is pending the pacer is ``full`` and the
+    forwarder stops taking audio from the session's outbox, so producers
+    wait instead of the pacer growing without bound.
+    """
+
+    def __init__(
+        self,
+        lead_seconds: float = 0.5,
+        max_buffered_seconds: float = 10.0,
+        sample_rate: int = 32000,
+    ) -> None:
+        self.lead_seconds = lead_seconds
+        self.max_buffered_seconds = max_buffered_seconds
+        # Producers update this when the stream reports its rate
+        self.sample_rate = sample_rate
+        self.metrics = PacerMetrics()
+        self._pending: Deque[Tuple[AudioFrame, float]] = deque()
+        self._pending_seconds = 0.0
+        self._sent_position = 0.0
+        self._anchor = (0.0, time.monotonic())
+        self._positions: Deque[Tuple[int, float]] = deque(maxlen=_MAX_TRACKED_CHUNKS)
+        self._stream_open = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, frame: AudioFrame) -> None:
+        """Queue a chunk or end marker behind the audio already pending."""
+
+        seconds = frame_seconds(frame, self.sample_rate)
+        self._pending.append((frame, seconds))
+        self._pending_seconds += seconds
+
+    @property
+    def full(self) -> bool:
+        """Enough audio is pending; take no more until some is released."""
+
+        return self._pending_seconds >= self.max_buffered_seconds
+
+    def pop_ready(self, now: Optional[float] = None) -> Optional[AudioFrame]:
+        """Next frame if it may be sent now, else None."""
+
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        frame, seconds = self._pending[0]
+        if frame.type == FrameType.TTS_AUDIO_CHUNK:
+            if self._buffered(now) > self.lead_seconds + _TIMER_SLACK:
+                return None
+            if self._estimated_position(now) > self._sent_position:
+                # The client ran dry; restart the clock from what it has
+                self._anchor = (self._sent_position, now)
+                if self._stream_open:
+                    self.metrics.underruns += 1
+            self._sent_position += seconds
+            self._positions.append((frame.seq, self._sent_position))
+            self._stream_open = True
+        else:
+            self._stream_open = False
+        self._pending.popleft()
+        self._pending_seconds = self._pending_seconds - seconds if self._pending else 0.0
+        self.metrics.released += 1
+        return frame
+
+    def delay(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until ``pop_ready`` can return a frame; None when idle."""
+
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        if self._pending[0][0].type != FrameType.TTS_AUDIO_CHUNK:
+            return 0.0
+        return max(self._buffered(now) - self.lead_seconds, 0.0)
+
+    def ack(self, seq: int, now: Optional[float] = None) -> None:
+        """The client finished playing chunk ``seq``."""
+
+        now = time.monotonic() if now is None else now
+        self.metrics.acks += 1
+        while self._positions and self._positions[0][0] < seq:
+            self._positions.popleft()
+        if self._positions and self._positions[0][0] == seq:
+            self._anchor = (self._positions[0][1], now)
+
+    def flush(self) -> bool:
+        """Drop all pending audio (barge-in or seek).
+
+        Returns True if the client may be mid-stream and needs an end marker.
+        """
+
+        dropped = sum(1 for frame, _ in self._pending if frame.type == FrameType.TTS_AUDIO_CHUNK)
+        was_open = self._stream_open or dropped > 0
+        self._pending.clear()
+        self._pending_seconds = 0.0
+        self._positions.clear()
+        self._sent_position = 0.0
+        self._anchor = (0.0, time.monotonic())
+        self._stream_open = False
+        if dropped:
+            self.metrics.interrupted += dropped
+        return was_open
+
+    def snapshot(self) -> Dict[str, float]:
+        now = time.monotonic()
+        return {
+            "audio_pending": len(self._pending),
+            "audio_pending_ms": round(self._pending_seconds * 1000, 1),
+            "audio_buffered_ms": round(self._buffered(now) * 1000, 1),
+            "audio_released": self.metrics.released,
+            "audio_interrupted": self.metrics.interrupted,
+            "audio_underruns": self.metrics.underruns,
+            "audio_acks": self.metrics.acks,
+        }
+
+    def _estimated_position(self, now: float) -> float:
+        position, at = self._anchor
+        return position + (now - at)
+
+    def _buffered(self, now: float) -> float:
+        """Audio sent to the client that it has not played yet."""
+
+        return self._sent_position - min(self._estimated_position(now), self._sent_position)
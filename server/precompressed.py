@@ -0,0 +1,65 @@
+"""Cached, pre-encoded JSON bodies for static responses."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Preference order when the client accepts several encodings
+_ENCODINGS = ("br", "gzip")
+
+
+@dataclass(slots=True)
+class PrecompressedBody:
+    """A JSON body with its compressed variants and a content hash."""
+
+    identity: bytes
+    digest: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, body: bytes) -> "PrecompressedBody":
+        encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            encoded["br"] = brotli.compress(body, quality=11)
+        return cls(identity=body, digest=hashlib.sha1(body).hexdigest()[:20], encoded=encoded)
+
+    def etag(self, encoding: Optional[str]) -> str:
+        # Each representation gets its own strong validator
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def _accepted(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def json_response(request: Request, body: PrecompressedBody) -> Response:
+    """Serve ``body`` in the best accepted encoding, or 304 if unchanged."""
+
+    accepted = _accepted(request.headers.get("accept-encoding", ""))
+    encoding = next((name for name in _ENCODINGS if name in accepted and name in body.encoded), None)
+    headers = {"ETag": body.etag(encoding), "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match and (if_none_match.strip() == "*" or body.digest in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(body.identity, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(body.encoded[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Render lecture narration offline for replay-mode sessions.
+
+Walks every section and branch slide of configs/lecture_*.yml and
+synthesizes the ones whose text (or voice) changed since the last run.
+The work is spread across worker processes, each loading PrimeSpeech once.
+Results go to the layout described in ``server.narration``. Needs
+PRIMESPEECH_MODEL_DIR like the PrimeSpeech node:
+
+    python -m server.render_narration --voice Doubao --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .lecture_store import LectureStore
+from .narration import (
+    NarrationTrack,
+    load_index,
+    narration_digest,
+    narration_items,
+    save_index,
+    split_sentences,
+    voice_dir,
+)
+
+PRIMESPEECH_DIR = Path(__file__).resolve().parent.parent / "nodes" / "dora-primespeech"
+
+# Streaming granularity stored in the index
+CHUNK_MS = 200
+
+# Per-process state set up by _init_worker
+_wrapper = None
+_language = "zh"
+
+
+def _init_worker(voice: str, device: str, language: str) -> None:
+    """Load PrimeSpeech once per worker process."""
+
+    global _wrapper, _language
+    _language = language
+    sys.path.insert(0, str(PRIMESPEECH_DIR))
+    from dora_primespeech.config import VOICE_CONFIGS
+    from dora_primespeech.moyoyo_tts_wrapper_streaming_fix import StreamingMoYoYoTTSWrapper
+
+    _wrapper = StreamingMoYoYoTTSWrapper(
+        voice=voice.lower().replace(" ", ""),
+        device=device,
+        enable_streaming=False,
+        voice_config=dict(VOICE_CONFIGS[voice]),
+    )
+
+
+def _render_item(job: Tuple[str, str, str, str, str]) -> Tuple[str, Optional[NarrationTrack], str]:
+    """Synthesize one item sentence by sentence and write its PCM file."""
+
+    import numpy as np
+
+    lecture_id, directory, item_id, text, digest = job
+    sentences = []
+    pieces = []
+    sample_rate = 0
+    position = 0
+    try:
+        for sentence in split_sentences(text):
+            sample_rate, audio = _wrapper.synthesize(sentence, language=_language)
+            if audio is None:
+                continue
+            audio = np.asarray(audio, dtype="<f4")
+            start_ms = position * 1000 // sample_rate
+            position += len(audio)
+            sentences.append((start_ms, position * 1000 // sample_rate, sentence))
+            pieces.append(audio)
+    except Exception as exc:  # pragma: no cover - reported by the parent
+        return lecture_id, None, f"{item_id}: {exc}"
+
+    track = NarrationTrack(
+        item_id=item_id,
+        digest=digest,
+        sample_rate=sample_rate,
+        num_samples=position,
+        chunk_samples=max(sample_rate * CHUNK_MS // 1000, 1),
+        sentences=sentences,
+    )
+    path = Path(directory) / track.audio_file
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as handle:
+        for piece in pieces:
+            handle.write(piece.tobytes())
+    tmp.replace(path)
+    return lecture_id, track, ""
+
+
+def plan(
+    lectures: LectureStore, root: Path, voice: str, only: List[str], force: bool
+) -> Tuple[List[Tuple[str, str, str, str, str]], Dict[str, Dict[str, NarrationTrack]]]:
+    """Jobs for items whose audio is missing or stale, plus the kept index entries."""
+
+    jobs = []
+    kept: Dict[str, Dict[str, NarrationTrack]] = {}
+    for lecture in lectures.list_lectures():
+        if only and lecture.id not in only:
+            continue
+        directory = voice_dir(root, lecture.id, voice)
+        directory.mkdir(parents=True, exist_ok=True)
+        index = load_index(directory)
+        kept[lecture.id] = {}
+        for item in narration_items(lecture):
+            digest = narration_digest(voice, item.text)
+            track = index.get(item.item_id)
+            if (
+                not force
+                and track is not None
+                and track.digest == digest
+                and (directory / track.audio_file).exists()
+            ):
+                kept[lecture.id][item.item_id] = track
+            else:
+                jobs.append((lecture.id, str(directory), item.item_id, item.text, digest))
+
+        # Audio of items removed from the lecture
+        wanted = {item.item_id for item in narration_items(lecture)}
+        for item_id, track in index.items():
+            if item_id not in wanted:
+                (directory / track.audio_file).unlink(missing_ok=True)
+    return jobs, kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render lecture narration with PrimeSpeech")
+    parser.add_argument("--config-dir", type=str, default="configs")
+    parser.add_argument("--out", type=str, default=os.getenv("AIROS_NARRATION_DIR", "narration"))
+    parser.add_argument("--voice", type=str, default="Doubao", help="PrimeSpeech voice name")
+    parser.add_argument("--language", type=str, default="zh")
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--lecture", action="append", default=[], help="Only render this lecture id")
+    parser.add_argument("--force", action="store_true", help="Re-render unchanged items too")
+    args = parser.parse_args()
+
+    root = Path(args.out)
+    lectures = LectureStore(Path(args.config_dir))
+    jobs, tracks = plan(lectures, root, args.voice, args.lecture, args.force)
+    unchanged = sum(len(kept) for kept in tracks.values())
+    print(f"{len(jobs)} items to render, {unchanged} unchanged")
+
+    failures = []
+    if jobs:
+        start = time.time()
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            processes=min(args.workers, len(jobs)),
+            initializer=_init_worker,
+            initargs=(args.voice, args.device, args.language),
+        ) as pool:
+            for done, (lecture_id, track, error) in enumerate(
+                pool.imap_unordered(_render_item, jobs), start=1
+            ):
+                if track is None:
+                    failures.append(error)
+                    print(f"  ✗ [{done}/{len(jobs)}] {error}")
+                    continue
+                tracks[lecture_id][track.item_id] = track
+                print(f"  ✓ [{done}/{len(jobs)}] {lecture_id}/{track.item_id} "
+                      f"{track.duration_ms / 1000:.1f}s audio")
+        print(f"Rendered in {time.time() - start:.1f}s")
+
+    for lecture_id, lecture_tracks in tracks.items():
+        save_index(voice_dir(root, lecture_id, args.voice), lecture_tracks)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
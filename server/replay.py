@@ -0,0 +1,110 @@
+"""Playback of pre-rendered narration for replay-mode sessions."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Optional
+
+from .audio_frames import AudioFrame, FrameType, SampleFormat
+from .dataflow import SessionChannels
+from .models import Lecture
+from .narration import NarrationStore
+from .ws_messages import SlideGoto
+
+LOGGER = logging.getLogger(__name__)
+
+# How far audio may be sent ahead of real-time playback
+LEAD_SECONDS = 1.0
+# Time spent on a section that has no rendered narration
+SILENT_SECTION_SECONDS = 3.0
+
+
+class ReplayPlayer:
+    """Walk a lecture's sections, streaming their rendered narration.
+
+    For each section the player sends ``slide.goto``, then the narration
+    chunks, then ``tts.audio.end``. Chunks are sent at most ``LEAD_SECONDS``
+    ahead of real time and wait for room in the session outbox rather than
+    being dropped. ``control`` handles the client's pause/resume/next/prev.
+    """
+
+    def __init__(self, lecture: Lecture, narration: NarrationStore, channel: SessionChannels) -> None:
+        self.lecture = lecture
+        self.narration = narration
+        self.channel = channel
+        self.index = 0
+        self._jump: Optional[int] = None
+        self._playing = asyncio.Event()
+        self._playing.set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    def control(self, action: str) -> None:
+        if action == "pause":
+            self._playing.clear()
+        elif action == "resume":
+            self._playing.set()
+        elif action in ("next", "prev"):
+            step = 1 if action == "next" else -1
+            self._jump = min(max(self.index + step, 0), len(self.lecture.sections) - 1)
+            self._playing.set()
+
+    async def _run(self) -> None:
+        sections = self.lecture.sections
+        while self.index < len(sections):
+            section = sections[self.index]
+            await self._play_section(section.id)
+            if self._jump is not None:
+                self.index, self._jump = self._jump, None
+            else:
+                self.index += 1
+        LOGGER.info("Replay of %s finished", self.lecture.id)
+
+    async def _play_section(self, section_id: str) -> None:
+        outbound = self.channel.outbound
+        await outbound.put_wait(SlideGoto(section_id=section_id))
+
+        track = self.narration.track(self.lecture.id, section_id)
+        if track is None:
+            LOGGER.warning("No rendered narration for %s/%s", self.lecture.id, section_id)
+            await asyncio.sleep(SILENT_SECTION_SECONDS)
+            return
+        if track.sample_rate <= 0 or track.num_samples == 0:
+            # Nothing to narrate, e.g. a slide with only an image
+            await asyncio.sleep(SILENT_SECTION_SECONDS)
+            return
+
+        self.channel.pacer.sample_rate = track.sample_rate
+        chunk_seconds = track.chunk_samples / track.sample_rate
+        playhead = time.monotonic()
+        for chunk in self.narration.chunks(self.lecture.id, track):
+            if not self._playing.is_set():
+                await self._playing.wait()
+                playhead = time.monotonic()
+            if self._jump is not None:
+                break
+            ahead = playhead - time.monotonic()
+            if ahead > LEAD_SECONDS:
+                await asyncio.sleep(ahead - LEAD_SECONDS)
+            playhead = max(playhead, time.monotonic()) + chunk_seconds
+            self.channel.tts_seq += 1
+            await outbound.put_wait(
+                AudioFrame(
+                    type=FrameType.TTS_AUDIO_CHUNK,
+                    seq=self.channel.tts_seq,
+                    sample_format=SampleFormat.PCM_F32LE,
+                    payload=chunk,
+                )
+            )
+        await outbound.put_wait(AudioFrame(type=FrameType.TTS_AUDIO_END, seq=self.channel.tts_seq))
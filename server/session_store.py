@@ -0,0 +1,155 @@
+"""Pluggable storage for session records shared between server workers.
+
+Each worker keeps its live sessions in ``SessionManager``. The store is the
+shared view that lets a worker accept a websocket for a session created
+elsewhere. A record holds the session metadata and the id of the worker
+that currently owns it.
+
+``memory://`` keeps records in the process and suits a single worker.
+``redis://`` uses ``redis.asyncio`` (optional dependency).
+``local-redis://`` is an in-process stand-in exposing the same commands,
+for tests and single-process development. Neither ``memory://`` nor
+``local-redis://`` is shared between worker processes.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .models import SessionInfo
+
+
+@dataclass(slots=True)
+class StoredSession:
+    """A session record as seen by every worker."""
+
+    info: SessionInfo
+    owner: str
+
+
+class SessionStore(ABC):
+    """Shared registry of session metadata and ownership."""
+
+    @abstractmethod
+    async def save(self, session: StoredSession) -> None:
+        """Create or update a record, refreshing its TTL."""
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[StoredSession]:
+        """Return the record for ``session_id`` if it exists."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove a record; missing ids are ignored."""
+
+    async def close(self) -> None:
+        """Release connections held by the store."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; expiry is left to the owning SessionManager."""
+
+    def __init__(self) -> None:
+        self._records: Dict[str, StoredSession] = {}
+
+    async def save(self, session: StoredSession) -> None:
+        self._records[session.info.session_id] = session
+
+    async def load(self, session_id: str) -> Optional[StoredSession]:
+        return self._records.get(session_id)
+
+    async def delete(self, session_id: str) -> None:
+        self._records.pop(session_id, None)
+
+
+class LocalRedis:
+    """In-process subset of the ``redis.asyncio`` client API.
+
+    Implements ``get``, ``set`` (with ``ex``), ``delete`` and ``aclose``
+    with the same semantics, so ``RedisSessionStore`` can be exercised
+    without a Redis server.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+class RedisSessionStore(SessionStore):
+    """Store records as JSON strings in Redis with an idle TTL."""
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "airos:session:") -> None:
+        self._client = client
+        self._ttl = int(ttl)
+        self._prefix = prefix
+
+    async def save(self, session: StoredSession) -> None:
+        payload = json.dumps(
+            {"owner": session.owner, "info": session.info.model_dump(mode="json")}
+        )
+        await self._client.set(self._prefix + session.info.session_id, payload, ex=self._ttl)
+
+    async def load(self, session_id: str) -> Optional[StoredSession]:
+        raw = await self._client.get(self._prefix + session_id)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return StoredSession(info=SessionInfo.model_validate(data["info"]), owner=data["owner"])
+
+    async def delete(self, session_id: str) -> None:
+        await self._client.delete(self._prefix + session_id)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+# Schemes whose records live in the process that created the store
+PER_PROCESS_SCHEMES = ("memory", "local-redis")
+
+
+def is_shared_store(url: str) -> bool:
+    """Whether a store built from ``url`` is visible to other processes."""
+
+    return (url.split("://", 1)[0] if url else "memory") not in PER_PROCESS_SCHEMES
+
+
+def create_session_store(url: str, ttl: float) -> SessionStore:
+    """Build a store from a URL such as ``memory://`` or ``redis://host:6379/0``."""
+
+    scheme = url.split("://", 1)[0] if url else "memory"
+    if scheme == "memory":
+        return InMemorySessionStore()
+    if scheme == "local-redis":
+        return RedisSessionStore(LocalRedis(), ttl)
+    if scheme in ("redis", "rediss", "unix"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("The redis package is required for a redis:// session store") from exc
+        return RedisSessionStore(redis.from_url(url), ttl)
+    raise ValueError(f"Unsupported session store URL '{url}'")
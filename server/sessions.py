@@ -3,14 +3,23 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Awaitable, Callable, List, Optional
 from uuid import uuid4
 
 from fastapi import HTTPException, status
 
 from .models import SessionCreateRequest, SessionInfo
+from .session_store import InMemorySessionStore, SessionStore, StoredSession
+
+LOGGER = logging.getLogger(__name__)
+
+EvictionHook = Callable[[str], Awaitable[None]]
 
 
 @dataclass(slots=True)
@@ -19,65 +28,207 @@ class SessionRecord:
 
     info: SessionInfo
     connected: bool = False
+    last_seen: float = field(default_factory=time.monotonic)
 
 
 class SessionManager:
-    """In-memory registry for active lecture sessions."""
-
-    def __init__(self) -> None:
-        self._sessions: Dict[str, SessionRecord] = {}
-        self._lock = asyncio.Lock()
+    """In-memory registry for active lecture sessions.
+
+    All methods run on the event loop, so no lock is needed and reads are
+    plain dict lookups. Methods do await the store and eviction hooks, so
+    after such an await they re-check the registry instead of trusting what
+    they read before it (see ``_adopt`` and ``_evict``). Records
+    are kept in least-recently-used order. Detached sessions are evicted once
+    they have been idle for ``idle_ttl`` seconds, or earlier when the
+    registry grows beyond ``max_sessions``. Connected sessions are never
+    evicted. Eviction hooks (e.g. ``DataflowAdapter.close_session``) release
+    per-session state held elsewhere.
+
+    With several workers, records are also written to a shared ``store``
+    under this worker's ``worker_id``. A websocket that reaches a worker
+    other than the one that created its session adopts the session from the
+    store, so the worker holding the socket always owns its dataflow channel.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 1800.0,
+        max_sessions: int = 10_000,
+        sweep_interval: float = 30.0,
+        store: Optional[SessionStore] = None,
+        worker_id: str = "",
+    ) -> None:
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.worker_id = worker_id
+        self._store = store or InMemorySessionStore()
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._eviction_hooks: List[EvictionHook] = []
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add_eviction_hook(self, hook: EvictionHook) -> None:
+        """Call ``hook(session_id)`` whenever a session is evicted."""
+
+        self._eviction_hooks.append(hook)
+
+    async def start(self) -> None:
+        """Start the background sweeper."""
+
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sweeper
+            self._sweeper = None
+        await self._store.close()
 
     async def create_session(self, request: SessionCreateRequest) -> SessionInfo:
         """Create a new session for a given lecture."""
 
-        async with self._lock:
-            session_id = f"sess_{uuid4().hex[:12]}"
-            info = SessionInfo(
-                session_id=session_id,
-                lecture_id=request.lecture_id,
-                locale=request.locale,
-                mode=request.mode,
-                created_at=datetime.now(tz=timezone.utc),
-            )
-            self._sessions[session_id] = SessionRecord(info=info)
-            return info
+        if len(self._sessions) >= self.max_sessions:
+            await self._evict(self._over_capacity(reserve=1))
+            if len(self._sessions) >= self.max_sessions:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many active sessions",
+                )
+
+        # The worker prefix lets a proxy route websockets back to their creator
+        prefix = f"sess_{self.worker_id}_" if self.worker_id else "sess_"
+        session_id = f"{prefix}{uuid4().hex[:12]}"
+        info = SessionInfo(
+            session_id=session_id,
+            lecture_id=request.lecture_id,
+            locale=request.locale,
+            mode=request.mode,
+            created_at=datetime.now(tz=timezone.utc),
+        )
+        self._sessions[session_id] = SessionRecord(info=info)
+        await self._store.save(StoredSession(info=info, owner=self.worker_id))
+        return info
 
     async def get(self, session_id: str) -> SessionInfo:
         """Fetch session metadata or raise an HTTP 404 error."""
 
-        async with self._lock:
-            record = self._sessions.get(session_id)
-            if record is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Unknown session_id '{session_id}'",
-                )
+        record = self._sessions.get(session_id)
+        if record is not None:
             return record.info
+        stored = await self._store.load(session_id)
+        if stored is None:
+            raise self._not_found(session_id)
+        return stored.info
 
     async def mark_connected(self, session_id: str) -> None:
         """Mark a session as having an attached websocket."""
 
-        async with self._lock:
-            record = self._sessions.get(session_id)
-            if record is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Unknown session_id '{session_id}'",
-                )
-            record.connected = True
+        record = self._sessions.get(session_id)
+        if record is None:
+            record = await self._adopt(session_id)
+        record.connected = True
+        self._touch(session_id, record)
 
     async def detach(self, session_id: str) -> None:
         """Mark the websocket as disconnected."""
 
-        async with self._lock:
-            record = self._sessions.get(session_id)
-            if record is None:
-                return
-            record.connected = False
+        record = self._sessions.get(session_id)
+        if record is None:
+            return
+        record.connected = False
+        self._touch(session_id, record)
+        await self._store.save(StoredSession(info=record.info, owner=self.worker_id))
 
     async def list_sessions(self) -> list[SessionInfo]:
         """Return all active session metadata."""
 
-        async with self._lock:
-            return [record.info for record in self._sessions.values()]
+        return [record.info for record in self._sessions.values()]
+
+    async def sweep(self) -> int:
+        """Evict idle and excess detached sessions; returns how many."""
+
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = [
+            session_id
+            for session_id, record in self._sessions.items()
+            if not record.connected and record.last_seen < cutoff
+        ]
+        evicted = await self._evict(expired)
+        evicted += await self._evict(self._over_capacity())
+        # Keep shared records of live sessions from expiring in the store
+        for record in list(self._sessions.values()):
+            if record.connected:
+                await self._store.save(StoredSession(info=record.info, owner=self.worker_id))
+        return evicted
+
+    @staticmethod
+    def _not_found(session_id: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown session_id '{session_id}'",
+        )
+
+    async def _adopt(self, session_id: str) -> SessionRecord:
+        """Take over a session created by another worker."""
+
+        stored = await self._store.load(session_id)
+        if stored is None:
+            raise self._not_found(session_id)
+        record = self._sessions.get(session_id)
+        if record is None:
+            record = SessionRecord(info=stored.info)
+            self._sessions[session_id] = record
+        await self._store.save(StoredSession(info=stored.info, owner=self.worker_id))
+        LOGGER.info("Worker %r adopted session %s from %r", self.worker_id, session_id, stored.owner)
+        return record
+
+    def _touch(self, session_id: str, record: SessionRecord) -> None:
+        record.last_seen = time.monotonic()
+        self._sessions.move_to_end(session_id)
+
+    def _over_capacity(self, reserve: int = 0) -> list[str]:
+        """Least recently used detached sessions beyond ``max_sessions``."""
+
+        excess = len(self._sessions) + reserve - self.max_sessions
+        victims: list[str] = []
+        if excess <= 0:
+            return victims
+        for session_id, record in self._sessions.items():
+            if not record.connected:
+                victims.append(session_id)
+                if len(victims) == excess:
+                    break
+        return victims
+
+    async def _evict(self, session_ids: list[str]) -> int:
+        count = 0
+        for session_id in session_ids:
+            record = self._sessions.get(session_id)
+            # A hook may have yielded to the loop; skip sessions that reattached
+            if record is None or record.connected:
+                continue
+            del self._sessions[session_id]
+            self.evicted += 1
+            count += 1
+            stored = await self._store.load(session_id)
+            if stored is not None and stored.owner == self.worker_id:
+                await self._store.delete(session_id)
+            for hook in self._eviction_hooks:
+                try:
+                    await hook(session_id)
+                except Exception:  # pragma: no cover - hooks must not stop the sweep
+                    LOGGER.exception("Eviction hook failed for session %s", session_id)
+        return count
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            evicted = await self.sweep()
+            if evicted:
+                LOGGER.info("Evicted %d idle sessions, %d remain", evicted, len(self._sessions))
@@ -24,7 +24,11 @@ class UserQuestionText(ClientMessageBase):
 
 
 class UserAudioChunk(ClientMessageBase):
-    """PCM audio frame from the client."""
+    """PCM audio frame from the client.
+
+    Clients that negotiate ``airos.audio.v1`` send binary frames instead; see
+    ``server.audio_frames``.
+    """
 
     type: Literal["user.audio.chunk"] = "user.audio.chunk"
     seq: int
@@ -45,8 +49,15 @@ class UserControl(ClientMessageBase):
     action: Literal["pause", "resume", "next", "prev"]
 
 
+class UserPlaybackAck(ClientMessageBase):
+    """The client finished playing the TTS chunk numbered ``seq``."""
+
+    type: Literal["user.playback.ack"] = "user.playback.ack"
+    seq: int
+
+
 ClientMessage = Annotated[
-    Union[UserQuestionText, UserAudioChunk, UserAudioEnd, UserControl],
+    Union[UserQuestionText, UserAudioChunk, UserAudioEnd, UserControl, UserPlaybackAck],
     Field(discriminator="type"),
 ]
 
@@ -79,7 +90,7 @@ class TutorAnswerText(ServerMessageBase):
 
 
 class TtsAudioChunk(ServerMessageBase):
-    """Chunk of synthesized audio."""
+    """Chunk of synthesized audio (binary frame under ``airos.audio.v1``)."""
 
     type: Literal["tts.audio.chunk"] = "tts.audio.chunk"
     seq: int
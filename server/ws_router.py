@@ -4,18 +4,33 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import json
 import logging
+from typing import Optional, Union
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from .dataflow import DataflowAdapter
+from .audio_frames import (
+    AUDIO_SUBPROTOCOL,
+    AudioFrame,
+    audio_frame_to_json,
+    decode_audio_frame,
+    encode_audio_frame,
+)
+from .dataflow import DataflowAdapter, OutboundMessage, SessionChannels
+from .lecture_store import LectureStore
+from .narration import NarrationStore
+from .replay import ReplayPlayer
 from .sessions import SessionManager
 
 LOGGER = logging.getLogger(__name__)
 
 
 def create_ws_router(
-    session_manager: SessionManager, dataflow: DataflowAdapter
+    session_manager: SessionManager,
+    dataflow: DataflowAdapter,
+    lectures: LectureStore,
+    narration: Optional[NarrationStore] = None,
 ) -> APIRouter:
     """Create a router that exposes the WebSocket session endpoint."""
 
@@ -23,20 +38,51 @@ def create_ws_router(
 
     @router.websocket("/ws/{session_id}")
     async def session_socket(websocket: WebSocket, session_id: str) -> None:
-        await session_manager.get(session_id)
+        info = await session_manager.get(session_id)
         await session_manager.mark_connected(session_id)
-        await dataflow.ensure_session(session_id)
-        await websocket.accept()
-        sender = asyncio.create_task(
-            _forward_server_messages(websocket, dataflow, session_id)
-        )
+        channel = await dataflow.ensure_session(session_id)
+        # Clients opt into binary audio frames by offering the subprotocol
+        binary_audio = AUDIO_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+        await websocket.accept(subprotocol=AUDIO_SUBPROTOCOL if binary_audio else None)
+        sender = asyncio.create_task(_forward_server_messages(websocket, channel, binary_audio))
+        # Replay sessions play pre-rendered narration; slide controls drive the player
+        player = None
+        if info.mode == "replay" and narration is not None:
+            player = ReplayPlayer(lectures.get_lecture(info.lecture_id), narration, channel)
+            player.start()
         try:
             while True:
-                payload = await websocket.receive_json()
-                await dataflow.route_inbound(session_id, payload)
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                data = message.get("bytes")
+                if data is None:
+                    payload = json.loads(message["text"])
+                    if player is not None and payload.get("type") == "user.control":
+                        action = payload.get("action", "")
+                        player.control(action)
+                        if action in ("next", "prev"):
+                            dataflow.interrupt_audio(session_id)
+                    else:
+                        await dataflow.route_inbound(session_id, payload)
+                elif not binary_audio:
+                    LOGGER.warning(
+                        "Ignoring binary frame on session %s without %s",
+                        session_id,
+                        AUDIO_SUBPROTOCOL,
+                    )
+                else:
+                    try:
+                        frame = decode_audio_frame(data)
+                    except ValueError as exc:
+                        LOGGER.warning("Dropping malformed audio frame on %s: %s", session_id, exc)
+                        continue
+                    await dataflow.route_audio(session_id, frame)
         except WebSocketDisconnect:
             LOGGER.info("WebSocket disconnected for session %s", session_id)
         finally:
+            if player is not None:
+                await player.stop()
             sender.cancel()
             with contextlib.suppress(asyncio.CancelledError):
                 await sender
@@ -46,14 +92,44 @@ def create_ws_router(
     return router
 
 
+def encode_outbound(message: OutboundMessage, binary_audio: bool) -> Union[str, bytes]:
+    """Serialize an outbound message for ``send_bytes`` or ``send_text``."""
+
+    if isinstance(message, AudioFrame):
+        if binary_audio:
+            return encode_audio_frame(message)
+        return audio_frame_to_json(message)
+    return message.model_dump_json()
+
+
 async def _forward_server_messages(
-    websocket: WebSocket, dataflow: DataflowAdapter, session_id: str
+    websocket: WebSocket,
+    channel: SessionChannels,
+    binary_audio: bool,
 ) -> None:
-    """Forward messages emitted by the dataflow adapter to the client."""
+    """Forward messages emitted by the dataflow adapter to the client.
+
+    Other messages are sent as soon as they are queued. TTS audio goes
+    through the session's pacer and is released at playback rate. While the
+    pacer is full, audio is left in the outbox, so its producers wait.
+    """
 
+    outbound = channel.outbound
+    pacer = channel.pacer
     try:
         while True:
-            message = await dataflow.next_outbound(session_id)
-            await websocket.send_json(message.model_dump())
+            message = pacer.pop_ready()
+            if message is None:
+                message = await outbound.get(timeout=pacer.delay(), include_audio=not pacer.full)
+                if message is None:
+                    continue
+                if isinstance(message, AudioFrame):
+                    pacer.push(message)
+                    continue
+            payload = encode_outbound(message, binary_audio)
+            if isinstance(payload, bytes):
+                await websocket.send_bytes(payload)
+            else:
+                await websocket.send_text(payload)
     except asyncio.CancelledError:  # pragma: no cover - cancellation path
         pass
@@ -0,0 +1,52 @@
+"""WebSocket ingress: what client messages become in the graph."""
+
+import asyncio
+import json
+
+from nodes.io.ws_server import FRAME_USER_AUDIO_END, FORMAT_PCM_S16LE, WebSocketServerNode, _FRAME_HEADER
+
+
+def _node():
+    emitted = []
+    node = WebSocketServerNode(emit=lambda output_id, value, metadata: emitted.append((output_id, value, metadata)))
+    return node, emitted
+
+
+def test_binary_audio_end_is_not_text_input():
+    node, emitted = _node()
+    frame = _FRAME_HEADER.pack(FRAME_USER_AUDIO_END, FORMAT_PCM_S16LE, 0, 7)
+
+    asyncio.run(node._on_binary("s1", frame))
+
+    ((output_id, value, metadata),) = emitted
+    assert output_id == "audio_end"
+    assert value.to_pylist() == [7]
+    assert metadata["session_id"] == "s1"
+
+
+def test_json_audio_end_is_not_text_input():
+    node, emitted = _node()
+
+    asyncio.run(node._on_text("s1", json.dumps({"type": "user.audio.end", "seq": 3})))
+
+    assert [output_id for output_id, _, _ in emitted] == ["audio_end"]
+
+
+def test_malformed_messages_are_dropped_one_by_one():
+    node, emitted = _node()
+
+    async def receive():
+        for text in (
+            json.dumps({"type": "user.audio.chunk", "seq": 1, "base64": "not base64!"}),
+            json.dumps(["user.audio.end"]),
+            json.dumps("hello"),
+            json.dumps({"type": "user.audio.end", "seq": "x"}),
+            json.dumps({"type": "user.audio.chunk", "seq": 2, "base64": "AAABAA=="}),
+        ):
+            await node._on_text("s1", text)
+
+    asyncio.run(receive())
+
+    ((output_id, value, _),) = emitted
+    assert output_id == "audio_in"
+    assert value.to_pylist() == [0, 1]
@@ -0,0 +1,26 @@
+"""Local vector memory: expiry and IVF index upkeep."""
+
+import time
+
+from nodes.memory.local_mem import LocalMemoryConfig, LocalMemoryNode, MemoryEntry
+
+
+def test_len_does_not_count_expired_entries(monkeypatch):
+    memory = LocalMemoryNode(LocalMemoryConfig(dim=32))
+    memory.write_batch([MemoryEntry(key="a", value="alpha", ttl_seconds=10), MemoryEntry(key="b", value="beta")])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 60)
+
+    assert len(memory) == 1
+
+
+def test_deletes_count_toward_an_index_rebuild():
+    memory = LocalMemoryNode(LocalMemoryConfig(dim=32, ann_threshold=16))
+    memory.write_batch([MemoryEntry(key=f"k{i}", value=f"snippet {i}") for i in range(40)])
+    trained = memory._ivf
+    assert trained is not None
+
+    for i in range(trained.trained_rows - trained.added):
+        memory.delete(f"k{i}")
+
+    assert memory._ivf is not None and memory._ivf is not trained
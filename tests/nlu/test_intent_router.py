@@ -0,0 +1,43 @@
+"""Routing of control commands mixed with smalltalk."""
+
+import pytest
+
+from nodes.nlu.intent_router import IntentResult, IntentRouterNode
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouterNode()
+
+
+@pytest.mark.parametrize(
+    "text, control",
+    [
+        ("好的，继续", "resume"),
+        ("谢谢，下一页", "next"),
+        ("thanks, go on", "resume"),
+    ],
+)
+def test_smalltalk_around_a_control_is_settled_by_rules(router, text, control):
+    result = router.match_rules(text)
+
+    assert result is not None
+    assert result.control == control
+    assert result.tier == "rule"
+
+
+def test_short_english_control_is_not_a_question(router):
+    (result,) = router.classify_batch(["stop it"])
+
+    assert result.control == "pause"
+
+
+def test_question_marker_still_defers_to_the_model(router):
+    assert router.match_rules("好的，下一页是什么") is None
+
+
+@pytest.mark.parametrize("text", ["", "   ", "？！…"])
+def test_text_without_words_is_ignored(router, text):
+    (result,) = router.classify_batch([text])
+
+    assert result == IntentResult()
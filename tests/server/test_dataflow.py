@@ -0,0 +1,56 @@
+"""DataflowAdapter handling of dataflow inputs."""
+
+import asyncio
+
+import numpy as np
+import pyarrow as pa
+
+from server.audio_frames import FrameType, SampleFormat
+from server.dataflow import DataflowAdapter, SessionChannels
+from server.dora_bridge import DoraEvent
+from server.metrics import ServerMetrics
+from server.outbox import SessionOutbox
+from server.pacing import AudioPacer
+
+
+def _channel() -> SessionChannels:
+    return SessionChannels(outbound=SessionOutbox(16), pacer=AudioPacer())
+
+
+def test_tts_chunk_accepts_primespeech_audio():
+    # PrimeSpeech sends each fragment as pa.array([ndarray]), a list<float> array
+    samples = np.linspace(-1.0, 1.0, 8, dtype=np.float32)
+    event = DoraEvent(
+        "audio",
+        pa.array([samples]),
+        {"session_id": "s1", "sample_rate": 32000},
+    )
+    channel = _channel()
+
+    frame = DataflowAdapter()._tts_chunk(channel, event)
+
+    assert frame.type == FrameType.TTS_AUDIO_CHUNK
+    assert frame.sample_format == SampleFormat.PCM_F32LE
+    assert frame.seq == 1
+    np.testing.assert_array_equal(np.frombuffer(frame.payload, dtype="<f4"), samples)
+
+
+def test_tts_chunk_accepts_flat_audio():
+    samples = np.arange(4, dtype=np.float64)
+    event = DoraEvent("tts_audio", pa.array(samples), {"session_id": "s1"})
+
+    frame = DataflowAdapter()._tts_chunk(_channel(), event)
+
+    np.testing.assert_array_equal(np.frombuffer(frame.payload, dtype="<f4"), samples)
+
+
+def test_llm_text_only_times_the_turn():
+    metrics = ServerMetrics()
+    adapter = DataflowAdapter(metrics=metrics)
+    channel = asyncio.run(adapter.ensure_session("s1"))
+    metrics.turn_event("", "speech_end")
+
+    adapter._on_event(DoraEvent("llm_text", pa.array(["Hello"]), {}))
+
+    assert len(channel.outbound) == 0
+    assert "airos_llm_first_token_seconds_count 1" in metrics.render()
@@ -0,0 +1,34 @@
+"""Loading and reloading lecture files."""
+
+import pytest
+import yaml
+
+from server.lecture_store import LectureStore
+
+GOOD = """
+id: {id}
+title: Lecture
+sections:
+  - id: intro
+    html: <p>你好</p>
+"""
+
+
+def test_bad_new_file_is_skipped_on_reload(tmp_path):
+    (tmp_path / "lecture_a.yml").write_text(GOOD.format(id="a"), encoding="utf-8")
+    store = LectureStore(tmp_path)
+    (tmp_path / "lecture_b.yml").write_text("id: b\nsections: [", encoding="utf-8")
+    (tmp_path / "lecture_c.yml").write_text(GOOD.format(id="c"), encoding="utf-8")
+
+    assert store.reload() == ["c"]
+    assert store.get_lecture("a").id == "a"
+
+    (tmp_path / "lecture_b.yml").write_text(GOOD.format(id="b") + "\n", encoding="utf-8")
+    assert store.reload() == ["b"]
+
+
+def test_bad_file_fails_the_initial_load(tmp_path):
+    (tmp_path / "lecture_b.yml").write_text("id: b\nsections: [", encoding="utf-8")
+
+    with pytest.raises(yaml.YAMLError):
+        LectureStore(tmp_path)
@@ -0,0 +1,15 @@
+"""Text exposition of the server metrics."""
+
+from server.metrics import Counter, MetricsRegistry
+
+
+def test_counter_header_names_the_total_family():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("airos_ws_messages", "WebSocket messages", ["direction"]))
+    counter.inc(direction="in")
+
+    lines = registry.render().splitlines()
+
+    assert "# HELP airos_ws_messages_total WebSocket messages" in lines
+    assert "# TYPE airos_ws_messages_total counter" in lines
+    assert 'airos_ws_messages_total{direction="in"} 1.0' in lines
@@ -0,0 +1,63 @@
+"""SessionOutbox coalescing, dropping and ordering."""
+
+import asyncio
+
+from server.audio_frames import AudioFrame, FrameType
+from server.outbox import SessionOutbox
+from server.ws_messages import AsrFinal, AsrPartial, TutorAnswerText
+
+
+def _drain(outbox):
+    async def collect():
+        return [await outbox.get() for _ in range(len(outbox))]
+
+    return asyncio.run(collect())
+
+
+def test_partials_coalesce_at_the_tail():
+    outbox = SessionOutbox(8)
+    outbox.put(AsrPartial(text="a"))
+    outbox.put(AsrPartial(text="ab"))
+    outbox.put(AsrPartial(text="abc"))
+
+    assert [message.text for message in _drain(outbox)] == ["abc"]
+    assert outbox.metrics.coalesced == 2
+
+
+def test_partial_never_overtakes_a_queued_final():
+    outbox = SessionOutbox(8)
+    outbox.put(AsrPartial(text="a"))
+    outbox.put(AsrFinal(text="a final"))
+    outbox.put(AsrPartial(text="b"))
+
+    messages = _drain(outbox)
+
+    assert [(message.type, message.text) for message in messages] == [
+        ("asr.partial", "a"),
+        ("asr.final", "a final"),
+        ("asr.partial", "b"),
+    ]
+
+
+def test_full_queue_evicts_partials_but_keeps_audio():
+    outbox = SessionOutbox(2)
+    chunk = AudioFrame(type=FrameType.TTS_AUDIO_CHUNK, seq=1, payload=b"\0\0")
+    outbox.put(chunk)
+    outbox.put(AsrPartial(text="a"))
+    outbox.put(TutorAnswerText(text="answer"))
+
+    assert _drain(outbox) == [chunk, TutorAnswerText(text="answer")]
+    assert outbox.metrics.dropped == 1
+
+
+def test_get_can_skip_audio():
+    outbox = SessionOutbox(8)
+    chunk = AudioFrame(type=FrameType.TTS_AUDIO_CHUNK, seq=1, payload=b"\0\0")
+    outbox.put(chunk)
+    outbox.put(TutorAnswerText(text="answer"))
+
+    async def first_non_audio():
+        return await outbox.get(timeout=0.1, include_audio=False)
+
+    assert asyncio.run(first_non_audio()) == TutorAnswerText(text="answer")
+    assert _drain(outbox) == [chunk]
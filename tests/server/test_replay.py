@@ -0,0 +1,66 @@
+"""Replay of pre-rendered lecture narration."""
+
+import asyncio
+
+import numpy as np
+
+from server import replay
+from server.audio_frames import AudioFrame, FrameType
+from server.dataflow import SessionChannels
+from server.models import Lecture, LectureSection
+from server.narration import NarrationTrack
+from server.outbox import SessionOutbox
+from server.pacing import AudioPacer
+from server.ws_messages import SlideGoto
+
+
+class FakeNarration:
+    def __init__(self, tracks, audio):
+        self.tracks = tracks
+        self.audio = audio
+
+    def track(self, lecture_id, item_id):
+        return self.tracks.get(item_id)
+
+    def chunks(self, lecture_id, track):
+        data = self.audio[track.item_id]
+        step = track.chunk_samples
+        for offset in range(0, len(data), step):
+            yield data[offset:offset + step].tobytes()
+
+
+def test_replay_skips_image_only_slide(monkeypatch):
+    monkeypatch.setattr(replay, "SILENT_SECTION_SECONDS", 0.01)
+    lecture = Lecture(
+        id="lec",
+        title="Lecture",
+        sections=[
+            LectureSection(id="intro", html="<p>你好</p>"),
+            LectureSection(id="figure", html='<img src="plot.png"/>'),
+            LectureSection(id="outro", html="<p>再见</p>"),
+        ],
+    )
+    audio = {"intro": np.zeros(160, "<f4"), "outro": np.zeros(160, "<f4")}
+    tracks = {
+        "intro": NarrationTrack("intro", "d1", 16000, 160, 80),
+        # What render_narration writes for a slide with no text
+        "figure": NarrationTrack("figure", "d2", 0, 0, 1),
+        "outro": NarrationTrack("outro", "d3", 16000, 160, 80),
+    }
+    channel = SessionChannels(outbound=SessionOutbox(64), pacer=AudioPacer())
+
+    async def play():
+        player = replay.ReplayPlayer(lecture, FakeNarration(tracks, audio), channel)
+        player.start()
+        await asyncio.wait_for(player._task, timeout=5)
+        messages = []
+        while len(channel.outbound):
+            messages.append(await channel.outbound.get())
+        return messages
+
+    messages = asyncio.run(play())
+
+    slides = [message.section_id for message in messages if isinstance(message, SlideGoto)]
+    assert slides == ["intro", "figure", "outro"]
+    ends = [m for m in messages if isinstance(m, AudioFrame) and m.type == FrameType.TTS_AUDIO_END]
+    assert len(ends) == 2
@@ -0,0 +1,17 @@
+"""Multi-worker startup."""
+
+import dataclasses
+
+import pytest
+
+import server.__main__ as entrypoint
+from server.config import Settings
+
+
+@pytest.mark.parametrize("url", ["memory://", "local-redis://"])
+def test_workers_refuse_a_per_process_store(monkeypatch, url):
+    settings = dataclasses.replace(Settings(), workers=2, session_store_url=url)
+    monkeypatch.setattr(entrypoint, "get_settings", lambda: settings)
+
+    with pytest.raises(SystemExit, match="shared session store"):
+        entrypoint.main()